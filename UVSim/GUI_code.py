@@ -31,6 +31,7 @@ def run_prog():
     OutputHandler.get_input_vals(GUI.current_editor.text_editor.get("1.0", "end-1c").split('\n'))
 
     OutputHandler.set_boxes(GUI.output_box, GUI.output_box) #Edit if needed
+    OutputHandler.set_sink(GUI.write_to_output) # Engine output goes to the output window
     simulator = UVSim()
     program = validate_program(GUI.read_from_editor())
     # program = [int(line.strip().lstrip('+')) for line in GUI.read_from_editor() if line.strip()]
@@ -281,6 +281,7 @@ class UVSimApp:
     def display_error(self, message):
         self.update_console("ERROR: " + message)
 
-root = tk.Tk()
-app = UVSimApp(root)
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    root = tk.Tk()
+    app = UVSimApp(root)
+    root.mainloop()
@@ -1,8 +1,10 @@
-import tkinter as tk
 import time
+# No GUI imports here: the engine and its ops modules import this file, and headless
+# runs must not pay for (or require) Tk. The GUI installs its own sink with set_sink().
 class OutputHandler:
     output_box = None
     input_box = None
+    sink = None # Callable that receives each output line; None discards output
     input_invalid = True #We test if inputs are valid
     via_terminal = False
     """
@@ -16,14 +18,16 @@ class OutputHandler:
         cls.output_box = output_box
         cls.input_box = input_box
 
+    @classmethod
+    def set_sink(cls, sink):
+        """Sets the callable that receives output lines (None to discard them)."""
+        cls.sink = sink
+
     @classmethod
     def write_to_output(cls, text: str):
-        """Writes text to the output window."""
-        if cls.output_box:
-            cls.output_box.config(state='normal')
-            cls.output_box.insert('end', text + "\n")
-            cls.output_box.config(state='disabled')
-            cls.output_box.yview('end')
+        """Passes text to the output sink."""
+        if cls.sink is not None:
+            cls.sink(text)
     
     @classmethod
     def get_input_vals(cls, lyst):
@@ -0,0 +1,123 @@
+import asyncio
+import inspect
+import sys
+import time
+
+from uvsim_core_logic import OutputSink, UVSim
+
+# asyncio front end for the 6-digit simulator. AsyncUVSim.run() executes on the
+# run_fast() path in slices and awaits between them, so many simulations can share
+# one event loop: READ awaits the io_read coroutine (a socket, queue, file...) and
+# the loop gets control back every `yield_interval` instructions. No threads are used.
+
+
+class AsyncUVSim(UVSim):
+    """
+    UVSim whose run() is a coroutine and whose io_read/io_write may be async.
+
+    io_read is called (and awaited if it returns an awaitable) for each READ;
+    io_write likewise for each WRITE. Plain functions work too. Writes are passed on
+    in order, after the slice that produced them, and always before the next READ.
+    """
+
+    __slots__ = ("yield_interval",)
+
+    YIELD_INTERVAL = 10000 # Default instructions between yields to the event loop
+
+    def __init__(self, io_read_func=None, io_write_func=None, yield_interval=None):
+        """
+        Args:
+            io_read_func (callable, optional): Returns (or awaits to) the value for a READ.
+            io_write_func (callable, optional): Receives each WRITE value; may be async.
+            yield_interval (int, optional): Instructions between yields, default YIELD_INTERVAL.
+        """
+        super().__init__(io_read_func, io_write_func)
+        self.yield_interval = yield_interval or self.YIELD_INTERVAL
+
+    async def run(self, max_steps=None, time_limit=None, detect_loops=None):
+        """
+        Executes the loaded program until HALT, error, or the budget runs out.
+
+        Takes the same arguments as UVSim.run(). The time limit includes time spent
+        waiting for input; input that does not arrive in time ends the run with a
+        BudgetExhaustedError. Errors, including ones raised by io_read/io_write, end
+        the run and are left in `last_error`. Cancelling the task stops the simulator
+        where it is.
+        """
+        if not self._ready_to_run():
+            return
+
+        io_read, io_write = self.io_read, self.io_write
+        outputs = []
+        self.io_read = self._pending_input.popleft # Filled from the awaited io_read below
+        self.io_write = outputs.append
+        fast_span = self._run_fast_span if self._history is None else None # History records in step()
+        try:
+            max_steps, time_limit, deadline, loop_detector = self._start_run(max_steps, time_limit, detect_loops)
+            remaining = 0
+            while self.is_running:
+                if not remaining:
+                    remaining = self._budget_slice(max_steps, time_limit, deadline, loop_detector)
+                    if not remaining:
+                        break
+                before = self.steps_executed
+                ended = self._run_chunk(fast_span, min(remaining, self.yield_interval), remaining <= self.yield_interval)
+                remaining -= self.steps_executed - before
+                for value in outputs:
+                    result = io_write(value)
+                    if inspect.isawaitable(result):
+                        await result
+                outputs.clear()
+                if ended:
+                    break
+                if self.awaiting_input:
+                    if isinstance(io_write, OutputSink):
+                        io_write.flush() # Show buffered output before asking for input
+                    value = io_read()
+                    if inspect.isawaitable(value):
+                        if deadline is None:
+                            value = await value
+                        else:
+                            try:
+                                value = await asyncio.wait_for(value, max(0.0, deadline - time.monotonic()))
+                            except asyncio.TimeoutError:
+                                remaining = 0 # _budget_slice() reports the time limit
+                                continue
+                    self._pending_input.append(value) # Checked by the READ like any other input
+                    self.awaiting_input = False
+                else:
+                    await asyncio.sleep(0)
+        except Exception as e:
+            if e is not self.last_error: # step() has already recorded and reported its own errors
+                print(f"\nI/O Error at address {self.PC_FORMAT.format(self.program_counter)}: {e}", file=sys.stderr)
+            self.last_error = e
+        finally:
+            self.is_running = False
+            self.awaiting_input = False
+            self.io_read, self.io_write = io_read, io_write
+            self.flush_output()
+            self._repage_memory()
+
+    def _run_chunk(self, fast_span, limit, exact):
+        """
+        Runs up to `limit` instructions, stopping early (with awaiting_input set) at a
+        READ that has no queued value. Returns True once the run has ended.
+
+        Unless `exact` (the limit is the budget), the chunk may also end up to
+        MEMORY_SIZE instructions short, when the fast path stops near the limit,
+        instead of finishing the remainder one step() at a time.
+        """
+        stop_at = self.steps_executed + limit
+        while self.steps_executed < stop_at:
+            if fast_span is not None:
+                if fast_span(stop_at - self.steps_executed):
+                    return True
+                left = stop_at - self.steps_executed
+                if left <= 0 or (not exact and left < min(limit, self.MEMORY_SIZE)):
+                    break
+            if not self._pending_input and self._next_is_read():
+                self.awaiting_input = True
+                return False
+            if not self.step(): # HALT, error, or a breakpoint
+                return True
+        return False
@@ -0,0 +1,274 @@
+import contextlib
+import functools
+import io
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from uvsim_core_logic import UVSim, BudgetExhaustedError, InfiniteLoopError
+from uvsim_image_cache import load_image
+from uvsim_result_cache import CachedRun, run_key
+
+# Runs many BasicML programs, each against one or more input sets, across a
+# process pool. Workers live for the whole batch, keep one UVSim instance and a
+# cache of loaded memory images, and return compact BatchResult records in the
+# same order as the tasks. With a ResultCache, runs already seen (same memory image,
+# inputs and budget) are answered from it instead of being executed.
+
+PROGRAM_EXTENSIONS = (".bml", ".txt")
+
+# One program run. `inputs` is the list of READ values for that run.
+BatchTask = namedtuple("BatchTask", "program input_index inputs")
+
+# Result of one BatchTask. `status` is "halted", "error", "budget_exhausted",
+# "infinite_loop" or "load_error".
+BatchResult = namedtuple(
+    "BatchResult",
+    "program input_index status outputs accumulator program_counter steps error")
+
+
+class InputExhaustedError(EOFError):
+    """Raised by the batch READ function when a run's input set has no values left."""
+
+
+def discover_programs(directory):
+    """
+    Lists the BasicML programs in a directory.
+
+    Args:
+        directory (str): Directory to scan (not recursive).
+
+    Returns:
+        list[str]: Paths of .bml/.txt files, sorted by name for deterministic ordering.
+    """
+    names = sorted(name for name in os.listdir(directory)
+                   if name.lower().endswith(PROGRAM_EXTENSIONS))
+    return [os.path.join(directory, name) for name in names]
+
+
+def load_manifest(manifest_path):
+    """
+    Reads a JSON manifest of programs and their input sets.
+
+    The manifest is a list of objects like
+    {"program": "prog.bml", "inputs": [[1, 2], [3, 4]]}. Program paths are
+    relative to the manifest. "inputs" defaults to a single empty input set.
+
+    Args:
+        manifest_path (str): Path to the manifest file.
+
+    Returns:
+        list[BatchTask]: One task per (program, input set), in manifest order.
+
+    Raises:
+        ValueError: If the manifest is not in the expected shape.
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError("Manifest must be a JSON list of {\"program\": ..., \"inputs\": ...} objects.")
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    tasks = []
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, dict) or "program" not in entry:
+            raise ValueError(f"Manifest entry {position}: missing \"program\".")
+        program = os.path.join(base_dir, entry["program"])
+        tasks += build_tasks([program], entry.get("inputs", [[]]))
+    return tasks
+
+
+def build_tasks(programs, input_sets=None):
+    """
+    Pairs every program with every input set.
+
+    Args:
+        programs (list[str]): Program file paths.
+        input_sets (list[list[int]], optional): READ values per run. Defaults to one empty set.
+
+    Returns:
+        list[BatchTask]: Tasks ordered by program, then input set.
+    """
+    input_sets = input_sets if input_sets is not None else [[]]
+    return [BatchTask(program, index, tuple(inputs))
+            for program in programs
+            for index, inputs in enumerate(input_sets)]
+
+
+# --- Worker side ---
+
+_worker_simulator = None
+
+
+def _init_worker():
+    """Process pool initializer: creates the long-lived simulator for this worker."""
+    global _worker_simulator
+    _worker_simulator = UVSim()
+
+
+def _load_image(program):
+    """
+    Returns the validated, ported memory words for a program file, or the load error
+    message. Not memoized: __bmlcache__ (see uvsim_image_cache) makes repeat loads cheap
+    and notices when the file changes.
+    """
+    try:
+        return load_image(program)
+    except (IOError, UnicodeDecodeError, ValueError) as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def input_reader(values):
+    """
+    Returns a READ function that yields `values` in order, then raises InputExhaustedError.
+
+    Args:
+        values (iterable[int]): The READ values.
+    """
+    pending = iter(values)
+
+    def read():
+        for value in pending:
+            return value
+        raise InputExhaustedError("Input exhausted: no more values in this input set.")
+    return read
+
+
+def _cacheable(result, time_limit):
+    """Returns True if a result depends only on the program, inputs and instruction budget."""
+    return result.status != "load_error" and not (time_limit is not None and result.status == "budget_exhausted")
+
+
+def run_task(task, simulator=None, max_steps=None, time_limit=None, detect_loops=False, cache=None):
+    """
+    Runs one task and returns its BatchResult.
+
+    Runtime error messages are captured into the record instead of being printed.
+
+    Args:
+        task (BatchTask): The program and inputs to run.
+        simulator (UVSim, optional): Instance to reuse. Defaults to the worker's instance.
+        max_steps (int, optional): Instruction budget for the run.
+        time_limit (float, optional): Wall-clock limit for the run, in seconds.
+        detect_loops (bool, optional): Stop provably infinite loops early (status "infinite_loop").
+        cache (ResultCache, optional): Answers repeated runs, and stores new results
+                                       (except runs stopped by the time limit).
+
+    Returns:
+        BatchResult: The outcome of the run.
+    """
+    if simulator is None:
+        if _worker_simulator is None:
+            _init_worker()
+        simulator = _worker_simulator
+
+    image = _load_image(task.program)
+    if isinstance(image, str):
+        return BatchResult(task.program, task.input_index, "load_error", (), 0, 0, 0, image)
+
+    if cache is not None:
+        key = run_key(image, task.inputs, max_steps, detect_loops)
+        cached = cache.get(key)
+        if cached is not None:
+            return BatchResult(task.program, task.input_index, *cached)
+        result = _run_image(task, image, simulator, max_steps, time_limit, detect_loops)
+        if _cacheable(result, time_limit):
+            cache.put(key, CachedRun(*result[2:]))
+        return result
+    return _run_image(task, image, simulator, max_steps, time_limit, detect_loops)
+
+
+def _run_image(task, image, simulator, max_steps, time_limit, detect_loops):
+    """Runs `task` on the loaded memory `image` (see run_task()) and returns its BatchResult."""
+    outputs = []
+    simulator.io_read = input_reader(task.inputs)
+    simulator.io_write = outputs.append
+    simulator.load_memory_image(image)
+    with contextlib.redirect_stderr(io.StringIO()):
+        simulator.run_fast(max_steps=max_steps, time_limit=time_limit, detect_loops=detect_loops)
+
+    error = simulator.last_error
+    if error is None:
+        status = "halted"
+    elif isinstance(error, BudgetExhaustedError):
+        status = "budget_exhausted"
+    elif isinstance(error, InfiniteLoopError):
+        status = "infinite_loop"
+    else:
+        status = "error"
+    return BatchResult(task.program, task.input_index, status,
+                       tuple(outputs), simulator.accumulator, simulator.program_counter,
+                       simulator.steps_executed,
+                       f"{type(error).__name__}: {error}" if error is not None else None)
+
+
+def run_batch(tasks, workers=None, chunksize=None, max_steps=None, time_limit=None, detect_loops=False,
+              cache=None):
+    """
+    Runs tasks across a process pool.
+
+    Args:
+        tasks (list[BatchTask]): The runs to perform.
+        workers (int, optional): Worker processes. Defaults to os.cpu_count(); 1 runs in-process.
+        chunksize (int, optional): Tasks sent to a worker at a time. Defaults to spreading
+                                   the tasks over about four chunks per worker.
+        max_steps (int, optional): Instruction budget per run, so non-terminating
+                                   programs end as "budget_exhausted" instead of hanging a worker.
+        time_limit (float, optional): Wall-clock limit per run, in seconds.
+        detect_loops (bool, optional): End runs whose state repeats without input as "infinite_loop".
+        cache (ResultCache, optional): Looked up (and filled) in this process, so only
+                                       tasks it cannot answer are sent to workers.
+
+    Returns:
+        list[BatchResult]: One result per task, in task order.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        simulator = UVSim()
+        return [run_task(task, simulator, max_steps, time_limit, detect_loops, cache) for task in tasks]
+
+    results = [None] * len(tasks)
+    keys = {} # task position -> run_key, for the runs the cache could not answer
+    duplicates = {} # task position -> position of an identical run sent to the workers
+    if cache is not None:
+        first_position = {}
+        for position, task in enumerate(tasks):
+            image = _load_image(task.program)
+            if isinstance(image, str):
+                continue # Reported by the worker
+            key = run_key(image, task.inputs, max_steps, detect_loops)
+            if key in first_position:
+                duplicates[position] = first_position[key]
+                continue
+            first_position[key] = position
+            cached = cache.get(key)
+            if cached is not None:
+                results[position] = BatchResult(task.program, task.input_index, *cached)
+            else:
+                keys[position] = key
+    pending = [position for position, result in enumerate(results)
+               if result is None and position not in duplicates]
+
+    if pending:
+        if chunksize is None:
+            chunksize = max(1, len(pending) // (workers * 4))
+        task_runner = functools.partial(run_task, max_steps=max_steps, time_limit=time_limit,
+                                        detect_loops=detect_loops)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for position, result in zip(pending, pool.map(task_runner, [tasks[position] for position in pending],
+                                                          chunksize=chunksize)):
+                results[position] = result
+                if position in keys and _cacheable(result, time_limit):
+                    cache.put(keys[position], CachedRun(*result[2:]))
+    for position, original in duplicates.items():
+        task = tasks[position]
+        results[position] = results[original]._replace(program=task.program, input_index=task.input_index)
+    return results
+
+
+def result_to_dict(result):
+    """Converts a BatchResult to a JSON-friendly dict."""
+    record = result._asdict()
+    record["outputs"] = list(result.outputs)
+    return record
@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+import uvsim_batch
+import uvsim_image_cache
+import uvsim_profiler
+import uvsim_result_cache
+import uvsim_transpiler
+from uvsim_core_logic import UVSim
+
+# Command-line entry point for the 6-digit UVSim tools.
+# Must stay free of GUI imports (no tkinter) so it works in headless containers.
+
+
+def _read_inputs(args):
+    """
+    Returns the READ values for `run`: from --input or --input-file ("-" for stdin),
+    else none. Values in files may be separated by commas, spaces or newlines.
+    """
+    if args.input is not None:
+        text = args.input
+    elif args.input_file == "-":
+        text = sys.stdin.read()
+    elif args.input_file is not None:
+        with open(args.input_file, 'r', encoding='utf-8') as f:
+            text = f.read()
+    else:
+        return []
+    return [int(value) for value in re.split(r"[\s,]+", text) if value]
+
+
+def _open_cache(args):
+    """Returns the ResultCache for --cache, or None. Raises sqlite3.Error if it cannot be opened."""
+    if args.cache is None:
+        return None
+    return uvsim_result_cache.ResultCache(path=args.cache, max_age=args.cache_max_age)
+
+
+def _cmd_run(args):
+    """Handles `run`: runs each program with the same inputs and reports outputs, steps and timing."""
+    try:
+        inputs = tuple(_read_inputs(args))
+    except (IOError, UnicodeDecodeError, ValueError) as e:
+        print(f"Error: Cannot read inputs: {e}", file=sys.stderr)
+        return 1
+
+    try:
+        cache = _open_cache(args)
+    except sqlite3.Error as e:
+        print(f"Error: Cannot open result cache '{args.cache}': {e}", file=sys.stderr)
+        return 1
+
+    simulator = UVSim()
+    exit_code = 0
+    for program in args.programs:
+        started = time.perf_counter()
+        result = uvsim_batch.run_task(uvsim_batch.BatchTask(program, 0, inputs), simulator,
+                                      max_steps=args.max_steps, time_limit=args.time_limit,
+                                      detect_loops=args.detect_loops, cache=cache)
+        elapsed = time.perf_counter() - started
+        if args.json:
+            record = uvsim_batch.result_to_dict(result)
+            del record["input_index"]
+            record["seconds"] = round(elapsed, 6)
+            print(json.dumps(record))
+        else:
+            if len(args.programs) > 1:
+                print(f"== {program} ==")
+            for value in result.outputs:
+                print(value)
+            if result.error is not None:
+                print(f"{program}: {result.status}: {result.error}", file=sys.stderr)
+        if result.status == "load_error":
+            exit_code = 1
+        elif result.status != "halted" and exit_code == 0:
+            exit_code = 2
+    if cache is not None:
+        cache.close()
+    return exit_code
+
+
+def _cmd_compile(args):
+    """Handles `compile`: transpiles a BasicML file into a Python module."""
+    try:
+        output_path = uvsim_transpiler.transpile_file(args.program, args.output)
+    except (IOError, UnicodeDecodeError, ValueError) as e:
+        print(f"Error: Cannot compile '{args.program}': {e}", file=sys.stderr)
+        return 1
+    print(f"Compiled '{args.program}' to '{output_path}'.")
+    return 0
+
+
+def _cmd_batch(args):
+    """Handles `batch`: runs a directory or manifest of programs across a process pool."""
+    try:
+        if os.path.isdir(args.source):
+            input_sets = None
+            if args.inputs:
+                with open(args.inputs, 'r', encoding='utf-8') as f:
+                    input_sets = json.load(f)
+            tasks = uvsim_batch.build_tasks(uvsim_batch.discover_programs(args.source), input_sets)
+        else:
+            tasks = uvsim_batch.load_manifest(args.source)
+    except (IOError, ValueError) as e:
+        print(f"Error: Cannot read batch source '{args.source}': {e}", file=sys.stderr)
+        return 1
+
+    try:
+        cache = _open_cache(args)
+    except sqlite3.Error as e:
+        print(f"Error: Cannot open result cache '{args.cache}': {e}", file=sys.stderr)
+        return 1
+
+    try:
+        results = uvsim_batch.run_batch(tasks, workers=args.workers, chunksize=args.chunksize,
+                                        max_steps=args.max_steps, time_limit=args.time_limit,
+                                        detect_loops=args.detect_loops, cache=cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for result in results:
+            out.write(json.dumps(uvsim_batch.result_to_dict(result)) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0 if all(result.status == "halted" for result in results) else 2
+
+
+def _cmd_profile(args):
+    """Handles `profile`: runs a program under the profiler and prints the report."""
+    try:
+        inputs = [int(value) for value in args.input.split(",") if value.strip()] if args.input else []
+        simulator = UVSim(io_read_func=uvsim_batch.input_reader(inputs),
+                          io_write_func=lambda value: print(f"Output: {value}", file=sys.stderr))
+        uvsim_image_cache.load_program_file(simulator, args.program)
+    except (IOError, UnicodeDecodeError, ValueError) as e:
+        print(f"Error: Cannot profile '{args.program}': {e}", file=sys.stderr)
+        return 1
+
+    profiler = uvsim_profiler.Profiler(simulator)
+    profiler.run(max_steps=args.max_steps)
+    print(profiler.to_json() if args.json else profiler.report(args.top))
+    return 0 if simulator.last_error is None else 2
+
+
+def _add_cache_arguments(parser):
+    """Adds the result cache options shared by `run` and `batch`."""
+    parser.add_argument("--cache", metavar="FILE",
+                        help="SQLite file of earlier results; identical runs are answered from it.")
+    parser.add_argument("--cache-max-age", type=float, metavar="SECONDS",
+                        help="Ignore and drop cached results older than this (default: keep).")
+
+
+def build_parser():
+    """Builds the argument parser with one sub-command per tool."""
+    parser = argparse.ArgumentParser(prog="uvsim", description="Headless tools for 6-digit BasicML programs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run one or more programs (4-digit files are ported automatically).")
+    run_parser.add_argument("programs", nargs="+", help="BasicML source files (.bml or .txt, 4- or 6-digit).")
+    run_parser.add_argument("--input", help="Comma-separated READ values, e.g. 5,10,-3.")
+    run_parser.add_argument("--input-file", help="File of READ values, or - for stdin (default: no input).")
+    run_parser.add_argument("--max-steps", type=int, help="Instruction budget per program (default: unlimited).")
+    run_parser.add_argument("--time-limit", type=float, help="Wall-clock limit per program, in seconds.")
+    run_parser.add_argument("--detect-loops", action="store_true",
+                            help="Stop runs that repeat a machine state with no input in between.")
+    run_parser.add_argument("--json", action="store_true",
+                            help="Print one JSON result per program (outputs, status, steps, seconds).")
+    _add_cache_arguments(run_parser)
+    run_parser.set_defaults(handler=_cmd_run)
+
+    compile_parser = commands.add_parser("compile", help="Transpile a BasicML program into a Python module.")
+    compile_parser.add_argument("program", help="BasicML source file (.bml or .txt, 4- or 6-digit).")
+    compile_parser.add_argument("-o", "--output", help="Output .py path (default: <program>_bml.py).")
+    compile_parser.set_defaults(handler=_cmd_compile)
+
+    batch_parser = commands.add_parser("batch", help="Run many programs across worker processes (JSON lines output).")
+    batch_parser.add_argument("source", help="Directory of .bml/.txt programs, or a JSON manifest file.")
+    batch_parser.add_argument("--inputs", help="JSON list of input sets applied to every program (directory mode).")
+    batch_parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count).")
+    batch_parser.add_argument("--chunksize", type=int, help="Tasks sent to a worker at a time.")
+    batch_parser.add_argument("--max-steps", type=int, help="Instruction budget per run (default: unlimited).")
+    batch_parser.add_argument("--time-limit", type=float, help="Wall-clock limit per run, in seconds.")
+    batch_parser.add_argument("--detect-loops", action="store_true",
+                              help="Stop runs that repeat a machine state with no input in between.")
+    batch_parser.add_argument("-o", "--output", help="Write results here instead of stdout.")
+    _add_cache_arguments(batch_parser)
+    batch_parser.set_defaults(handler=_cmd_batch)
+
+    profile_parser = commands.add_parser("profile", help="Run a program and report per-address and per-opcode counts.")
+    profile_parser.add_argument("program", help="BasicML source file (.bml or .txt, 4- or 6-digit).")
+    profile_parser.add_argument("--input", help="Comma-separated READ values, e.g. 5,10,-3.")
+    profile_parser.add_argument("--max-steps", type=int, help="Instruction budget (default: unlimited).")
+    profile_parser.add_argument("--top", type=int, default=10, help="Hottest addresses to list (default: 10).")
+    profile_parser.add_argument("--json", action="store_true", help="Print the profile as JSON instead of a report.")
+    profile_parser.set_defaults(handler=_cmd_profile)
+
+    return parser
+
+
+def main(argv=None):
+    """Runs the CLI and returns the process exit code."""
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,417 @@
+import struct
 import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections import deque, namedtuple
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def _filled_run(size, value):
+    """Returns a shared, immutable run of `size` copies of `value`."""
+    return (value,) * size
+
+
+class Memory(list):
+    """
+    Fixed-size, list-backed word store for the simulator.
+
+    Indexing (`memory[addr]`) works exactly like the dict-based memory it
+    replaces, and `get()` is kept so existing callers (memory viewer, tests)
+    do not need to change. Resetting is a single slice assignment instead of
+    rebuilding a container.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, size):
+        super().__init__([0] * size)
+
+    def get(self, address, default=None):
+        """Returns the word at `address`, or `default` if it is out of range."""
+        if 0 <= address < len(self):
+            return self[address]
+        return default
+
+    def reset(self):
+        """Zeroes every word in place."""
+        self[:] = _filled_run(len(self), 0)
+
+
+class CowMemory:
+    """
+    Copy-on-write word store shared between a simulator and its forks (see UVSim.fork()).
+
+    Words are held in PAGE_SIZE-word pages. Shared pages are tuples and never change;
+    the first write to one replaces it with a private list copy, so each holder only
+    pays for the pages it has written. Indexing, iteration, `get()` and `reset()` work
+    as for Memory. Runs execute on a flat Memory copy, which is paged again (sharing
+    every page that did not change) when the run ends.
+    """
+
+    __slots__ = ("pages",)
+
+    PAGE_SIZE = 10
+
+    def __init__(self, pages):
+        self.pages = list(pages)
+
+    @classmethod
+    def from_words(cls, words, base=None):
+        """
+        Pages a flat sequence of words.
+
+        Args:
+            words (Sequence[int]): The memory contents.
+            base (list, optional): Pages of an earlier image; any that hold the same
+                                   words are reused instead of copied.
+        """
+        size = cls.PAGE_SIZE
+        pages = []
+        for index, start in enumerate(range(0, len(words), size)):
+            page = tuple(words[start:start + size])
+            if base is not None and tuple(base[index]) == page:
+                page = base[index]
+            pages.append(page)
+        return cls(pages)
+
+    def share(self):
+        """Makes every page shareable and returns a new CowMemory over the same pages."""
+        pages = self.pages
+        for index, page in enumerate(pages):
+            if page.__class__ is list:
+                pages[index] = tuple(page)
+        return CowMemory(pages)
+
+    def to_memory(self):
+        """Returns the words as a flat Memory."""
+        memory = Memory(len(self))
+        memory[:] = self
+        return memory
+
+    def get(self, address, default=None):
+        """Returns the word at `address`, or `default` if it is out of range."""
+        if 0 <= address < len(self):
+            return self[address]
+        return default
+
+    def reset(self):
+        """Points every page at one shared page of zeros."""
+        self.pages[:] = _filled_run(len(self.pages), _filled_run(self.PAGE_SIZE, 0))
+
+    def __len__(self):
+        return (len(self.pages) - 1) * self.PAGE_SIZE + len(self.pages[-1])
+
+    def __iter__(self):
+        for page in self.pages:
+            yield from page
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return list(self)[key]
+        if key < 0:
+            key += len(self)
+        return self.pages[key // self.PAGE_SIZE][key % self.PAGE_SIZE]
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            words = list(self)
+            words[key] = value
+            if len(words) != len(self):
+                raise ValueError("Memory size cannot change.")
+            self.pages = CowMemory.from_words(words, self.pages).pages
+            return
+        if key < 0:
+            key += len(self)
+        index, offset = divmod(key, self.PAGE_SIZE)
+        page = self.pages[index]
+        if page.__class__ is not list:
+            page = self.pages[index] = list(page) # First write: copy the shared page
+        page[offset] = value
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, CowMemory)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+
+class BudgetExhaustedError(RuntimeError):
+    """
+    Raised (and recorded as `last_error`) when a run uses up its instruction budget
+    or passes its wall-clock deadline before reaching HALT.
+
+    Attributes:
+        pc (int): Address of the next instruction that would have executed.
+        steps (int): Instructions executed during the run.
+        reason (str): "steps" for the instruction budget, "time" for the deadline.
+    """
+
+    def __init__(self, message, pc, steps, reason):
+        super().__init__(message)
+        self.pc = pc
+        self.steps = steps
+        self.reason = reason
+
+
+class InfiniteLoopError(RuntimeError):
+    """
+    Raised (and recorded as `last_error`) when loop detection finds that the machine
+    returned to an earlier state with no READ in between, so it can never halt.
+
+    Attributes:
+        pc (int): Program counter at the repeated state.
+        steps (int): Instructions executed during the run.
+        cycle_steps (int): Instructions between the two identical states (a multiple of the loop length).
+    """
+
+    def __init__(self, message, pc, steps, cycle_steps):
+        super().__init__(message)
+        self.pc = pc
+        self.steps = steps
+        self.cycle_steps = cycle_steps
+
+
+class _LoopDetector:
+    """
+    Brent-style cycle detection over machine states sampled every few thousand instructions.
+
+    Execution between samples is deterministic unless a READ happens, so if a sampled
+    (pc, accumulator, memory) state equals the saved one the run repeats forever. One
+    state is saved at a time, re-saved at power-of-two sample distances. Comparing the
+    pc and accumulator first keeps most samples to two integer checks; memory is only
+    compared in full when those match.
+    """
+
+    __slots__ = ("pc", "acc", "memory", "steps", "reads", "power", "distance")
+
+    def __init__(self):
+        self.memory = None # No saved state yet
+        self.reads = -1
+
+    def observe(self, simulator):
+        """Samples the simulator's state. Returns the saved state's step count if it repeats, else None."""
+        pc = simulator.program_counter
+        acc = simulator.accumulator
+        memory = simulator.memory
+        if simulator._reads_executed != self.reads:
+            self.reads = simulator._reads_executed # New input: earlier states prove nothing
+            self.memory = None
+        elif pc == self.pc and acc == self.acc and memory == self.memory:
+            return self.steps
+        elif self.distance < self.power:
+            self.distance += 1
+            return None
+        else:
+            self.power *= 2
+        if self.memory is None:
+            self.power = 1
+        self.pc, self.acc, self.memory = pc, acc, list(memory)
+        self.steps = simulator.steps_executed
+        self.distance = 1
+        return None
+
+
+class _History:
+    """
+    Undo journal behind step_back(): one entry per completed step, plus periodic snapshots.
+
+    Entry i undoes step `base + i`. It holds the PC and accumulator from before the
+    step and the one memory cell the step overwrote (address -1 if none). Every
+    `interval` steps a full snapshot (step, memory copy) of the state before that
+    step is kept as well, so a long jump back restores the nearest later snapshot and
+    undoes at most `interval` entries instead of the whole distance. Once more than
+    `limit` entries are held, the oldest quarter is dropped.
+    """
+
+    __slots__ = ("pcs", "accumulators", "addresses", "old_values", "snapshot_steps",
+                 "snapshot_memory", "base", "interval", "limit")
+
+    def __init__(self, interval, limit):
+        self.interval = max(1, interval)
+        self.limit = max(1, limit)
+        self.clear()
+
+    def clear(self):
+        """Forgets all entries and snapshots."""
+        self.pcs = array("H")
+        self.accumulators = array("i")
+        self.addresses = array("h")
+        self.old_values = array("i")
+        self.snapshot_steps = []
+        self.snapshot_memory = []
+        self.base = 0 # Step number of entry 0
+
+    def record(self, pc, acc, address, old_value, memory):
+        """Appends the undo entry for a step that just completed."""
+        step = self.base + len(self.pcs)
+        if step % self.interval == 0:
+            snapshot = list(memory)
+            if address >= 0:
+                snapshot[address] = old_value # Memory as it was before this step
+            self.snapshot_steps.append(step)
+            self.snapshot_memory.append(snapshot)
+        self.pcs.append(pc)
+        self.accumulators.append(acc)
+        self.addresses.append(address)
+        self.old_values.append(old_value)
+        if len(self.pcs) > self.limit:
+            self.truncate_front(max(1, self.limit // 4))
+
+    def truncate_front(self, count):
+        """Drops the oldest `count` entries and any snapshots before them."""
+        for column in (self.pcs, self.accumulators, self.addresses, self.old_values):
+            del column[:count]
+        self.base += count
+        keep = bisect_left(self.snapshot_steps, self.base)
+        del self.snapshot_steps[:keep]
+        del self.snapshot_memory[:keep]
+
+    def truncate_back(self, step):
+        """Drops the entries for `step` onwards and any snapshots after `step`."""
+        for column in (self.pcs, self.accumulators, self.addresses, self.old_values):
+            del column[step - self.base:]
+        keep = bisect_left(self.snapshot_steps, step + 1)
+        del self.snapshot_steps[keep:]
+        del self.snapshot_memory[keep:]
+
+
+# Why the last run stopped at a breakpoint or watchpoint (UVSim.break_event).
+# kind: "breakpoint", "read", "write" or "change"; address: the breakpoint address or
+# watched cell; pc: the instruction that triggered it; old_value/new_value: the watched
+# cell before and after the instruction (None for breakpoints).
+BreakEvent = namedtuple("BreakEvent", "kind address pc old_value new_value")
+
+WATCH_KINDS = ("read", "write", "change")
+
+# Events yielded by UVSim.events(). `pc` is the address of the READ/WRITE instruction
+# and `address` the memory cell it reads into.
+NeedInput = namedtuple("NeedInput", "pc address")
+Output = namedtuple("Output", "pc value")
+
+
+
+class OutputSink:
+    """
+    Buffers WRITE values and hands them to a callback in bulk.
+
+    Pass an instance as a UVSim `io_write_func`. Values are collected in a list and
+    `flush_func(values)` is called with the whole batch once `size` values have
+    been buffered, once `interval` seconds have passed since the last flush (checked
+    on each WRITE), and whenever the simulator stops or reaches a READ.
+    """
+
+    def __init__(self, flush_func, size=1024, interval=None):
+        """
+        Args:
+            flush_func (callable): Receives a list of output values, oldest first.
+            size (int, optional): Values buffered before a flush.
+            interval (float, optional): Maximum seconds between flushes while output
+                                        is being produced, or None to flush on size only.
+        """
+        if size < 1:
+            raise ValueError("Output sink size must be at least 1.")
+        self.flush_func = flush_func
+        self.size = size
+        self.interval = interval
+        self._buffer = []
+        self._flush_at = None if interval is None else time.monotonic() + interval
+
+    def __call__(self, value):
+        buffer = self._buffer
+        buffer.append(value)
+        if len(buffer) >= self.size or (self._flush_at is not None and time.monotonic() >= self._flush_at):
+            self.flush()
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def flush(self):
+        """Passes any buffered values to flush_func."""
+        if self.interval is not None:
+            self._flush_at = time.monotonic() + self.interval
+        if self._buffer:
+            values, self._buffer = self._buffer, [] # flush_func may keep the list
+            self.flush_func(values)
+
+
+# Added to the opcode of a decode-cache entry that has a breakpoint or touches a
+# watched cell. The fast paths do not recognize these opcodes and hand the instruction
+# to step(), which checks the trap; untrapped instructions run exactly as before.
+_TRAPPED = 1000
+
+
+# Exit kinds returned by compiled basic blocks, as the third item of
+# (acc, next_pc, exit_kind, executed)
+_BLOCK_NEXT = 0   # Continue with the block starting at next_pc
+_BLOCK_SLOW = 1   # Execute the instruction at next_pc with step() (I/O, fault, invalid word)
+_BLOCK_HALT = 2   # HALT executed at next_pc
+
+# Stored in place of a block whose entry has been invalidated RECOMPILE_LIMIT times
+# (code that stores into itself on every pass). _run_blocks() interprets from there
+# with _run_fast_span() instead of recompiling the block each time.
+_INTERPRETED = object()
+
+
+class _BlockCache:
+    """
+    Compiled basic blocks for one simulator, plus the bookkeeping to invalidate them.
+
+    Blocks are keyed by their entry address. `covers[addr]` is the set of entry
+    addresses whose block was compiled from the word at `addr` (None if none),
+    so a write to a code address can drop exactly the affected blocks.
+    """
+
+    __slots__ = ("blocks", "covers", "spans", "leaders", "invalidations")
+
+    RECOMPILE_LIMIT = 4 # Invalidations of one entry address before it is interpreted instead
+
+    def __init__(self, size, leaders):
+        self.blocks = [None] * (size + 1) # Trailing slot handles a PC that ran off the end
+        self.covers = [None] * size
+        self.spans = {} # entry address -> last compiled address
+        self.leaders = leaders
+        self.invalidations = {} # entry address -> times its block was dropped by a write
+
+    def clear(self):
+        """
+        Drops every block in place, so a run in progress keeps using this cache.
+
+        The leaders stay as they are; they only decide where blocks end, and a block
+        entered at any other address is compiled from there on demand.
+        """
+        self.blocks[:] = _filled_run(len(self.blocks), None)
+        self.covers[:] = _filled_run(len(self.covers), None)
+        self.spans.clear()
+        self.invalidations.clear()
+
+    def add(self, start, end, block):
+        """Registers `block` as covering addresses start..end."""
+        self.blocks[start] = block
+        self.spans[start] = end
+        covers = self.covers
+        for address in range(start, end + 1):
+            if covers[address] is None:
+                covers[address] = {start}
+            else:
+                covers[address].add(start)
+
+    def invalidate(self, address):
+        """Drops every block compiled from the word at `address`."""
+        covers = self.covers
+        invalidations = self.invalidations
+        for start in tuple(covers[address] or ()):
+            count = invalidations.get(start, 0) + 1
+            invalidations[start] = count
+            self.blocks[start] = _INTERPRETED if count >= self.RECOMPILE_LIMIT else None
+            for covered in range(start, self.spans.pop(start) + 1):
+                owners = covers[covered]
+                owners.discard(start)
+                if not owners:
+                    covers[covered] = None
+
 
 class UVSim:
     """
@@ -8,6 +421,13 @@ class UVSim:
     Provides helper functions for format detection and 4-to-6 digit porting.
     """
 
+    # Instance attributes (see __init__); no per-instance __dict__
+    __slots__ = ("memory", "accumulator", "program_counter", "is_running", "last_error",
+                 "steps_executed", "max_steps", "time_limit", "detect_loops", "_reads_executed",
+                 "_decoded", "_block_cache", "_paged_base", "_history", "_breakpoints",
+                 "_watchpoints", "_resume_pc", "break_event", "_pending_input", "awaiting_input",
+                 "io_read", "io_write")
+
     # Constants for opcodes (now only 3-digit are relevant internally)
     READ = 10; WRITE = 11; LOAD = 20; STORE = 21; ADD = 30; SUBTRACT = 31
     DIVIDE = 32; MULTIPLY = 33; BRANCH = 40; BRANCHNEG = 41; BRANCHZERO = 42; HALT = 43
@@ -17,6 +437,19 @@ class UVSim:
     MAX_WORD_VALUE = 999999; MIN_WORD_VALUE = -999999
     PC_FORMAT = "{:03d}"; OPERAND_FORMAT = "{:03d}"
     MEM_RANGE_DISPLAY = f"000-{MAX_MEMORY_ADDRESS}"
+    MEMORY_SIZE = MAX_MEMORY_ADDRESS + 1
+    WATCHDOG_INTERVAL = 10000 # Instructions between wall-clock deadline checks
+    LOOP_CHECK_INTERVAL = 4096 # Instructions between loop-detection samples
+    _UNWATCHED_SLICE = 1 << 24 # Instructions per budget slice when no deadline is set
+    HISTORY_SNAPSHOT_INTERVAL = 1000 # Default steps between full snapshots in the undo history
+    HISTORY_LIMIT = 1000000 # Default maximum undo entries kept
+    ENGINE_VERSION = 1 # Bump when a change alters what any program outputs (keys cached results)
+
+    # snapshot() layout (little-endian): magic, running flag, accumulator, PC, then every memory word
+    SNAPSHOT_MAGIC = b"UVS1"
+    _SNAPSHOT_HEADER = struct.Struct("<4s?iH")
+    _SNAPSHOT_WORDS = struct.Struct(f"<{MEMORY_SIZE}i")
+    SNAPSHOT_SIZE = _SNAPSHOT_HEADER.size + _SNAPSHOT_WORDS.size
 
     # Opcode map for porting 4-digit to 6-digit instructions
     OPCODE_4_TO_6_MAP = {
@@ -25,42 +458,51 @@ class UVSim:
         43: HALT
     }
 
+    OPCODE_NAMES = {
+        READ: "READ", WRITE: "WRITE", LOAD: "LOAD", STORE: "STORE", ADD: "ADD",
+        SUBTRACT: "SUBTRACT", DIVIDE: "DIVIDE", MULTIPLY: "MULTIPLY", BRANCH: "BRANCH",
+        BRANCHNEG: "BRANCHNEG", BRANCHZERO: "BRANCHZERO", HALT: "HALT"
+    }
+
     def __init__(self, io_read_func=None, io_write_func=None):
         """Initializes the UVSim simulator (always in 6-digit mode)."""
-        self.memory = {}
+        self.memory = Memory(self.MEMORY_SIZE)
         self.accumulator = 0
         self.program_counter = 0
         self.is_running = False
+        self.last_error = None # Exception that stopped the last run, if any
+        self.steps_executed = 0 # Instructions executed by the last run (or step() calls since)
+        self.max_steps = None # Default instruction budget per run (None = unlimited)
+        self.time_limit = None # Default wall-clock limit per run in seconds (None = unlimited)
+        self.detect_loops = False # Default for stopping provably infinite loops early
+        self._reads_executed = 0 # READ count; loop detection restarts whenever it changes
+        # Decode cache: (execute_func, operand, opcode) per address, or None if not decoded.
+        # The extra trailing slot stays None so a PC that falls off the end takes the slow path.
+        # Forks start with the shared empty tuple from _filled_run() and get a list on first decode.
+        self._decoded = [None] * (self.MEMORY_SIZE + 1)
+        self._block_cache = None # Built on demand by run_compiled()
+        self._paged_base = None # CowMemory pages to re-share after a run on a flat copy (see fork())
+        self._history = None # Undo journal, only while enable_history() is in effect
+        self._breakpoints = {} # address -> compiled condition function, or None
+        self._watchpoints = {} # address -> set of WATCH_KINDS
+        self._resume_pc = None # Breakpoint address to step over once when execution resumes
+        self.break_event = None # BreakEvent that stopped the last run, if any
+        self._pending_input = deque() # Values queued by provide_input()
+        self.awaiting_input = False # True while run_until_input() is paused at a READ
         self.io_read = io_read_func if io_read_func else self._default_read
         self.io_write = io_write_func if io_write_func else self._default_write
 
-        # --- Refactored Opcode Dispatch ---
-        # Map opcodes to their corresponding execution methods
-        self._opcode_dispatch = {
-            self.READ: self._execute_read,
-            self.WRITE: self._execute_write,
-            self.LOAD: self._execute_load,
-            self.STORE: self._execute_store,
-            self.ADD: self._execute_add,
-            self.SUBTRACT: self._execute_subtract,
-            self.DIVIDE: self._execute_divide,
-            self.MULTIPLY: self._execute_multiply,
-            self.BRANCH: self._execute_branch,
-            self.BRANCHNEG: self._execute_branchneg,
-            self.BRANCHZERO: self._execute_branchzero,
-            self.HALT: self._execute_halt,
-        }
-        self.reset()
-
-    def _default_read(self):
+    @classmethod
+    def _default_read(cls):
         """Default READ operation using standard input."""
+        # Bound to the class, not the instance, so the default io does not create a reference cycle
         while True:
             try:
-                prompt = f"Enter an integer ({self.MIN_WORD_VALUE} to {self.MAX_WORD_VALUE}): "
+                prompt = f"Enter an integer ({cls.MIN_WORD_VALUE} to {cls.MAX_WORD_VALUE}): "
                 value_str = input(prompt)
                 value = int(value_str)
-                if not (self.MIN_WORD_VALUE <= value <= self.MAX_WORD_VALUE):
-                    raise ValueError(f"Input must be between {self.MIN_WORD_VALUE} and {self.MAX_WORD_VALUE}.")
+                if not (cls.MIN_WORD_VALUE <= value <= cls.MAX_WORD_VALUE):
+                    raise ValueError(f"Input must be between {cls.MIN_WORD_VALUE} and {cls.MAX_WORD_VALUE}.")
                 return value
             except ValueError as e:
                 print(f"Invalid input: {e}. Please try again.", file=sys.stderr)
@@ -68,7 +510,8 @@ class UVSim:
                  print("\nInput stream closed unexpectedly.", file=sys.stderr)
                  raise # Re-raise EOFError to signal halt
 
-    def _default_write(self, value):
+    @staticmethod
+    def _default_write(value):
         """Default WRITE operation using standard output (prints integer)."""
         print(f"Output: {value}")
 
@@ -90,10 +533,83 @@ class UVSim:
 
     def reset(self):
         """Resets the accumulator, program counter, and clears memory."""
-        self.memory = {i: 0 for i in range(self.MAX_MEMORY_ADDRESS + 1)}
+        self.memory.reset()
+        if self._decoded.__class__ is list: # A fork's shared tuple is already empty
+            self._decoded[:] = _filled_run(self.MEMORY_SIZE + 1, None)
+        self._block_cache = None
         self.accumulator = 0
         self.program_counter = 0
         self.is_running = False
+        self.last_error = None
+        self.steps_executed = 0
+        self.break_event = None
+        self._resume_pc = None
+        self._pending_input.clear()
+        self.awaiting_input = False
+        if self._history is not None:
+            self._history.clear()
+
+    def _recycle(self):
+        """Returns a used instance to its just-constructed state for UVSimPool, keeping its buffers."""
+        if self.memory.__class__ is not Memory:
+            self.memory = Memory(self.MEMORY_SIZE) # A fork's pages are shared with other instances
+        self._history = None
+        self._breakpoints.clear()
+        self._watchpoints.clear()
+        self.reset()
+        self.max_steps = None
+        self.time_limit = None
+        self.detect_loops = False
+        self._reads_executed = 0
+        self.io_read = self._default_read
+        self.io_write = self._default_write
+
+    def invalidate_decode_cache(self, address=None):
+        """
+        Drops cached instruction decodings.
+
+        Only needed after writing to `memory` directly (outside of READ/STORE);
+        the simulator keeps the cache consistent for its own writes.
+
+        Args:
+            address (int, optional): The address to invalidate. Clears the whole cache if omitted.
+        """
+        if address is None:
+            if self._decoded.__class__ is list:
+                self._decoded[:] = _filled_run(self.MEMORY_SIZE + 1, None)
+            if self._block_cache is not None:
+                self._block_cache.clear() # In place: this may run from an io callback during run_compiled()
+        elif 0 <= address <= self.MAX_MEMORY_ADDRESS:
+            self._forget_code(address)
+
+    def _forget_code(self, address):
+        """Drops the cached decoding and any compiled blocks for a just-written address."""
+        decoded = self._decoded
+        if decoded[address] is not None:
+            decoded[address] = None
+        block_cache = self._block_cache
+        if block_cache is not None and block_cache.covers[address]:
+            block_cache.invalidate(address)
+
+    @staticmethod
+    def disassemble_word(word):
+        """
+        Describes a memory word as an instruction, e.g. "LOAD 005".
+
+        Args:
+            word (int): The memory word.
+
+        Returns:
+            str: The mnemonic and operand, or "DATA <word>" if the word is not a valid instruction.
+        """
+        opcode, operand = divmod(word, 1000)
+        name = UVSim.OPCODE_NAMES.get(opcode) if word >= 0 else None
+        if name is None or operand > UVSim.MAX_MEMORY_ADDRESS:
+            sign = '+' if word >= 0 else '-'
+            return f"DATA {sign}{abs(word):0{UVSim.WORD_LENGTH}d}"
+        if opcode == UVSim.HALT:
+            return name
+        return f"{name} {operand:03d}"
 
     @staticmethod
     def detect_format(program_lines):
@@ -210,9 +726,43 @@ class UVSim:
                 else:
                     raise # Re-raise the exception with existing line context
 
+        self._predecode(line_count)
+
         # print(f"Successfully loaded {line_count} words into memory.")
         return True # Indicate successful loading
 
+    def load_memory_image(self, words):
+        """
+        Loads already-validated memory words, skipping text parsing.
+
+        Used for images produced by other tools (transpiled programs, caches).
+
+        Args:
+            words (Sequence[int]): Memory contents starting at address 000. Remaining
+                                   addresses are zeroed.
+
+        Raises:
+            ValueError: If there are more words than memory or a word is outside the 6-digit range.
+        """
+        if len(words) > self.MEMORY_SIZE:
+            raise ValueError(f"Program exceeds memory limit of {self.MEMORY_SIZE} words.")
+        if words and (min(words) < self.MIN_WORD_VALUE or max(words) > self.MAX_WORD_VALUE):
+            raise ValueError(f"Memory image contains a word outside the 6-digit range ({self.MIN_WORD_VALUE} to {self.MAX_WORD_VALUE}).")
+        self.reset()
+        self.memory[:len(words)] = words
+        self._predecode(len(words))
+
+    def _predecode(self, count):
+        """Predecodes the first `count` words; data words that are not instructions stay uncached."""
+        memory = self.memory
+        dispatch = self._OPCODE_DISPATCH
+        max_operand = self.MAX_MEMORY_ADDRESS
+        for address in range(count):
+            word = memory[address]
+            # Same checks as _decode(), without building its error for every data word
+            if word >= 0 and word % 1000 <= max_operand and word // 1000 in dispatch:
+                self._decode(address)
+
     def get_memory_value(self, address):
         """
         Safely gets a value from memory.
@@ -228,8 +778,7 @@ class UVSim:
         """
         if not (0 <= address <= self.MAX_MEMORY_ADDRESS):
             raise ValueError(f"Memory address {self.PC_FORMAT.format(address)} out of bounds ({self.MEM_RANGE_DISPLAY}).")
-        # Return the value or 0 if the address somehow wasn't initialized (shouldn't happen with reset)
-        return self.memory.get(address, 0)
+        return self.memory[address]
 
     def _check_overflow(self, value):
         """
@@ -252,8 +801,11 @@ class UVSim:
 
     def _execute_read(self, operand):
         """Executes the READ operation."""
+        self.flush_output() # Show buffered output before asking for input
         value = self.io_read() # Calls the configured read function
+        self._reads_executed += 1
         self.memory[operand] = self._check_overflow(value)
+        self._forget_code(operand) # The word may have been cached as an instruction
         return self.program_counter + 1, False # next_pc, halt_execution
 
     def _execute_write(self, operand):
@@ -272,6 +824,7 @@ class UVSim:
         # Store the *current* accumulator value, checking for overflow is implicit
         # as the accumulator should always hold a valid value after other ops.
         self.memory[operand] = self.accumulator
+        self._forget_code(operand) # Self-modifying code: force a re-decode of this address
         return self.program_counter + 1, False
 
     def _execute_add(self, operand):
@@ -328,33 +881,45 @@ class UVSim:
         # Operand is ignored for HALT
         return self.program_counter, True # next_pc doesn't matter, halt_execution is True
 
+    # --- Refactored Opcode Dispatch ---
+    # Map opcodes to their execution functions, called as func(self, operand). Shared by
+    # every instance, so decode cache entries do not hold references back to the simulator.
+    _OPCODE_DISPATCH = {
+        READ: _execute_read,
+        WRITE: _execute_write,
+        LOAD: _execute_load,
+        STORE: _execute_store,
+        ADD: _execute_add,
+        SUBTRACT: _execute_subtract,
+        DIVIDE: _execute_divide,
+        MULTIPLY: _execute_multiply,
+        BRANCH: _execute_branch,
+        BRANCHNEG: _execute_branchneg,
+        BRANCHZERO: _execute_branchzero,
+        HALT: _execute_halt,
+    }
+
     # --- Main Execution Logic ---
 
-    def step(self):
+    def _decode(self, address):
         """
-        Executes a single 6-digit instruction using opcode dispatch.
+        Decodes the instruction at `address` and caches the result.
+
+        Args:
+            address (int): The memory address holding the instruction.
 
         Returns:
-            bool: True if execution should continue, False if HALT was executed or an error occurred.
+            tuple: (execute_func, operand, opcode) for the instruction.
 
         Raises:
-            RuntimeError: If the Program Counter is out of bounds.
-            ValueError: If an invalid instruction format, opcode, or operand address is encountered.
-            ZeroDivisionError: If division by zero is attempted.
-            OverflowError: If an arithmetic operation results in overflow/underflow.
-            EOFError: If input stream closes during a READ operation.
-            Exception: Re-raises any other unexpected exceptions during execution.
+            ValueError: If the word is negative, has an out-of-range operand, or an unknown opcode.
         """
-        # 1. Check Program Counter bounds
-        if not (0 <= self.program_counter <= self.MAX_MEMORY_ADDRESS):
-            raise RuntimeError(f"Program Counter ({self.PC_FORMAT.format(self.program_counter)}) out of bounds ({self.MEM_RANGE_DISPLAY}). Execution halted.")
-
         # 2. Fetch instruction
-        instruction_word = self.get_memory_value(self.program_counter)
+        instruction_word = self.get_memory_value(address)
 
         # 3. Validate instruction format (must be positive for opcodes)
         if instruction_word < 0:
-            raise ValueError(f"Invalid instruction at address {self.PC_FORMAT.format(self.program_counter)}: Instruction word {self._format_word(instruction_word)} cannot be negative.")
+            raise ValueError(f"Invalid instruction at address {self.PC_FORMAT.format(address)}: Instruction word {self._format_word(instruction_word)} cannot be negative.")
 
         # 4. Decode opcode and operand (6-digit format: OO O AAA)
         opcode = instruction_word // 1000  # First 3 digits form the opcode
@@ -362,77 +927,949 @@ class UVSim:
 
         # 5. Validate operand address range
         if not (0 <= operand <= self.MAX_MEMORY_ADDRESS):
-            raise ValueError(f"Operand {self.OPERAND_FORMAT.format(operand)} at address {self.PC_FORMAT.format(self.program_counter)} (Instruction: {self._format_word(instruction_word)}) references memory out of bounds ({self.MEM_RANGE_DISPLAY}).")
+            raise ValueError(f"Operand {self.OPERAND_FORMAT.format(operand)} at address {self.PC_FORMAT.format(address)} (Instruction: {self._format_word(instruction_word)}) references memory out of bounds ({self.MEM_RANGE_DISPLAY}).")
+
+        # 6. Look up the execution function for the opcode
+        execute_func = self._OPCODE_DISPATCH.get(opcode)
+        if execute_func is None:
+            raise ValueError(f"Invalid opcode {opcode:03d} encountered at address {self.PC_FORMAT.format(address)} (Instruction: {self._format_word(instruction_word)}).")
+
+        if (self._breakpoints or self._watchpoints) and self._is_trapped(address, opcode, operand):
+            opcode += _TRAPPED
+        decoded = (execute_func, operand, opcode)
+        if self._decoded.__class__ is not list:
+            self._decoded = list(self._decoded) # First decode in a fork
+        self._decoded[address] = decoded
+        return decoded
 
-        # 6. Dispatch execution based on opcode
-        execute_func = self._opcode_dispatch.get(opcode)
+    def step(self):
+        """
+        Executes a single 6-digit instruction using opcode dispatch.
+
+        Returns:
+            bool: True if execution should continue, False if HALT was executed, an error
+                  occurred, or a breakpoint/watchpoint stopped execution (see break_event).
+
+        Raises:
+            RuntimeError: If the Program Counter is out of bounds.
+            ValueError: If an invalid instruction format, opcode, or operand address is encountered.
+            ZeroDivisionError: If division by zero is attempted.
+            OverflowError: If an arithmetic operation results in overflow/underflow.
+            EOFError: If input stream closes during a READ operation.
+            Exception: Re-raises any other unexpected exceptions during execution.
+        """
+        # 1. Check Program Counter bounds
+        if not (0 <= self.program_counter <= self.MAX_MEMORY_ADDRESS):
+            raise RuntimeError(f"Program Counter ({self.PC_FORMAT.format(self.program_counter)}) out of bounds ({self.MEM_RANGE_DISPLAY}). Execution halted.")
+
+        # 2-6. Fetch, decode and validate (cached per address until the word is overwritten)
+        decoded = self._decoded[self.program_counter]
+        if decoded is None:
+            decoded = self._decode(self.program_counter)
+        execute_func, operand, opcode = decoded
+
+        trapped = opcode >= _TRAPPED
+        if trapped:
+            opcode -= _TRAPPED
+            if self._break_before():
+                self.is_running = False
+                return False # Stopped before executing the instruction
+            watched_value = self.memory[operand]
+        watch_hit = False
+
+        history = self._history
+        if history is not None:
+            # Remember what this step will overwrite so step_back() can undo it
+            undo_pc, undo_acc = self.program_counter, self.accumulator
+            undo_address = operand if opcode == self.STORE or opcode == self.READ else -1
+            undo_value = self.memory[operand] if undo_address >= 0 else 0
 
         next_pc = self.program_counter # Default, will be updated by handlers
         halt_execution = False
 
-        if execute_func:
-            try:
-                next_pc, halt_execution = execute_func(operand)
-                # Validate the next_pc returned by branch instructions
-                if not (0 <= next_pc <= self.MAX_MEMORY_ADDRESS) and not halt_execution:
-                     raise RuntimeError(f"Branch to invalid address {self.PC_FORMAT.format(next_pc)} from instruction at {self.PC_FORMAT.format(self.program_counter)}.")
-
-            except (ValueError, ZeroDivisionError, OverflowError, RuntimeError, EOFError) as e:
-                # Catch specific runtime errors from execution handlers or I/O
-                print(f"\nRuntime Error at address {self.PC_FORMAT.format(self.program_counter)} (Instruction: {self._format_word(instruction_word)}): {e}", file=sys.stderr)
-                halt_execution = True # Halt execution on error
-                # Optionally re-raise if the calling context needs to handle it further
-                # raise
-            except Exception as e:
-                 # Catch any other unexpected errors during execution
-                 print(f"\nUnexpected Runtime Error at address {self.PC_FORMAT.format(self.program_counter)} (Instruction: {self._format_word(instruction_word)}): {e}", file=sys.stderr)
-                 halt_execution = True
-                 raise # Re-raise unexpected errors
-
-        else:
-            # Handle unknown opcode
-            raise ValueError(f"Invalid opcode {opcode:03d} encountered at address {self.PC_FORMAT.format(self.program_counter)} (Instruction: {self._format_word(instruction_word)}).")
+        try:
+            next_pc, halt_execution = execute_func(self, operand)
+            # Validate the next_pc returned by branch instructions
+            if not (0 <= next_pc <= self.MAX_MEMORY_ADDRESS) and not halt_execution:
+                 raise RuntimeError(f"Branch to invalid address {self.PC_FORMAT.format(next_pc)} from instruction at {self.PC_FORMAT.format(self.program_counter)}.")
+            self.steps_executed += 1
+            if history is not None:
+                history.record(undo_pc, undo_acc, undo_address, undo_value, self.memory)
+            if trapped:
+                watch_hit = self._break_after(opcode, operand, watched_value)
+
+        except (ValueError, ZeroDivisionError, OverflowError, RuntimeError, EOFError) as e:
+            # Catch specific runtime errors from execution handlers or I/O
+            self.last_error = e
+            instruction_word = self.memory[self.program_counter]
+            print(f"\nRuntime Error at address {self.PC_FORMAT.format(self.program_counter)} (Instruction: {self._format_word(instruction_word)}): {e}", file=sys.stderr)
+            halt_execution = True # Halt execution on error
+            # Optionally re-raise if the calling context needs to handle it further
+            # raise
+        except Exception as e:
+             # Catch any other unexpected errors during execution
+             self.last_error = e
+             instruction_word = self.memory[self.program_counter]
+             print(f"\nUnexpected Runtime Error at address {self.PC_FORMAT.format(self.program_counter)} (Instruction: {self._format_word(instruction_word)}): {e}", file=sys.stderr)
+             halt_execution = True
+             raise # Re-raise unexpected errors
 
         # 7. Update state or halt
         if halt_execution:
             self.is_running = False
+            self.flush_output()
             return False # Signal halt/error
         else:
             self.program_counter = next_pc
+            if watch_hit:
+                self.is_running = False
+                return False # Stopped after the instruction that touched a watched cell
             return True # Signal continue
 
-    def run(self):
+    def run(self, max_steps=None, time_limit=None, detect_loops=None):
         """
-        Executes the loaded 6-digit program until HALT or error.
+        Executes the loaded 6-digit program until HALT, error, or the budget runs out.
+
+        Args:
+            max_steps (int, optional): Instruction budget for this run. Defaults to `self.max_steps`.
+            time_limit (float, optional): Wall-clock limit in seconds, checked every
+                                          WATCHDOG_INTERVAL instructions. Defaults to `self.time_limit`.
+            detect_loops (bool, optional): Stop with InfiniteLoopError when the machine state
+                                           repeats with no READ in between (sampled every
+                                           LOOP_CHECK_INTERVAL instructions). Defaults to `self.detect_loops`.
+
+        If the budget runs out, `last_error` is a BudgetExhaustedError and the program
+        counter is left at the next instruction.
 
         Raises:
             Exception: Propagates exceptions raised during step execution (e.g., RuntimeError, ValueError).
         """
+        if not self._ready_to_run():
+            return
+
+        self._run_loop(None, max_steps, time_limit, detect_loops)
+
+    def run_fast(self, max_steps=None, time_limit=None, detect_loops=None):
+        """
+        Executes the loaded 6-digit program until HALT or error, optimized for throughput.
+
+        LOAD, STORE, arithmetic, branches and HALT run inline from the decode cache with
+        the accumulator and program counter held in locals. Anything else (READ/WRITE,
+        uncached or invalid words, or an instruction that would fault) is handed to
+        step(), so the final state and error messages are identical to run(). While
+        history is enabled every instruction goes through step() so it can be undone.
+        Takes the same budget and loop-detection arguments as run().
+
+        Each instruction is still a decode-cache lookup and an opcode dispatch, so the
+        gain over run() is modest; measure it with benchmarks/bench_engines.py.
+        """
+        if not self._ready_to_run():
+            return
+
+        fast_span = self._run_fast_span if self._history is None else None # History records in step()
+        self._run_loop(fast_span, max_steps, time_limit, detect_loops)
+
+    def flush_output(self):
+        """Flushes buffered WRITE output if io_write is an OutputSink."""
+        if isinstance(self.io_write, OutputSink):
+            self.io_write.flush()
+
+    def _ready_to_run(self):
+        """Returns True if a run can start, printing the reason to stderr if not."""
         if self.is_running:
             print("Simulator is already running.", file=sys.stderr)
-            return
+            return False
 
         if not (0 <= self.program_counter <= self.MAX_MEMORY_ADDRESS):
              print(f"Cannot run: Initial Program Counter ({self.program_counter}) is out of bounds.", file=sys.stderr)
-             return
+             return False
+        return True
 
-        self.is_running = True
+    def _run_loop(self, fast_span, max_steps, time_limit, detect_loops, pause_on_read=False):
+        """
+        Drives a run under the instruction budget, deadline and loop detection.
+
+        Args:
+            fast_span (callable): Runs up to N instructions and returns True once the run has
+                                  ended (HALT, or an error it let step() report), False to have
+                                  step() execute the instruction at the PC (see _run_fast_span).
+                                  None executes everything with step().
+            max_steps (int): Instruction budget, or None for `self.max_steps`.
+            time_limit (float): Seconds, or None for `self.time_limit`.
+            detect_loops (bool): Whether to sample states for loop detection, or None for `self.detect_loops`.
+            pause_on_read (bool, optional): Stop (setting awaiting_input) instead of executing a
+                                            READ when no value has been queued with provide_input().
+        """
+        max_steps, time_limit, deadline, loop_detector = self._start_run(max_steps, time_limit, detect_loops)
+        remaining = 0 # Instructions left before the next watchdog check
         try:
             while self.is_running:
+                if not remaining:
+                    remaining = self._budget_slice(max_steps, time_limit, deadline, loop_detector)
+                    if not remaining:
+                        break
+                if fast_span is not None:
+                    before = self.steps_executed
+                    if fast_span(remaining):
+                        break
+                    remaining -= self.steps_executed - before
+                    if not remaining:
+                        continue
+                if pause_on_read and not self._pending_input and self._next_is_read():
+                    self.awaiting_input = True
+                    break
                 if not self.step(): # step() returns False on HALT or error
                     break
+                remaining -= 1
         except Exception as e:
             # Error message is already printed by step()
+            self.last_error = e
             self.is_running = False # Ensure state is updated
-            # No need to re-raise usually, as step() handles logging.
-            # If calling code needs the exception, uncomment the next line:
-            # raise
         finally:
             # Ensure is_running is false if loop terminates unexpectedly
             self.is_running = False
+            self.flush_output()
+            self._repage_memory()
+
+    def _start_run(self, max_steps, time_limit, detect_loops):
+        """
+        Marks a run as started and resolves its limits (see _run_loop() for the arguments).
+
+        Returns:
+            tuple: (max_steps, time_limit, deadline, loop_detector) for _budget_slice().
+        """
+        max_steps = self.max_steps if max_steps is None else max_steps
+        time_limit = self.time_limit if time_limit is None else time_limit
+        deadline = None if time_limit is None else time.monotonic() + time_limit
+        detect_loops = self.detect_loops if detect_loops is None else detect_loops
+        loop_detector = _LoopDetector() if detect_loops else None
+
+        self.is_running = True
+        self.last_error = None
+        self.break_event = None
+        self.awaiting_input = False
+        if self._resume_pc != self.program_counter:
+            self._resume_pc = None # Only step over a breakpoint when resuming right where it stopped
+        self.steps_executed = 0
+        if self.memory.__class__ is CowMemory:
+            # The fast paths index a flat list; _repage_memory() shares the unchanged pages again
+            self._paged_base = self.memory.pages
+            self.memory = self.memory.to_memory()
+        return max_steps, time_limit, deadline, loop_detector
+
+    def _repage_memory(self):
+        """Turns the flat copy made by _start_run() back into a CowMemory after the run."""
+        if self._paged_base is not None:
+            self.memory = CowMemory.from_words(self.memory, self._paged_base)
+            self._paged_base = None
+
+    def _budget_slice(self, max_steps, time_limit, deadline, loop_detector):
+        """
+        Returns how many instructions may run before the next watchdog check.
+
+        Returns 0 (after recording a BudgetExhaustedError or InfiniteLoopError in
+        `last_error` and reporting it) once the budget or deadline has been used up,
+        or the loop detector has seen the current state before.
+        """
+        steps = self.steps_executed
+        pc = self.PC_FORMAT.format(self.program_counter)
+        repeated_at = loop_detector.observe(self) if loop_detector is not None else None
+        if repeated_at is not None:
+            self.last_error = InfiniteLoopError(
+                f"Execution stopped at address {pc} after {steps} instructions: infinite loop detected "
+                f"(state repeats every {steps - repeated_at} instructions with no input).",
+                self.program_counter, steps, steps - repeated_at)
+            print(f"\n{self.last_error}", file=sys.stderr)
+            self.is_running = False
+            return 0
+        if deadline is not None and time.monotonic() >= deadline:
+            reason, message = "time", f"time limit of {time_limit}s exceeded"
+        elif max_steps is not None and steps >= max_steps:
+            reason, message = "steps", f"instruction budget of {max_steps} exhausted"
+        else:
+            allowed = self.WATCHDOG_INTERVAL if deadline is not None else self._UNWATCHED_SLICE
+            if loop_detector is not None:
+                allowed = min(allowed, self.LOOP_CHECK_INTERVAL)
+            if max_steps is not None:
+                allowed = min(allowed, max_steps - steps)
+            return allowed
+
+        self.last_error = BudgetExhaustedError(
+            f"Execution stopped at address {pc} after {steps} instructions: {message}.",
+            self.program_counter, steps, reason)
+        print(f"\n{self.last_error}", file=sys.stderr)
+        self.is_running = False
+        return 0
+
+    def _run_fast_span(self, limit):
+        """
+        Runs cached pure instructions inline until one needs the slow path.
+
+        Steps are counted per straight-line run (the PC distance covered before each
+        branch) rather than per instruction, and the limit is checked at branches. A
+        straight run is at most MEMORY_SIZE instructions, so the span stops once fewer
+        than that remain of `limit` and leaves the rest of the slice to step().
+
+        Args:
+            limit (int): Maximum number of instructions to execute (adds to `steps_executed`).
+
+        Returns:
+            bool: True if HALT was executed, False if the instruction at the (synced)
+                  program counter must be executed by step().
+        """
+        last_entry = limit - self.MEMORY_SIZE # Keep going only while executed <= last_entry
+        if last_entry < 0:
+            return False
+        memory = self.memory
+        decoded = self._decoded
+        block_cache = self._block_cache
+        acc = self.accumulator
+        pc = self.program_counter
+        max_value = self.MAX_WORD_VALUE
+        min_value = self.MIN_WORD_VALUE
+        LOAD = self.LOAD; STORE = self.STORE; ADD = self.ADD; SUBTRACT = self.SUBTRACT
+        DIVIDE = self.DIVIDE; MULTIPLY = self.MULTIPLY; BRANCH = self.BRANCH
+        BRANCHNEG = self.BRANCHNEG; BRANCHZERO = self.BRANCHZERO; HALT = self.HALT
+        last_address = self.MAX_MEMORY_ADDRESS
+        executed = 0
+        run_start = pc # First address of the current straight-line run
+
+        while pc != last_address: # step() runs the last word, which may fall off the end
+            entry = decoded[pc]
+            if entry is None:
+                break
+            _, operand, opcode = entry
+            if opcode == LOAD:
+                acc = memory[operand]
+                pc += 1
+            elif opcode == ADD:
+                result = acc + memory[operand]
+                if result > max_value or result < min_value:
+                    break # Let step() report the overflow
+                acc = result
+                pc += 1
+            elif opcode == STORE:
+                memory[operand] = acc
+                decoded[operand] = None
+                if block_cache is not None and block_cache.covers[operand]:
+                    block_cache.invalidate(operand)
+                pc += 1
+            elif opcode == BRANCHZERO:
+                executed += pc - run_start + 1
+                pc = run_start = operand if acc == 0 else pc + 1
+                if executed > last_entry:
+                    break
+            elif opcode == BRANCHNEG:
+                executed += pc - run_start + 1
+                pc = run_start = operand if acc < 0 else pc + 1
+                if executed > last_entry:
+                    break
+            elif opcode == BRANCH:
+                executed += pc - run_start + 1
+                pc = run_start = operand
+                if executed > last_entry:
+                    break
+            elif opcode == SUBTRACT:
+                result = acc - memory[operand]
+                if result > max_value or result < min_value:
+                    break
+                acc = result
+                pc += 1
+            elif opcode == MULTIPLY:
+                result = acc * memory[operand]
+                if result > max_value or result < min_value:
+                    break
+                acc = result
+                pc += 1
+            elif opcode == DIVIDE:
+                divisor = memory[operand]
+                if divisor == 0:
+                    break
+                acc = int(acc / divisor) # Same truncation as _execute_divide; cannot overflow
+                pc += 1
+            elif opcode == HALT:
+                self.accumulator = acc
+                self.program_counter = pc
+                self.steps_executed += executed + pc - run_start + 1
+                self.is_running = False
+                return True
+            else:
+                break # READ/WRITE and trapped instructions go through step()
+
+        self.accumulator = acc
+        self.program_counter = pc
+        self.steps_executed += executed + pc - run_start
+        return False
+
+    # --- Basic-Block Compiled Execution ---
+
+    def run_compiled(self, max_steps=None, time_limit=None, detect_loops=None):
+        """
+        Executes the loaded 6-digit program until HALT or error using compiled basic blocks.
+
+        Each basic block (a straight run of instructions ending at a branch, HALT, I/O
+        or the next branch target) is compiled once into a Python function, and blocks
+        chain by looking up the successor's entry address. A READ or STORE that hits a
+        compiled address drops the affected blocks so they are recompiled from the new
+        words; an entry address dropped _BlockCache.RECOMPILE_LIMIT times (code that
+        rewrites itself on every pass) is interpreted like run_fast() from then on.
+        I/O and faults are handed to step(), so results match run().
+        Takes the same budget and loop-detection arguments as run(); near the end of a budget slice,
+        instructions run one at a time through step() so the budget is exact.
+
+        Compiling costs more than interpreting a block once, so this only pays off for
+        tight loops that re-enter the same blocks many times; for short or I/O-bound
+        programs use run_fast(). Compare the two with benchmarks/bench_engines.py.
+        """
+        if not self._ready_to_run():
+            return
+
+        if self._block_cache is None:
+            self._block_cache = _BlockCache(self.MEMORY_SIZE, self._find_block_leaders())
+
+        fast_span = self._run_blocks if self._history is None else None # History records in step()
+        self._run_loop(fast_span, max_steps, time_limit, detect_loops)
+
+    def _run_blocks(self, limit):
+        """
+        Chains compiled blocks until one exits to the slow path or halts.
+
+        A block can execute up to MEMORY_SIZE instructions, so no block is entered
+        once fewer than that remain of `limit`; step() finishes the slice instead.
+
+        Args:
+            limit (int): Maximum number of instructions to execute (adds to `steps_executed`).
+
+        Returns:
+            bool: True if HALT was executed, False if the instruction at the (synced)
+                  program counter must be executed by step().
+        """
+        blocks = self._block_cache.blocks
+        memory = self.memory
+        acc = self.accumulator
+        pc = self.program_counter
+        exit_kind = _BLOCK_NEXT
+        executed = 0
+        last_entry = limit - self.MEMORY_SIZE # Enter blocks only while executed <= last_entry
+        while not exit_kind and executed <= last_entry:
+            block = blocks[pc]
+            if block is None:
+                block = self._compile_block(pc)
+            elif block is _INTERPRETED:
+                break
+            acc, pc, exit_kind, count = block(acc, memory)
+            executed += count
+
+        self.accumulator = acc
+        self.program_counter = pc
+        self.steps_executed += executed
+        if exit_kind == _BLOCK_HALT:
+            self.is_running = False
+            return True
+        if not exit_kind and blocks[pc] is _INTERPRETED:
+            # Self-modifying code: interpret up to the next instruction that needs step()
+            return self._run_fast_span(limit - executed)
+        return False
+
+    def _find_block_leaders(self):
+        """
+        Marks the addresses that start a basic block in the loaded memory image.
+
+        Leaders are address 000, every branch target, and the address after any
+        branch, HALT or I/O instruction.
+
+        Returns:
+            bytearray: Flag per address (plus one past the end), non-zero for leaders.
+        """
+        leaders = bytearray(self.MEMORY_SIZE + 1)
+        leaders[0] = 1
+        ends_block = (self.BRANCH, self.BRANCHNEG, self.BRANCHZERO, self.HALT, self.READ, self.WRITE)
+        for address in range(self.MEMORY_SIZE):
+            decoded = self._decoded[address]
+            if decoded is None:
+                continue
+            _, operand, opcode = decoded
+            if opcode in ends_block:
+                leaders[address + 1] = 1
+            if opcode in (self.BRANCH, self.BRANCHNEG, self.BRANCHZERO):
+                leaders[operand] = 1
+        return leaders
+
+    def _compile_block(self, start):
+        """
+        Compiles the basic block entered at `start` into a Python function and caches it.
+
+        The function takes (acc, memory) and returns (acc, next_pc, exit_kind, executed),
+        where `executed` is the number of instructions it completed. Pure
+        instructions are emitted inline; an instruction that would fault returns
+        _BLOCK_SLOW at its own address with the accumulator unchanged so step() can
+        re-execute it and report the error.
+
+        Args:
+            start (int): The entry address of the block.
+
+        Returns:
+            function: The compiled block.
+        """
+        block_cache = self._block_cache
+        leaders = block_cache.leaders
+        max_value = self.MAX_WORD_VALUE
+        min_value = self.MIN_WORD_VALUE
+        body = []
+        address = start
+        end = start - 1 # Last address compiled into the block
+        while True:
+            decoded = self._decoded[address]
+            if decoded is None and address <= self.MAX_MEMORY_ADDRESS:
+                try:
+                    decoded = self._decode(address)
+                except ValueError:
+                    pass # step() reports invalid words
+            if decoded is None or decoded[2] in (self.READ, self.WRITE) or decoded[2] >= _TRAPPED:
+                body.append(f"return acc, {address}, {_BLOCK_SLOW}, {address - start}")
+                break
+
+            _, operand, opcode = decoded
+            if address == self.MAX_MEMORY_ADDRESS and opcode not in (self.BRANCH, self.HALT):
+                body.append(f"return acc, {address}, {_BLOCK_SLOW}, {address - start}") # May fall off the end
+                break
+            end = address
+            next_address = address + 1
+            if opcode == self.LOAD:
+                body.append(f"acc = memory[{operand}]")
+            elif opcode == self.STORE:
+                body += [f"memory[{operand}] = acc",
+                         f"decoded[{operand}] = None",
+                         f"if covers[{operand}]:",
+                         f"    invalidate({operand})",
+                         f"    return acc, {next_address}, {_BLOCK_NEXT}, {next_address - start}"]
+            elif opcode in (self.ADD, self.SUBTRACT, self.MULTIPLY):
+                symbol = {self.ADD: "+", self.SUBTRACT: "-", self.MULTIPLY: "*"}[opcode]
+                body += [f"result = acc {symbol} memory[{operand}]",
+                         f"if result > {max_value} or result < {min_value}:",
+                         f"    return acc, {address}, {_BLOCK_SLOW}, {address - start}",
+                         "acc = result"]
+            elif opcode == self.DIVIDE:
+                body += [f"divisor = memory[{operand}]",
+                         "if divisor == 0:",
+                         f"    return acc, {address}, {_BLOCK_SLOW}, {address - start}",
+                         "acc = int(acc / divisor)"]
+            elif opcode == self.BRANCH:
+                body.append(f"return acc, {operand}, {_BLOCK_NEXT}, {next_address - start}")
+                break
+            elif opcode == self.BRANCHNEG:
+                body.append(f"return acc, ({operand} if acc < 0 else {next_address}), {_BLOCK_NEXT}, {next_address - start}")
+                break
+            elif opcode == self.BRANCHZERO:
+                body.append(f"return acc, ({operand} if acc == 0 else {next_address}), {_BLOCK_NEXT}, {next_address - start}")
+                break
+            elif opcode == self.HALT:
+                body.append(f"return acc, {address}, {_BLOCK_HALT}, {next_address - start}")
+                break
+
+            if leaders[next_address]:
+                body.append(f"return acc, {next_address}, {_BLOCK_NEXT}, {next_address - start}")
+                break
+            address = next_address
+
+        source = "def block(acc, memory, decoded=decoded, covers=covers, invalidate=invalidate):\n"
+        source += "".join(f"    {line}\n" for line in body)
+        namespace = {"decoded": self._decoded, "covers": block_cache.covers,
+                     "invalidate": block_cache.invalidate}
+        exec(compile(source, f"<BasicML block {self.PC_FORMAT.format(start)}>", "exec"), namespace)
+        block = namespace["block"]
+        if start <= self.MAX_MEMORY_ADDRESS:
+            block_cache.add(start, max(start, end), block)
+        else:
+            block_cache.blocks[start] = block # PC ran off the end; nothing to invalidate
+        return block
+
+    # --- Suspendable Execution ---
+
+    def provide_input(self, value):
+        """Queues a value for the next READ executed by run_until_input() or events()."""
+        self._pending_input.append(int(value))
+
+    def run_until_input(self, max_steps=None, time_limit=None, detect_loops=None):
+        """
+        Runs like run_fast(), but pauses at a READ instead of calling io_read.
+
+        Values queued with provide_input() are used by READs first; when a READ finds
+        the queue empty, the run stops with the PC at that READ and awaiting_input set.
+        Queue a value and call again to continue. Nothing blocks, so one thread can
+        drive many simulators. Takes the same budget arguments as run() (per call).
+
+        Returns:
+            bool: True if paused waiting for input, False if the run ended
+                  (HALT, error, budget or breakpoint).
+        """
+        if not self._ready_to_run():
+            return False
+        saved_read = self.io_read
+        self.io_read = self._pending_input.popleft
+        try:
+            fast_span = self._run_fast_span if self._history is None else None # History records in step()
+            self._run_loop(fast_span, max_steps, time_limit, detect_loops, pause_on_read=True)
+        finally:
+            self.io_read = saved_read
+        return self.awaiting_input
+
+    def events(self, max_steps=None, time_limit=None, detect_loops=None):
+        """
+        Runs the loaded program as a generator of I/O events.
+
+        Yields Output(pc, value) for each WRITE and NeedInput(pc, address) at each READ
+        that has no queued value. Answer a NeedInput with `generator.send(value)`; that
+        call returns the next event. The generator finishes when the run ends; check
+        last_error / break_event for why. io_write is not called while it runs.
+
+        Args:
+            max_steps (int, optional): Instruction budget for the whole run, across pauses.
+            time_limit (float, optional): Wall-clock limit per stretch between pauses, in seconds.
+            detect_loops (bool, optional): As for run().
+
+        Raises:
+            ValueError: If a NeedInput is resumed with next() instead of send(value).
+        """
+        outputs = []
+        saved_write = self.io_write
+        self.io_write = lambda value: outputs.append(Output(self.program_counter, value))
+        total_steps = 0
+        try:
+            while True:
+                budget = None if max_steps is None else max_steps - total_steps
+                waiting = self.run_until_input(budget, time_limit, detect_loops)
+                total_steps += self.steps_executed
+                yield from outputs
+                outputs.clear()
+                if not waiting:
+                    return
+                value = yield NeedInput(self.program_counter, self._decoded[self.program_counter][1])
+                if value is None:
+                    raise ValueError("NeedInput must be answered with generator.send(value).")
+                self.provide_input(value)
+        finally:
+            self.io_write = saved_write
+
+    def _next_is_read(self):
+        """Returns True if the instruction at the PC is a READ (False if it is invalid; step() reports that)."""
+        decoded = self._decoded[self.program_counter]
+        if decoded is None:
+            try:
+                decoded = self._decode(self.program_counter)
+            except ValueError:
+                return False
+        return decoded[2] in (self.READ, self.READ + _TRAPPED)
+
+    # --- Breakpoints and Watchpoints ---
+
+    def add_breakpoint(self, address, condition=None):
+        """
+        Stops execution before the instruction at `address` runs.
 
+        A run stopped by a breakpoint leaves the PC at `address` and sets break_event;
+        running again continues from there (the breakpoint is stepped over once).
+
+        Args:
+            address (int): Instruction address.
+            condition (str or callable, optional): Only stop when this is true. A string is a
+                Python expression over `acc`, `pc` and `memory` (e.g. "acc < 0"), compiled once
+                here; a callable is called as condition(acc, pc, memory).
+
+        Raises:
+            ValueError: If the address is out of range or the condition does not compile.
+        """
+        if not (0 <= address <= self.MAX_MEMORY_ADDRESS):
+            raise ValueError(f"Breakpoint address {address} out of bounds ({self.MEM_RANGE_DISPLAY}).")
+        if isinstance(condition, str):
+            try:
+                code = compile(f"lambda acc, pc, memory: ({condition})", "<breakpoint condition>", "eval")
+            except SyntaxError as e:
+                raise ValueError(f"Invalid breakpoint condition '{condition}': {e.msg}")
+            condition = eval(code, {"__builtins__": {}})
+        self._breakpoints[address] = condition
+        self.invalidate_decode_cache(address)
+
+    def remove_breakpoint(self, address):
+        """Removes the breakpoint at `address`, if any."""
+        if self._breakpoints.pop(address, False) is not False:
+            self.invalidate_decode_cache(address)
+
+    def add_watchpoint(self, address, kind="write"):
+        """
+        Stops execution after an instruction accesses the memory cell at `address`.
+
+        Args:
+            address (int): The watched cell.
+            kind (str, optional): "read" (LOAD, arithmetic, WRITE), "write" (STORE, READ),
+                                  or "change" (a write that changes the value).
+
+        Raises:
+            ValueError: If the address or kind is invalid.
+        """
+        if not (0 <= address <= self.MAX_MEMORY_ADDRESS):
+            raise ValueError(f"Watchpoint address {address} out of bounds ({self.MEM_RANGE_DISPLAY}).")
+        if kind not in WATCH_KINDS:
+            raise ValueError(f"Invalid watchpoint kind '{kind}'. Expected one of: {', '.join(WATCH_KINDS)}.")
+        self._watchpoints.setdefault(address, set()).add(kind)
+        self.invalidate_decode_cache() # Any instruction may use this cell as its operand
+
+    def remove_watchpoint(self, address, kind=None):
+        """Removes one kind of watchpoint on `address`, or all of them if `kind` is omitted."""
+        kinds = self._watchpoints.get(address)
+        if kinds is None:
+            return
+        if kind is None:
+            kinds.clear()
+        else:
+            kinds.discard(kind)
+        if not kinds:
+            del self._watchpoints[address]
+        self.invalidate_decode_cache()
+
+    def clear_breakpoints(self):
+        """Removes all breakpoints and watchpoints."""
+        self._breakpoints.clear()
+        self._watchpoints.clear()
+        self.invalidate_decode_cache()
+
+    def _is_trapped(self, address, opcode, operand):
+        """Returns True if the decoded instruction must be checked by step() for breakpoints/watchpoints."""
+        if address in self._breakpoints:
+            return True
+        kinds = self._watchpoints.get(operand)
+        if not kinds:
+            return False
+        if opcode in (self.STORE, self.READ):
+            return "write" in kinds or "change" in kinds
+        return "read" in kinds and opcode in (self.LOAD, self.ADD, self.SUBTRACT, self.DIVIDE,
+                                               self.MULTIPLY, self.WRITE)
+
+    def _break_before(self):
+        """Checks the breakpoint at the PC. Returns True (and sets break_event) if it fires."""
+        pc = self.program_counter
+        if self._resume_pc == pc:
+            self._resume_pc = None # Resuming from this breakpoint: run the instruction
+            return False
+        if pc not in self._breakpoints:
+            return False
+        condition = self._breakpoints[pc]
+        if condition is not None and not condition(self.accumulator, pc, self.memory):
+            return False
+        self.break_event = BreakEvent("breakpoint", pc, pc, None, None)
+        self._resume_pc = pc
+        return True
+
+    def _break_after(self, opcode, operand, old_value):
+        """Checks watchpoints on `operand` after an instruction ran. Returns True (and sets break_event) if one fires."""
+        kinds = self._watchpoints.get(operand)
+        if not kinds:
+            return False
+        new_value = self.memory[operand]
+        if opcode in (self.STORE, self.READ):
+            if "write" in kinds:
+                kind = "write"
+            elif "change" in kinds and new_value != old_value:
+                kind = "change"
+            else:
+                return False
+        elif "read" in kinds and opcode not in (self.BRANCH, self.BRANCHNEG, self.BRANCHZERO, self.HALT):
+            kind = "read"
+        else:
+            return False
+        self.break_event = BreakEvent(kind, operand, self.program_counter, old_value, new_value)
+        return True
+
+    # --- Snapshots ---
+
+    def snapshot(self):
+        """
+        Captures memory, accumulator, program counter and running flag as bytes.
+
+        The layout is fixed (SNAPSHOT_SIZE bytes, see SNAPSHOT_MAGIC), so snapshots
+        can be stored or sent to other processes and restored into any instance.
+        """
+        return (self._SNAPSHOT_HEADER.pack(self.SNAPSHOT_MAGIC, self.is_running,
+                                           self.accumulator, self.program_counter)
+                + self._SNAPSHOT_WORDS.pack(*self.memory))
+
+    def restore(self, blob):
+        """
+        Restores a state captured by snapshot().
+
+        Memory is replaced in one copy and the decode cache is cleared. The undo
+        history, breakpoint resume state and last_error are reset as after loading.
+        The running flag only takes effect when restoring during a run (from an io
+        callback): restoring a stopped state there ends the run. Between runs the
+        simulator stays stopped, ready for run() to continue from the restored PC.
+
+        Raises:
+            ValueError: If `blob` is not a snapshot, or its PC or accumulator is out of range.
+        """
+        if len(blob) != self.SNAPSHOT_SIZE or bytes(blob[:len(self.SNAPSHOT_MAGIC)]) != self.SNAPSHOT_MAGIC:
+            raise ValueError("Not a UVSim snapshot.")
+        _, running, accumulator, program_counter = self._SNAPSHOT_HEADER.unpack_from(blob)
+        words = self._SNAPSHOT_WORDS.unpack_from(blob, self._SNAPSHOT_HEADER.size)
+        # Memory words are not range-checked (that would cost more than the restore); blobs come from snapshot()
+        if program_counter > self.MEMORY_SIZE or not self.MIN_WORD_VALUE <= accumulator <= self.MAX_WORD_VALUE:
+            raise ValueError("Snapshot contains a value outside the 6-digit machine's range.")
+
+        self.memory[:] = words
+        self.invalidate_decode_cache()
+        self.accumulator = accumulator
+        self.program_counter = program_counter
+        if self.is_running:
+            self.is_running = running
+        self.last_error = None
+        self.break_event = None
+        self._resume_pc = None
+        if self._history is not None:
+            self._history.clear()
+
+    def fork(self, io_read_func=None, io_write_func=None):
+        """
+        Returns a new simulator in this one's current state that shares its memory.
+
+        Both simulators then hold a CowMemory over the same pages and copy a page
+        only when they first write to it, so each fork costs a page table plus the
+        pages it changes. The fork's decode cache is allocated when it first decodes
+        an instruction. It starts stopped, with no error, history, breakpoints or
+        queued input, and the same budget defaults. Forking during a run (from an io
+        callback) pages a copy of the running memory instead of sharing it.
+
+        Args:
+            io_read_func (callable, optional): READ function for the fork. Defaults to this simulator's.
+            io_write_func (callable, optional): WRITE function for the fork. Defaults to this simulator's.
+
+        Returns:
+            UVSim: The fork, of the same class as this simulator.
+        """
+        if self.memory.__class__ is CowMemory:
+            memory = self.memory.share()
+        else:
+            memory = CowMemory.from_words(self.memory)
+            if not self.is_running:
+                self.memory = memory.share()
+        child = type(self)(io_read_func or (None if self.io_read == self._default_read else self.io_read),
+                           io_write_func or (None if self.io_write == self._default_write else self.io_write))
+        child.memory = memory
+        child._decoded = _filled_run(self.MEMORY_SIZE + 1, None)
+        child.accumulator = self.accumulator
+        child.program_counter = self.program_counter
+        child.awaiting_input = self.awaiting_input
+        child.max_steps = self.max_steps
+        child.time_limit = self.time_limit
+        child.detect_loops = self.detect_loops
+        return child
+
+    # --- Time-Travel Debugging ---
+
+    def enable_history(self, snapshot_interval=None, limit=None):
+        """
+        Starts recording an undo journal so step_back() and run_back_to() can rewind.
+
+        While enabled, every instruction executes through step() (run_fast() and
+        run_compiled() give up their fast paths). Loading a program or reset() clears
+        the history.
+
+        Args:
+            snapshot_interval (int, optional): Steps between full memory snapshots, which bound
+                                               the work of long jumps back. Defaults to HISTORY_SNAPSHOT_INTERVAL.
+            limit (int, optional): Maximum steps kept; older ones are dropped. Defaults to HISTORY_LIMIT.
+        """
+        self._history = _History(snapshot_interval or self.HISTORY_SNAPSHOT_INTERVAL,
+                                 limit or self.HISTORY_LIMIT)
+
+    def disable_history(self):
+        """Stops recording and discards the undo journal."""
+        self._history = None
+
+    def history_length(self):
+        """Returns how many steps can currently be undone."""
+        return len(self._history.pcs) if self._history is not None else 0
+
+    def step_back(self, count=1):
+        """
+        Undoes the most recent completed steps, restoring the accumulator, program
+        counter and memory exactly as they were.
+
+        Args:
+            count (int, optional): Steps to undo. Limited to history_length().
+
+        Returns:
+            int: The number of steps undone (0 without history or while running).
+        """
+        history = self._history
+        if history is None or self.is_running:
+            return 0
+        count = min(count, len(history.pcs))
+        if count <= 0:
+            return 0
+
+        base = history.base
+        target = base + len(history.pcs) - count # Step whose "before" state we return to
+        memory = self.memory
+        undo_from = len(history.pcs)
+        snapshot = bisect_left(history.snapshot_steps, target)
+        if snapshot < len(history.snapshot_steps):
+            snapshot_step = history.snapshot_steps[snapshot]
+            if snapshot_step - target + self.MEMORY_SIZE < count:
+                # Restoring the snapshot and undoing from there is cheaper than undoing every step
+                memory[:] = history.snapshot_memory[snapshot]
+                self.invalidate_decode_cache()
+                undo_from = snapshot_step - base
+
+        addresses, old_values = history.addresses, history.old_values
+        for index in range(undo_from - 1, target - base - 1, -1):
+            address = addresses[index]
+            if address >= 0:
+                memory[address] = old_values[index]
+                self._forget_code(address)
+
+        self.program_counter = history.pcs[target - base]
+        self.accumulator = history.accumulators[target - base]
+        self.steps_executed = max(0, self.steps_executed - count)
+        history.truncate_back(target)
+        return count
+
+    def run_back_to(self, address):
+        """
+        Rewinds to the most recent point where the instruction at `address` was about to execute.
+
+        Args:
+            address (int): The instruction address to rewind to.
+
+        Returns:
+            bool: True if found and rewound, False if the history does not reach it.
+        """
+        history = self._history
+        if history is None or self.is_running:
+            return False
+        pcs = history.pcs
+        for index in range(len(pcs) - 1, -1, -1):
+            if pcs[index] == address:
+                return self.step_back(len(pcs) - index) > 0
+        return False
+
+    # --- Static Porting Methods ---
+    @staticmethod
+    def ensure_6_digit(program_lines):
+        """
+        Returns program lines in 6-digit format, porting them if they are 4-digit.
+
+        Args:
+            program_lines (list[str]): Program lines in either format.
+
+        Returns:
+            list[str]: Equivalent 6-digit lines.
+
+        Raises:
+            ValueError: If the format cannot be detected or porting fails.
+        """
+        if UVSim.detect_format(program_lines) == 4:
+            return UVSim.port_4_to_6(program_lines)
+        return list(program_lines)
 
-    # --- Static Porting Method ---
     @staticmethod
     def port_4_to_6(lines_4_digit):
         """
@@ -506,3 +1943,55 @@ class UVSim:
 
         return lines_6_digit
 
+
+class UVSimPool:
+    """
+    Hands out reusable simulators for workloads that create, run and discard many.
+
+    acquire() returns an idle instance (or a new one) in its just-constructed state;
+    release() resets it, keeping its memory and decode cache buffers, and keeps it
+    for the next acquire(). A released simulator must not be used again by the
+    caller. acquire() and release() are single list operations, so threads may
+    share a pool.
+    """
+
+    def __init__(self, simulator_class=UVSim, max_size=64):
+        """
+        Args:
+            simulator_class (type, optional): UVSim or a subclass to create.
+            max_size (int, optional): Most idle instances kept; extra releases are dropped.
+        """
+        self.simulator_class = simulator_class
+        self.max_size = max_size
+        self._idle = []
+
+    def __len__(self):
+        """Number of idle instances."""
+        return len(self._idle)
+
+    def acquire(self, io_read_func=None, io_write_func=None):
+        """
+        Returns a reset simulator using the given io functions (defaults as for UVSim()).
+        """
+        try:
+            simulator = self._idle.pop()
+        except IndexError:
+            return self.simulator_class(io_read_func, io_write_func)
+        if io_read_func:
+            simulator.io_read = io_read_func
+        if io_write_func:
+            simulator.io_write = io_write_func
+        return simulator
+
+    def release(self, simulator):
+        """
+        Resets a simulator and keeps it for reuse.
+
+        Raises:
+            RuntimeError: If the simulator is still running.
+        """
+        if simulator.is_running:
+            raise RuntimeError("Cannot release a running simulator.")
+        if len(self._idle) < self.max_size and type(simulator) is self.simulator_class:
+            simulator._recycle()
+            self._idle.append(simulator)
@@ -8,7 +8,7 @@ import sys
 
 # --- Import Core Logic and New Modules ---
 try:
-    from uvsim_core_logic import UVSim
+    from uvsim_core_logic import UVSim, UVSimPool, BudgetExhaustedError, InfiniteLoopError, OutputSink
     from uvsim_theme_manager import ThemeManager
     from uvsim_editor_tab import EditorTab
     import uvsim_file_handler as FileHandler # Use module functions
@@ -121,6 +121,9 @@ class UVSimIDE(tk.Tk):
     Coordinates ThemeManager, EditorTabs, FileHandler, and UVSim instances.
     """
     MAX_LINES = UVSim.MAX_MEMORY_ADDRESS + 1 # Max lines = Max memory addresses + 1 (250)
+    RUN_MAX_STEPS = 5_000_000 # Instruction budget per run, so an endless loop cannot freeze the IDE
+    OUTPUT_FLUSH_SIZE = 500 # WRITE values shown in the I/O panel per update
+    OUTPUT_FLUSH_INTERVAL = 0.1 # Seconds, so output keeps appearing during long runs
 
     def __init__(self):
         super().__init__()
@@ -150,6 +153,7 @@ class UVSimIDE(tk.Tk):
         # }
         self.tab_data = {}
         self.new_file_counter = 0
+        self.uvsim_pool = UVSimPool() # Simulators of closed tabs, reused for new ones
         self.memory_view_window = None
         self.help_window = None # Reference to the help window
         self._right_clicked_tab_id = None # Store the ID (widget name) of the right-clicked tab
@@ -254,6 +258,7 @@ class UVSimIDE(tk.Tk):
         run_menu = tk.Menu(self.menu_bar, tearoff=0)
         self.menu_bar.add_cascade(label="Run", menu=run_menu)
         run_menu.add_command(label="Run Program", command=self._run_program, accelerator="F5")
+        run_menu.add_command(label="Step Back", command=self._step_back)
         run_menu.add_command(label="Reset Simulator", command=self._reset_simulator)
 
         # Help Menu
@@ -284,6 +289,7 @@ class UVSimIDE(tk.Tk):
         ttk.Button(self.toolbar, text="Save", command=self._save_current_file, style="TButton").pack(side=tk.LEFT, padx=3, pady=3)
         ttk.Button(self.toolbar, text="Close", command=self._close_current_tab, style="TButton").pack(side=tk.LEFT, padx=3, pady=3)
         ttk.Button(self.toolbar, text="Run", command=self._run_program, style="TButton").pack(side=tk.LEFT, padx=3, pady=3)
+        ttk.Button(self.toolbar, text="Step Back", command=self._step_back, style="TButton").pack(side=tk.LEFT, padx=3, pady=3)
         ttk.Button(self.toolbar, text="Reset", command=self._reset_simulator, style="TButton").pack(side=tk.LEFT, padx=3, pady=3)
 
         # --- Theme Switcher Frame (Right) --- Use tk.Frame
@@ -385,8 +391,11 @@ class UVSimIDE(tk.Tk):
         self.notebook.add(editor_tab, text=tab_title)
 
         # Create UVSim instance for this tab
-        uvsim_instance = UVSim(io_read_func=self._handle_uvsim_read,
-                               io_write_func=self._handle_uvsim_write)
+        uvsim_instance = self.uvsim_pool.acquire(io_read_func=self._handle_uvsim_read,
+                                                 io_write_func=OutputSink(self._handle_uvsim_output,
+                                                                          size=self.OUTPUT_FLUSH_SIZE,
+                                                                          interval=self.OUTPUT_FLUSH_INTERVAL))
+        uvsim_instance.enable_history() # Lets "Step Back" rewind after a run
 
         # Store Tab Info using the editor_tab widget as the key in self.tab_data
         tab_id = str(editor_tab) # Get the Tk widget path name as ID
@@ -710,6 +719,9 @@ class UVSimIDE(tk.Tk):
                      # Cancel any pending updates for this tab's editor
                      if hasattr(editor_tab_widget, '_update_pending_id') and editor_tab_widget._update_pending_id:
                          editor_tab_widget.after_cancel(editor_tab_widget._update_pending_id)
+                     uvsim_instance = self.tab_data[tab_id]['uvsim_instance']
+                     if not uvsim_instance.is_running:
+                         self.uvsim_pool.release(uvsim_instance) # Reused by the next new tab
                      del self.tab_data[tab_id]
 
                  # If the closed tab was the memory view source, close memory view? Optional.
@@ -799,21 +811,21 @@ class UVSimIDE(tk.Tk):
             pass # Ignore if panel destroyed
 
 
-    def _handle_uvsim_write(self, value):
-        """Callback function passed to UVSim for WRITE operations."""
+    def _handle_uvsim_output(self, values):
+        """Receives batches of WRITE output from the tab simulator's OutputSink."""
         # Find which UVSim instance called this (should be the one for the active tab during run)
         # For simplicity, we assume the currently selected tab's simulator is the one running.
         # A more robust approach might involve tracking the running simulator explicitly.
         current_data = self._get_current_tab_data()
         if current_data and current_data['uvsim_instance']:
             uvs = current_data['uvsim_instance']
-            display_value = str(value) # BasicML outputs integers
-            self._update_io_panel(f"Output: {display_value}")
+            # One insert and one state refresh per batch instead of per WRITE
+            self._update_io_panel("\n".join(f"Output: {value}" for value in values))
             # Update state display *after* the operation potentially changes Acc/PC/Memory
             self._update_state_display(uvs)
         else:
             # This case should ideally not happen if run logic is correct
-             self._update_io_panel(f"Output (Error: No active simulator context?): {value}")
+             self._update_io_panel(f"Output (Error: No active simulator context?): {', '.join(map(str, values))}")
 
 
     def _handle_uvsim_read(self):
@@ -899,7 +911,7 @@ class UVSimIDE(tk.Tk):
             self._refresh_memory_view_if_open(uvs) # Update memory view after load
 
             # Execute the program
-            uvs.run() # run() handles the step loop and exception catching internally
+            uvs.run(max_steps=self.RUN_MAX_STEPS, detect_loops=True) # run() handles the step loop and exception catching internally
 
             # Program finished (HALT or error handled within run/step)
             if not uvs.is_running: # Should be false after run() finishes
@@ -907,6 +919,10 @@ class UVSimIDE(tk.Tk):
                      self._update_io_panel(f"--- Program Execution Halted: PC out of bounds ({uvs.program_counter}) ---")
                  elif any(uvs.memory.get(i, 0) // 1000 == UVSim.HALT for i in range(uvs.MAX_MEMORY_ADDRESS + 1) if i == uvs.program_counter -1): # Simple check if last instruction was HALT
                      self._update_io_panel("--- Program Execution Finished Normally (HALT) ---")
+                 elif isinstance(uvs.last_error, InfiniteLoopError):
+                     self._update_io_panel(f"--- Program Stopped: {uvs.last_error} ---")
+                 elif isinstance(uvs.last_error, BudgetExhaustedError):
+                     self._update_io_panel(f"--- Program Stopped: {uvs.last_error} (possible infinite loop) ---")
                  # else: Error message was likely printed by step() or run()
 
         except ValueError as load_err:
@@ -947,6 +963,23 @@ class UVSimIDE(tk.Tk):
         self._refresh_memory_view_if_open(uvs)
 
 
+    def _step_back(self):
+        """Undoes the last executed instruction of the active tab's simulator."""
+        current_data = self._get_current_tab_data()
+        if not current_data:
+            messagebox.showwarning("Step Back Error", "No active program tab selected.", parent=self)
+            return
+
+        uvs = current_data['uvsim_instance']
+        if not uvs.step_back():
+            self._update_io_panel("--- Nothing to step back to ---")
+            return
+        self._update_io_panel(f"--- Stepped back to address {UVSim.PC_FORMAT.format(uvs.program_counter)} "
+                              f"({uvs.history_length()} earlier steps available) ---")
+        self._update_state_display(uvs)
+        self._refresh_memory_view_if_open(uvs)
+
+
     # --- Memory View Logic --- (No changes needed in this section)
 
     def _show_memory_view(self):
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import struct
+
+from uvsim_core_logic import UVSim, UVSimPool
+
+# On-disk cache of loaded programs, like __pycache__ for .bml files. The first load
+# of a source file parses, validates and ports it as usual and writes the resulting
+# memory image to __bmlcache__/<file name>.img next to it; later loads of the
+# unchanged file read the image and skip text processing. A cache file is used when
+# the source's mtime and size match its header, or, failing that, its SHA-256 (the
+# header is then refreshed). Cache files that cannot be written are skipped.
+
+CACHE_DIR_NAME = "__bmlcache__"
+CACHE_SUFFIX = ".img"
+
+# Cache file layout (little-endian): magic, UVSim.ENGINE_VERSION, source mtime in ns,
+# source size, source SHA-256, word count, then the words (trailing zeros dropped).
+IMAGE_MAGIC = b"BMLC"
+_IMAGE_HEADER = struct.Struct("<4sHqq32sH")
+
+_parser_pool = UVSimPool(max_size=1) # Parses sources on a cache miss
+
+
+def cache_path(source_path):
+    """Returns the cache file path for a program source file."""
+    directory, name = os.path.split(os.path.abspath(source_path))
+    return os.path.join(directory, CACHE_DIR_NAME, name + CACHE_SUFFIX)
+
+
+def parse_image(lines):
+    """
+    Parses, validates and ports program text (4- or 6-digit) into memory words.
+
+    Returns:
+        list[int]: The memory image without trailing zero words.
+
+    Raises:
+        ValueError: If the program is invalid (same messages as load_program_from_lines()).
+    """
+    parser = _parser_pool.acquire()
+    try:
+        parser.load_program_from_lines(UVSim.ensure_6_digit(lines))
+        words = list(parser.memory)
+    finally:
+        _parser_pool.release(parser)
+    while words and words[-1] == 0:
+        words.pop()
+    return words
+
+
+def _read_cached(path, stat, source_hash=None):
+    """
+    Returns (words, needs_refresh) from a cache file that matches the source, or None.
+
+    Matches on mtime and size; with `source_hash`, a file whose hash matches also
+    counts (needs_refresh is then True so the header gets the new mtime).
+    """
+    try:
+        with open(path, 'rb') as f:
+            blob = f.read()
+        magic, version, mtime_ns, size, digest, count = _IMAGE_HEADER.unpack_from(blob)
+    except (OSError, struct.error):
+        return None
+    if (magic != IMAGE_MAGIC or version != UVSim.ENGINE_VERSION
+            or len(blob) != _IMAGE_HEADER.size + 4 * count or count > UVSim.MEMORY_SIZE):
+        return None
+    if mtime_ns == stat.st_mtime_ns and size == stat.st_size:
+        needs_refresh = False
+    elif source_hash is not None and digest == source_hash:
+        needs_refresh = True
+    else:
+        return None
+    return list(struct.unpack_from(f"<{count}i", blob, _IMAGE_HEADER.size)), needs_refresh
+
+
+def _write_cached(path, stat, source_hash, words):
+    """Writes a cache file atomically; returns False if the directory is not writable."""
+    blob = (_IMAGE_HEADER.pack(IMAGE_MAGIC, UVSim.ENGINE_VERSION, stat.st_mtime_ns, stat.st_size,
+                               source_hash, len(words))
+            + struct.pack(f"<{len(words)}i", *words))
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, 'wb') as f:
+            f.write(blob)
+        os.replace(temp_path, path) # Concurrent writers each replace the file whole
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def load_image(source_path, use_cache=True):
+    """
+    Returns the validated, 6-digit memory image of a program file.
+
+    Args:
+        source_path (str): The .bml/.txt program (4- or 6-digit).
+        use_cache (bool, optional): Read and write __bmlcache__. False always parses.
+
+    Returns:
+        list[int]: Memory words from address 000, without trailing zero words.
+
+    Raises:
+        IOError: If the source cannot be read.
+        UnicodeDecodeError: If the source is not UTF-8.
+        ValueError: If the program is invalid. Invalid programs are not cached.
+    """
+    if use_cache:
+        path = cache_path(source_path)
+        stat = os.stat(source_path)
+        cached = _read_cached(path, stat)
+        if cached is not None:
+            return cached[0]
+
+    with open(source_path, 'rb') as f:
+        source = f.read()
+    if use_cache:
+        source_hash = hashlib.sha256(source).digest()
+        cached = _read_cached(path, stat, source_hash) # Touched but unchanged
+        if cached is not None:
+            _write_cached(path, stat, source_hash, cached[0])
+            return cached[0]
+    words = parse_image(source.decode('utf-8').splitlines())
+    if use_cache:
+        _write_cached(path, stat, source_hash, words)
+    return words
+
+
+def load_program_file(simulator, source_path, use_cache=True):
+    """Loads a program file into `simulator` through the cache (see load_image())."""
+    simulator.load_memory_image(load_image(source_path, use_cache))
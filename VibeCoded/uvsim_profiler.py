@@ -0,0 +1,154 @@
+import json
+
+from uvsim_core_logic import UVSim
+
+# Opt-in execution profiler for 6-digit BasicML programs. The profiler drives the
+# simulator one step() at a time through the simulator's own run loop (so budgets,
+# deadlines and loop detection still apply) and records what each instruction did.
+# None of this touches run()/run_fast()/run_compiled(), so unprofiled runs pay nothing.
+
+# Opcodes whose operand is a memory read or a memory write
+_READS_MEMORY = (UVSim.WRITE, UVSim.LOAD, UVSim.ADD, UVSim.SUBTRACT, UVSim.DIVIDE, UVSim.MULTIPLY)
+_WRITES_MEMORY = (UVSim.READ, UVSim.STORE)
+
+
+class Profiler:
+    """
+    Collects execution statistics for programs run on one UVSim instance.
+
+    Counts accumulate across runs until reset(). Only instructions that completed
+    are counted; an instruction that faults is left out, like in steps_executed.
+
+    Attributes:
+        address_counts (list[int]): Executions per memory address.
+        opcode_counts (dict): Executions per opcode (e.g. {UVSim.LOAD: 12}).
+        branch_taken (list[int]): Per address, how often a branch there jumped.
+        branch_not_taken (list[int]): Per address, how often a conditional branch fell through.
+        memory_reads (list[int]): Operand reads per address (LOAD, arithmetic, WRITE).
+        memory_writes (list[int]): Operand writes per address (STORE, READ).
+    """
+
+    def __init__(self, simulator):
+        """
+        Args:
+            simulator (UVSim): The simulator to profile. Load the program before calling run().
+        """
+        self.simulator = simulator
+        self.reset()
+
+    def reset(self):
+        """Clears all counts."""
+        size = self.simulator.MEMORY_SIZE
+        self.address_counts = [0] * size
+        self.opcode_counts = dict.fromkeys(UVSim.OPCODE_NAMES, 0)
+        self.branch_taken = [0] * size
+        self.branch_not_taken = [0] * size
+        self.memory_reads = [0] * size
+        self.memory_writes = [0] * size
+
+    def run(self, max_steps=None, time_limit=None, detect_loops=None):
+        """
+        Runs the loaded program until HALT, error, or the budget runs out, recording statistics.
+
+        Takes the same arguments as UVSim.run(); output, errors and final state are the same.
+        """
+        simulator = self.simulator
+        if not simulator._ready_to_run():
+            return
+        simulator._run_loop(self._profile_span, max_steps, time_limit, detect_loops)
+
+    def _profile_span(self, limit):
+        """Executes up to `limit` instructions with step(), recording each one. Returns True once the run ends."""
+        simulator = self.simulator
+        memory = simulator.memory
+        max_address = simulator.MAX_MEMORY_ADDRESS
+        step = simulator.step
+        address_counts = self.address_counts
+        opcode_counts = self.opcode_counts
+        for _ in range(limit):
+            pc = simulator.program_counter
+            word = memory[pc] if 0 <= pc <= max_address else 0 # step() reports a bad PC
+            steps = simulator.steps_executed
+            running = step()
+            if simulator.steps_executed == steps:
+                return True # The instruction faulted; step() has reported it
+
+            opcode, operand = divmod(word, 1000)
+            address_counts[pc] += 1
+            opcode_counts[opcode] += 1
+            if opcode in _READS_MEMORY:
+                self.memory_reads[operand] += 1
+            elif opcode in _WRITES_MEMORY:
+                self.memory_writes[operand] += 1
+            elif opcode == UVSim.BRANCH:
+                self.branch_taken[pc] += 1
+            elif opcode in (UVSim.BRANCHNEG, UVSim.BRANCHZERO):
+                # Branches leave the accumulator alone, so the condition can be checked afterwards
+                acc = simulator.accumulator
+                if acc < 0 if opcode == UVSim.BRANCHNEG else acc == 0:
+                    self.branch_taken[pc] += 1
+                else:
+                    self.branch_not_taken[pc] += 1
+            if not running:
+                return True
+        return False
+
+    def hottest(self, count=10):
+        """Returns up to `count` (address, executions) pairs, most executed first."""
+        executed = [(address, hits) for address, hits in enumerate(self.address_counts) if hits]
+        executed.sort(key=lambda item: (-item[1], item[0]))
+        return executed[:count]
+
+    def to_dict(self):
+        """
+        Returns the profile as a JSON-friendly dict. Addresses are 3-digit strings
+        and only addresses with non-zero counts are included.
+        """
+        pc_format = self.simulator.PC_FORMAT.format
+        memory = self.simulator.memory
+        return {
+            "instructions": sum(self.address_counts),
+            "opcodes": {UVSim.OPCODE_NAMES[opcode]: hits
+                        for opcode, hits in self.opcode_counts.items() if hits},
+            "addresses": {pc_format(address): {"count": hits,
+                                               "instruction": UVSim.disassemble_word(memory[address])}
+                          for address, hits in enumerate(self.address_counts) if hits},
+            "branches": {pc_format(address): {"taken": taken, "not_taken": self.branch_not_taken[address]}
+                         for address, taken in enumerate(self.branch_taken)
+                         if taken or self.branch_not_taken[address]},
+            "memory": {pc_format(address): {"reads": reads, "writes": self.memory_writes[address]}
+                       for address, reads in enumerate(self.memory_reads)
+                       if reads or self.memory_writes[address]},
+        }
+
+    def to_json(self, indent=2):
+        """Returns the profile (see to_dict()) as a JSON string."""
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def report(self, top=10):
+        """
+        Formats a text report: totals, opcode mix, and the hottest addresses with
+        their disassembly and branch outcomes.
+
+        Args:
+            top (int, optional): How many of the hottest addresses to list.
+
+        Returns:
+            str: The report.
+        """
+        simulator = self.simulator
+        total = sum(self.address_counts)
+        lines = [f"Instructions executed: {total}", "", "Opcode mix:"]
+        for opcode, hits in sorted(self.opcode_counts.items(), key=lambda item: -item[1]):
+            if hits:
+                lines.append(f"  {UVSim.OPCODE_NAMES[opcode]:<10} {hits:>10}  {hits / total:6.1%}")
+
+        lines += ["", f"Hottest addresses (top {top}):"]
+        for address, hits in self.hottest(top):
+            line = (f"  {simulator.PC_FORMAT.format(address)}  {hits:>10}  {hits / total:6.1%}  "
+                    f"{UVSim.disassemble_word(simulator.memory[address]):<16}")
+            taken, not_taken = self.branch_taken[address], self.branch_not_taken[address]
+            if taken or not_taken:
+                line += f" taken {taken}, not taken {not_taken}"
+            lines.append(line.rstrip())
+        return "\n".join(lines)
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict, namedtuple
+
+from uvsim_core_logic import UVSim
+
+# Content-addressed cache of finished runs. A run is deterministic given the memory
+# image, the READ values, the instruction budget and loop detection, so its result
+# can be looked up by a hash of those (plus UVSim.ENGINE_VERSION) instead of being
+# recomputed. Results live in an in-memory LRU and, optionally, a SQLite file that
+# several invocations (or machines sharing a disk) can reuse.
+
+# What a cached run produced; the fields match BatchResult after program/input_index.
+CachedRun = namedtuple("CachedRun", "status outputs accumulator program_counter steps error")
+
+
+def run_key(words, inputs, max_steps=None, detect_loops=False):
+    """
+    Returns the cache key for running a memory image with the given inputs and budget.
+
+    Trailing zero words are ignored, so the same program loaded from files with or
+    without padding shares a key.
+
+    Args:
+        words (Sequence[int]): The memory image (validated 6-digit words).
+        inputs (Sequence[int]): The READ values for the run.
+        max_steps (int, optional): Instruction budget for the run.
+        detect_loops (bool, optional): Whether loop detection is on for the run.
+
+    Returns:
+        str: A hex digest.
+    """
+    used = len(words)
+    while used and words[used - 1] == 0:
+        used -= 1
+    material = repr((UVSim.ENGINE_VERSION, tuple(words[:used]), tuple(inputs), max_steps, bool(detect_loops)))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU cache of CachedRun records by run_key(), optionally backed by a SQLite file.
+
+    Lookups check memory first, then the file. Entries older than `max_age` seconds
+    are treated as missing. Each store keeps at most `max_entries` in memory; the
+    file is trimmed to `max_disk_entries` (least recently used first) and purged of
+    expired entries when the cache is opened and closed.
+    """
+
+    def __init__(self, max_entries=4096, max_age=None, path=None, max_disk_entries=100000):
+        """
+        Args:
+            max_entries (int, optional): Results kept in memory.
+            max_age (float, optional): Seconds a result stays valid (default: forever).
+            path (str, optional): SQLite file for a persistent store (created if missing).
+            max_disk_entries (int, optional): Results kept in the file.
+        """
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # key -> (stored_at, CachedRun), least recently used first
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL") # Readers do not block the writer
+            self._db.execute("PRAGMA synchronous=NORMAL") # A lost entry is only a cache miss
+            self._db.execute("CREATE TABLE IF NOT EXISTS runs "
+                             "(key TEXT PRIMARY KEY, stored REAL, used REAL, result TEXT)")
+            self.prune()
+
+    def __len__(self):
+        """Number of results held in memory."""
+        return len(self._entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _expired(self, stored, now):
+        return self.max_age is not None and now - stored > self.max_age
+
+    def _remember(self, key, stored, run):
+        entries = self._entries
+        entries[key] = (stored, run)
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def get(self, key):
+        """Returns the CachedRun stored under `key`, or None."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if not self._expired(entry[0], now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+        if self._db is not None:
+            row = self._db.execute("SELECT stored, result FROM runs WHERE key = ?", (key,)).fetchone()
+            if row is not None and not self._expired(row[0], now):
+                status, outputs, accumulator, program_counter, steps, error = json.loads(row[1])
+                run = CachedRun(status, tuple(outputs), accumulator, program_counter, steps, error)
+                self._db.execute("UPDATE runs SET used = ? WHERE key = ?", (now, key))
+                self._db.commit()
+                self._remember(key, row[0], run)
+                self.hits += 1
+                return run
+        self.misses += 1
+        return None
+
+    def put(self, key, run):
+        """Stores a CachedRun under `key`."""
+        now = time.time()
+        run = CachedRun(*run)
+        self._remember(key, now, run)
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?)",
+                             (key, now, now, json.dumps([run.status, list(run.outputs), run.accumulator,
+                                                         run.program_counter, run.steps, run.error])))
+            self._db.commit()
+
+    def prune(self):
+        """Drops expired entries, and file entries beyond max_disk_entries."""
+        now = time.time()
+        for key in [key for key, (stored, _) in self._entries.items() if self._expired(stored, now)]:
+            del self._entries[key]
+        if self._db is not None:
+            if self.max_age is not None:
+                self._db.execute("DELETE FROM runs WHERE stored < ?", (now - self.max_age,))
+            if self.max_disk_entries is not None:
+                self._db.execute("DELETE FROM runs WHERE key IN "
+                                 "(SELECT key FROM runs ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                                 (self.max_disk_entries,))
+            self._db.commit()
+
+    def close(self):
+        """Prunes and closes the file store, if any. The in-memory entries stay usable."""
+        if self._db is not None:
+            self.prune()
+            self._db.close()
+            self._db = None
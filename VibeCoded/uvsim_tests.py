@@ -1,11 +1,28 @@
 import unittest
+import asyncio
 import io
+import json
+import os
 import sys
+import tempfile
 from unittest.mock import patch, MagicMock
 
+try:
+    import uvsim_vector # Optional: needs NumPy
+except ImportError:
+    uvsim_vector = None
+
 # Assuming the UVSim class is in uvsim_core_logic.py
 try:
-    from uvsim_core_logic import UVSim
+    from uvsim_core_logic import UVSim, BudgetExhaustedError, InfiniteLoopError, BreakEvent, NeedInput, Output, OutputSink, CowMemory, UVSimPool, _INTERPRETED
+    import uvsim_transpiler
+    import uvsim_batch
+    import uvsim_profiler
+    import uvsim_trace
+    import uvsim_async
+    import uvsim_cli
+    import uvsim_result_cache
+    import uvsim_image_cache
 except ImportError:
     print("FATAL ERROR: Could not import UVSim from uvsim_core_logic.py.", file=sys.stderr)
     # Define a dummy class to prevent NameErrors in tests if import fails,
@@ -90,6 +107,15 @@ class TestUVSimCore(unittest.TestCase):
         self.assertEqual(self.sim.memory.get(5, 0), 0) # Ensure previously set memory is cleared
         self.assertEqual(len(self.sim.memory), UVSim.MAX_MEMORY_ADDRESS + 1)
 
+    def test_reset_reuses_memory_storage(self):
+        """Verify reset zeroes memory in place instead of rebuilding it."""
+        memory = self.sim.memory
+        memory[7] = 4242
+        self.sim.reset()
+        self.assertIs(self.sim.memory, memory)
+        self.assertEqual(self.sim.memory[7], 0)
+        self.assertEqual(self.sim.memory.get(UVSim.MAX_MEMORY_ADDRESS + 1, -1), -1) # Out of range uses default
+
     # --- Test Format Detection (Static Method - Used by GUI) ---
     def test_detect_format_6_digit(self):
         lines = ["+100001", "+200002", "-000005"]
@@ -467,6 +493,34 @@ class TestUVSimCore(unittest.TestCase):
         self.assertEqual(self.sim.program_counter, 0) # PC shouldn't advance
 
 
+    # --- Test Decode Cache ---
+    def test_load_predecodes_instructions(self):
+        program = ["+020002", "+043000", "-000005"] # LOAD 002, HALT, data
+        self.assertTrue(self.sim.load_program_from_lines(program))
+        self.assertEqual(self.sim._decoded[0], (UVSim._execute_load, 2, UVSim.LOAD))
+        self.assertEqual(self.sim._decoded[1], (UVSim._execute_halt, 0, UVSim.HALT))
+        self.assertIsNone(self.sim._decoded[2]) # Negative data word is not an instruction
+
+    def test_load_skips_data_words_without_decoding_them(self):
+        program = ["+020002", "+000300", "+020999", "-000005", "+043000"] # Unknown opcode, bad operand, negative
+        with patch.object(UVSim, '_decode', autospec=True, side_effect=UVSim._decode) as decode:
+            self.assertTrue(self.sim.load_program_from_lines(program))
+        self.assertEqual([call.args[1] for call in decode.call_args_list], [0, 4])
+        self.assertEqual([entry is None for entry in self.sim._decoded[:5]], [False, True, True, True, False])
+
+    def test_self_modifying_store_invalidates_decode_cache(self):
+        program = ["+020005", # LOAD 005 (the word +011006, i.e. WRITE 006)
+                   "+021002", # STORE 002, overwriting the HALT below
+                   "+043000", # HALT (replaced at runtime)
+                   "+043000", # HALT
+                   "+000000",
+                   "+011006", # Instruction used as data
+                   "+000777"]
+        self.assertTrue(self.sim.load_program_from_lines(program))
+        self.sim.run()
+        self.assertEqual(self.mock_output_values, [777])
+        self.assertEqual(self.sim.program_counter, 3)
+
     # --- Test Run Function (Simple Integration - Always 6-Digit) ---
     def test_run_simple_program_6(self):
         """Test a basic program that reads, loads, writes, and halts."""
@@ -510,6 +564,509 @@ class TestUVSimCore(unittest.TestCase):
         self.assertIn("Division by zero", error_output)
 
 
+    # --- Test Fast Run Mode ---
+    # Sums 100 + 99 + ... + 1 with a countdown loop, then writes the total.
+    SUM_LOOP_PROGRAM = ["+020011", # 00 LOAD n
+                        "+042009", # 01 BRANCHZERO 009
+                        "+020012", # 02 LOAD sum
+                        "+030011", # 03 ADD n
+                        "+021012", # 04 STORE sum
+                        "+020011", # 05 LOAD n
+                        "+031013", # 06 SUBTRACT one
+                        "+021011", # 07 STORE n
+                        "+040000", # 08 BRANCH 000
+                        "+011012", # 09 WRITE sum
+                        "+043000", # 10 HALT
+                        "+000100", # 11 n
+                        "+000000", # 12 sum
+                        "+000001"] # 13 one
+
+    def test_run_fast_matches_run(self):
+        self.assertTrue(self.sim.load_program_from_lines(self.SUM_LOOP_PROGRAM))
+        self.sim.run()
+        expected = (self.sim.accumulator, self.sim.program_counter, list(self.sim.memory), self.mock_output_values)
+
+        self.mock_output_values = []
+        self.assertTrue(self.sim.load_program_from_lines(self.SUM_LOOP_PROGRAM))
+        self.sim.run_fast()
+        self.assertEqual((self.sim.accumulator, self.sim.program_counter, list(self.sim.memory), self.mock_output_values), expected)
+        self.assertEqual(self.mock_output_values, [5050])
+        self.assertFalse(self.sim.is_running)
+
+    def test_run_fast_reports_errors_like_step(self):
+        program = ["+020002", "+032003", "+000010", "+000000"] # LOAD 10, DIVIDE by 0
+        self.assertTrue(self.sim.load_program_from_lines(program))
+        self.sim.run_fast()
+        self.assertEqual(self.sim.program_counter, 1)
+        self.assertEqual(self.sim.accumulator, 10)
+        error_output = sys.stderr.getvalue()
+        self.assertIn("Runtime Error at address 001 (Instruction: +032003): Division by zero", error_output)
+
+    def test_run_modes_stop_when_pc_runs_off_memory(self):
+        # WRITE, BRANCH 247, then LOAD/ADD/STORE in the last three words; the STORE falls off the end
+        words = {0: 11100, 1: 40247, 100: 7, 247: 20100, 248: 30100, 249: 21101}
+        program = [f"+{words.get(address, 0):06d}" for address in range(UVSim.MEMORY_SIZE)]
+        results = []
+        for run in ("run", "run_fast", "run_compiled"):
+            self.mock_output_values.clear()
+            sys.stderr = io.StringIO()
+            self.assertTrue(self.sim.load_program_from_lines(program))
+            getattr(self.sim, run)()
+            error = self.sim.last_error
+            results.append((self.sim.program_counter, self.sim.steps_executed, self.sim.accumulator,
+                            self.sim.memory[101], list(self.mock_output_values), type(error), str(error),
+                            sys.stderr.getvalue()))
+            self.assertFalse(self.sim.is_running)
+        self.assertEqual(results[0][:2], (UVSim.MAX_MEMORY_ADDRESS, 4))
+        self.assertIn("Branch to invalid address 250 from instruction at 249", results[0][-1])
+        self.assertEqual(results[1:], [results[0]] * 2)
+
+    def test_run_compiled_reports_untaken_branch_off_memory_like_run(self):
+        program = ["+000000"] * UVSim.MAX_MEMORY_ADDRESS + ["+041000"] # BRANCHNEG at 249 with acc 0 falls through
+        results = []
+        for run in ("run", "run_compiled"):
+            sys.stderr = io.StringIO()
+            self.assertTrue(self.sim.load_program_from_lines(program))
+            self.sim.program_counter = UVSim.MAX_MEMORY_ADDRESS
+            getattr(self.sim, run)()
+            results.append((self.sim.program_counter, self.sim.steps_executed, str(self.sim.last_error),
+                            sys.stderr.getvalue()))
+        self.assertEqual(results[1], results[0])
+        self.assertIn("Branch to invalid address 250 from instruction at 249", results[0][-1])
+
+
+    # --- Test Compiled (Basic-Block) Run Mode ---
+    def test_run_compiled_matches_run(self):
+        self.assertTrue(self.sim.load_program_from_lines(self.SUM_LOOP_PROGRAM))
+        self.sim.run_compiled()
+        self.assertEqual(self.mock_output_values, [5050])
+        self.assertEqual(self.sim.accumulator, 0) # Loop exits once the counter reaches zero
+        self.assertEqual(self.sim.program_counter, 10)
+        self.assertEqual(self.sim.memory[12], 5050)
+        self.assertFalse(self.sim.is_running)
+
+    def test_run_compiled_recompiles_modified_block(self):
+        # Same self-modifying program as the decode cache test: STORE rewrites a HALT inside the running block
+        program = ["+020005", "+021002", "+043000", "+043000", "+000000", "+011006", "+000777"]
+        self.assertTrue(self.sim.load_program_from_lines(program))
+        self.sim.run_compiled()
+        self.assertEqual(self.mock_output_values, [777])
+        self.assertEqual(self.sim.program_counter, 3)
+
+    def test_run_compiled_interprets_code_that_keeps_rewriting_itself(self):
+        # 100 passes summing cells 060-099 through an ADD whose operand (address 011) is advanced each step
+        words = {0: 20050, 1: 42020, 2: 31051, 3: 21050, 4: 20052, 5: 21011, 6: 20053, 7: 21054,
+                 8: 20054, 9: 42000, 10: 20055, 11: 30060, 12: 21055, 13: 20011, 14: 30051, 15: 21011,
+                 16: 20054, 17: 31051, 18: 21054, 19: 40008, 20: 11055, 21: 43000,
+                 50: 100, 51: 1, 52: 30060, 53: 40}
+        words.update({address: address - 59 for address in range(60, 100)})
+        program = [f"+{words.get(address, 0):06d}" for address in range(100)]
+        compiles = []
+
+        class CountingUVSim(UVSim):
+            def _compile_block(self, start):
+                compiles.append(start)
+                return super()._compile_block(start)
+
+        steps = []
+        for run in ("run", "run_compiled"):
+            sim = CountingUVSim(io_write_func=self.mock_write)
+            self.assertTrue(sim.load_program_from_lines(program))
+            getattr(sim, run)()
+            steps.append(sim.steps_executed)
+        self.assertEqual(self.mock_output_values, [82000] * 2)
+        self.assertEqual(steps[1], steps[0])
+        self.assertLess(len(compiles), 60) # Not one recompile per pass
+        self.assertIs(sim._block_cache.blocks[10], _INTERPRETED) # The inner loop's block, rewritten every pass
+
+    def test_run_compiled_reports_errors_like_step(self):
+        program = ["+020003", "+030004", "+043000", f"+{UVSim.MAX_WORD_VALUE:06d}", "+000001"] # Overflowing ADD
+        self.assertTrue(self.sim.load_program_from_lines(program))
+        self.sim.run_compiled()
+        self.assertEqual(self.sim.program_counter, 1)
+        self.assertEqual(self.sim.accumulator, UVSim.MAX_WORD_VALUE)
+        self.assertIn("Runtime Error at address 001 (Instruction: +030004): Arithmetic overflow/underflow", sys.stderr.getvalue())
+
+
+    # --- Test Instruction Budget and Watchdog ---
+    def test_all_run_modes_count_the_same_steps(self):
+        counts = []
+        for run in ("run", "run_fast", "run_compiled"):
+            self.assertTrue(self.sim.load_program_from_lines(self.SUM_LOOP_PROGRAM))
+            getattr(self.sim, run)()
+            counts.append(self.sim.steps_executed)
+        self.assertEqual(counts, [100 * 9 + 4] * 3) # 9 per loop pass, then LOAD, BRANCHZERO, WRITE, HALT
+
+    def test_budget_stops_infinite_loop_in_every_run_mode(self):
+        program = ["+020003", "+030003", "+040000", "+000000"] # LOAD, ADD, BRANCH 000 forever
+        for run in ("run", "run_fast", "run_compiled"):
+            self.assertTrue(self.sim.load_program_from_lines(program))
+            getattr(self.sim, run)(max_steps=1000)
+            error = self.sim.last_error
+            self.assertIsInstance(error, BudgetExhaustedError)
+            self.assertEqual((error.reason, error.steps, error.pc), ("steps", 1000, 1)) # 1000 = 333 loops + LOAD
+            self.assertEqual(self.sim.steps_executed, 1000)
+            self.assertEqual(self.sim.program_counter, 1)
+            self.assertFalse(self.sim.is_running)
+        self.assertIn("Execution stopped at address 001 after 1000 instructions", sys.stderr.getvalue())
+
+    def test_time_limit_stops_infinite_loop(self):
+        self.assertTrue(self.sim.load_program_from_lines(["+040000"]))
+        self.sim.time_limit = 0.05 # Instance default applies when run() gets no limit
+        self.sim.run_fast()
+        self.assertEqual(self.sim.last_error.reason, "time")
+        self.assertEqual(self.sim.steps_executed % UVSim.WATCHDOG_INTERVAL, 0)
+
+    def test_budget_not_reported_when_program_halts_in_time(self):
+        self.assertTrue(self.sim.load_program_from_lines(self.SUM_LOOP_PROGRAM))
+        self.sim.run_compiled(max_steps=904)
+        self.assertIsNone(self.sim.last_error)
+        self.assertEqual(self.mock_output_values, [5050])
+
+
+    # --- Test Infinite Loop Detection ---
+    def test_detects_infinite_loop_in_every_run_mode(self):
+        # Flips memory[5] between 1 and 0 forever: the state cycles every 6 instructions
+        program = ["+020006", "+031005", "+021005", "+040000", "+000000", "+000000", "+000001"]
+        for run in ("run", "run_fast", "run_compiled"):
+            self.assertTrue(self.sim.load_program_from_lines(program))
+            getattr(self.sim, run)(max_steps=1000000, detect_loops=True)
+            error = self.sim.last_error
+            self.assertIsInstance(error, InfiniteLoopError)
+            self.assertLess(error.steps, 10 * UVSim.LOOP_CHECK_INTERVAL)
+            self.assertEqual(error.cycle_steps % 8, 0) # Flip takes 4 instructions, so the period is 8
+            self.assertFalse(self.sim.is_running)
+        self.assertIn("infinite loop detected", sys.stderr.getvalue())
+
+    def test_loop_detection_does_not_flag_terminating_program(self):
+        self.assertTrue(self.sim.load_program_from_lines(self.SUM_LOOP_PROGRAM))
+        self.sim.detect_loops = True
+        self.sim.run_fast()
+        self.assertIsNone(self.sim.last_error)
+        self.assertEqual(self.mock_output_values, [5050])
+
+    def test_loop_detection_restarts_after_read(self):
+        self.mock_input_values = [7] * 20000 # READ 002, BRANCH 000: same state each pass, but fed by input
+        self.assertTrue(self.sim.load_program_from_lines(["+010002", "+040000"]))
+        self.sim.run_fast(max_steps=15000, detect_loops=True)
+        self.assertIsInstance(self.sim.last_error, BudgetExhaustedError)
+
+
+    # --- Test Breakpoints and Watchpoints ---
+    def test_breakpoint_stops_each_run_mode_and_resumes(self):
+        for run in ("run", "run_fast", "run_compiled"):
+            self.assertTrue(self.sim.load_program_from_lines(self.SUM_LOOP_PROGRAM))
+            self.sim.add_breakpoint(4) # STORE sum
+            getattr(self.sim, run)()
+            self.assertEqual(self.sim.break_event, BreakEvent("breakpoint", 4, 4, None, None))
+            self.assertEqual((self.sim.program_counter, self.sim.accumulator, self.sim.memory[12]), (4, 100, 0))
+            getattr(self.sim, run)() # Resuming runs the STORE, then stops at the next pass
+            self.assertEqual((self.sim.program_counter, self.sim.memory[12]), (4, 100))
+            self.sim.remove_breakpoint(4)
+            getattr(self.sim, run)()
+            self.assertIsNone(self.sim.break_event)
+            self.assertEqual(self.sim.memory[12], 5050)
+
+    def test_conditional_breakpoint_compiled_once(self):
+        self.assertTrue(self.sim.load_program_from_lines(self.SUM_LOOP_PROGRAM))
+        self.sim.add_breakpoint(1, "acc == 3 and memory[12] > 0")
+        self.sim.run_fast()
+        self.assertEqual(self.sim.program_counter, 1)
+        self.assertEqual(self.sim.accumulator, 3)
+        with self.assertRaises(ValueError):
+            self.sim.add_breakpoint(1, "acc <")
+
+    def test_watchpoints(self):
+        self.assertTrue(self.sim.load_program_from_lines(self.SUM_LOOP_PROGRAM))
+        self.sim.add_watchpoint(12, "change")
+        self.sim.run_compiled()
+        self.assertEqual(self.sim.break_event, BreakEvent("change", 12, 4, 0, 100))
+        self.assertEqual(self.sim.program_counter, 5) # Stops after the STORE
+        self.sim.remove_watchpoint(12)
+        self.sim.add_watchpoint(13, "read")
+        self.sim.run_fast()
+        self.assertEqual(self.sim.break_event, BreakEvent("read", 13, 6, 1, 1))
+        self.sim.clear_breakpoints()
+        self.sim.run_fast()
+        self.assertEqual(self.mock_output_values, [5050])
+        with self.assertRaises(ValueError):
+            self.sim.add_watchpoint(12, "execute")
+
+    # --- Test Time-Travel Debugging ---
+    def _record_states(self):
+        """Steps the loaded program to the end, returning (acc, pc, memory) before each step."""
+        states = []
+        while True:
+            states.append((self.sim.accumulator, self.sim.program_counter, list(self.sim.memory)))
+            if not self.sim.step():
+                return states
+
+    def _state(self):
+        return (self.sim.accumulator, self.sim.program_counter, list(self.sim.memory))
+
+    def test_step_back_restores_every_earlier_state(self):
+        self.sim.enable_history(snapshot_interval=50)
+        self.assertTrue(self.sim.load_program_from_lines(self.SUM_LOOP_PROGRAM))
+        states = self._record_states()
+        self.assertEqual(self.sim.history_length(), len(states))
+        for expected in reversed(states[-30:]):
+            self.assertEqual(self.sim.step_back(), 1)
+            self.assertEqual(self._state(), expected)
+        self.assertEqual(self.sim.step_back(500), 500) # Long jump goes through a snapshot
+        self.assertEqual(self._state(), states[-530])
+        self.assertEqual(self.sim.step_back(10000), len(states) - 530)
+        self.assertEqual(self._state(), states[0])
+        self.assertEqual(self.sim.step_back(), 0)
+
+    def test_run_forward_again_after_step_back(self):
+        self.sim.enable_history()
+        self.assertTrue(self.sim.load_program_from_lines(self.SUM_LOOP_PROGRAM))
+        self.sim.run_fast()
+        final = self._state()
+        self.assertTrue(self.sim.run_back_to(4)) # Last STORE sum
+        self.assertEqual(self.sim.program_counter, 4)
+        self.assertEqual(self.sim.memory[12], 5049)
+        self.sim.run_compiled()
+        self.assertEqual(self._state(), final)
+        self.assertEqual(self.mock_output_values, [5050, 5050])
+        self.assertFalse(self.sim.run_back_to(200))
+
+    def test_step_back_undoes_self_modifying_store(self):
+        self.sim.enable_history()
+        program = ["+020005", "+021002", "+043000", "+043000", "+000000", "+011006", "+000777"]
+        self.assertTrue(self.sim.load_program_from_lines(program))
+        self.sim.run()
+        self.assertEqual(self.mock_output_values, [777])
+        self.sim.step_back(3) # Before the STORE that rewrote address 002
+        self.assertEqual(self.sim.memory[2], 43000)
+        self.sim.disable_history()
+        self.sim.program_counter = 2
+        self.sim.run_fast()
+        self.assertEqual(self.mock_output_values, [777]) # The original HALT runs from the decode cache
+
+    # --- Test Suspendable Execution ---
+    # READ 020, READ 021, LOAD 020, ADD 021, STORE 022, WRITE 022, HALT
+    ADD_INPUTS_PROGRAM = ["+010020", "+010021", "+020020", "+030021", "+021022", "+011022", "+043000"]
+
+    def test_run_until_input_pauses_at_read(self):
+        self.assertTrue(self.sim.load_program_from_lines(self.ADD_INPUTS_PROGRAM))
+        self.assertTrue(self.sim.run_until_input())
+        self.assertEqual(self.sim.program_counter, 0)
+        self.sim.provide_input(3)
+        self.assertTrue(self.sim.run_until_input())
+        self.assertEqual((self.sim.program_counter, self.sim.memory[20]), (1, 3))
+        self.sim.provide_input(4)
+        self.assertFalse(self.sim.run_until_input())
+        self.assertFalse(self.sim.awaiting_input)
+        self.assertEqual(self.mock_output_values, [7])
+        self.assertEqual(self.mock_input_values, []) # io_read was never called
+        self.assertEqual(self.sim.io_read, self.mock_read)
+
+    def test_queued_input_is_used_without_pausing(self):
+        self.assertTrue(self.sim.load_program_from_lines(self.ADD_INPUTS_PROGRAM))
+        self.sim.provide_input(10)
+        self.sim.provide_input(-2)
+        self.assertFalse(self.sim.run_until_input())
+        self.assertEqual(self.mock_output_values, [8])
+
+    def test_events_generator(self):
+        self.assertTrue(self.sim.load_program_from_lines(self.ADD_INPUTS_PROGRAM))
+        events = self.sim.events()
+        self.assertEqual(next(events), NeedInput(0, 20))
+        self.assertEqual(events.send(5), NeedInput(1, 21))
+        self.assertEqual(events.send(6), Output(5, 11))
+        with self.assertRaises(StopIteration):
+            next(events)
+        self.assertEqual(self.mock_output_values, []) # Outputs went to the generator instead
+        self.assertIsNone(self.sim.last_error)
+
+        self.sim.reset()
+        self.assertTrue(self.sim.load_program_from_lines(self.ADD_INPUTS_PROGRAM))
+        events = self.sim.events()
+        next(events)
+        with self.assertRaises(ValueError):
+            next(events)
+
+    # --- Test Snapshots ---
+    def test_snapshot_fans_out_from_shared_prefix(self):
+        self.assertTrue(self.sim.load_program_from_lines(self.ADD_INPUTS_PROGRAM))
+        self.sim.provide_input(100)
+        self.assertTrue(self.sim.run_until_input()) # Paused at the second READ
+        blob = self.sim.snapshot()
+        self.assertEqual(len(blob), UVSim.SNAPSHOT_SIZE)
+        for second in (1, -5, 900):
+            child = UVSim(io_write_func=self.mock_write)
+            child.restore(blob)
+            self.assertEqual((child.program_counter, child.memory[20]), (1, 100))
+            child.provide_input(second)
+            self.assertFalse(child.run_until_input())
+        self.assertEqual(self.mock_output_values, [101, 95, 1000])
+
+    def test_restore_clears_decode_cache(self):
+        self.assertTrue(self.sim.load_program_from_lines(["+011002", "+043000", "+000007"]))
+        blob = self.sim.snapshot()
+        self.sim.memory[0] = 43000 # Direct write; the decode cache still says WRITE
+        self.sim.restore(self.sim.snapshot())
+        self.sim.run_fast()
+        self.assertEqual(self.mock_output_values, [])
+        self.sim.restore(blob)
+        self.sim.run_fast()
+        self.assertEqual(self.mock_output_values, [7])
+        with self.assertRaises(ValueError):
+            self.sim.restore(blob[:-1])
+        with self.assertRaises(ValueError):
+            self.sim.restore(b"XXXX" + blob[4:])
+
+    def test_restore_from_io_callback_during_run(self):
+        # sum += READ; WRITE sum; loop until the input runs out
+        program = ["+010020", "+020020", "+030021", "+021021", "+011021", "+040000"]
+        for run in ("run", "run_fast", "run_compiled"):
+            inputs = [1, 2, 3, 4, 5]
+            blobs = []
+            def read():
+                if not inputs:
+                    raise EOFError("No more input.")
+                if len(inputs) == 5:
+                    blobs.append(self.sim.snapshot()) # At the first READ, before the sum changes
+                elif len(inputs) == 3:
+                    self.sim.restore(blobs[0]) # Back to a zero sum
+                return inputs.pop(0)
+            self.mock_output_values.clear()
+            self.sim.io_read = read
+            self.assertTrue(self.sim.load_program_from_lines(program))
+            with patch('sys.stderr', new_callable=io.StringIO):
+                getattr(self.sim, run)()
+            self.assertEqual(self.mock_output_values, [1, 3, 3, 7, 12], run)
+            self.assertIsInstance(self.sim.last_error, EOFError, run)
+            self.assertEqual(self.sim.steps_executed, 30, run)
+
+    def test_traps_edited_from_io_callback_during_run(self):
+        program = ["+010020", "+020020", "+030021", "+021021", "+011021", "+040000"]
+        for run in ("run", "run_fast", "run_compiled"):
+            inputs = [1, 2, 3, 4]
+            def read():
+                if not inputs:
+                    raise EOFError("No more input.")
+                if len(inputs) == 3:
+                    self.sim.add_watchpoint(21, "write") # Second READ
+                elif len(inputs) == 2:
+                    self.sim.clear_breakpoints() # Third READ, after resuming
+                return inputs.pop(0)
+            self.mock_output_values.clear()
+            self.sim.io_read = read
+            self.assertTrue(self.sim.load_program_from_lines(program))
+            getattr(self.sim, run)()
+            self.assertEqual(self.sim.break_event, BreakEvent("write", 21, 3, 1, 3), run)
+            self.assertIsNone(self.sim.last_error, run)
+            with patch('sys.stderr', new_callable=io.StringIO):
+                getattr(self.sim, run)()
+            self.assertIsNone(self.sim.break_event, run)
+            self.assertIsInstance(self.sim.last_error, EOFError, run)
+            self.assertEqual(self.mock_output_values, [1, 3, 6, 10], run)
+
+    # --- Test Copy-on-Write Forks ---
+    def test_forks_share_unwritten_pages(self):
+        self.assertTrue(self.sim.load_program_from_lines(self.ADD_INPUTS_PROGRAM))
+        self.sim.provide_input(100)
+        self.assertTrue(self.sim.run_until_input()) # Paused at the second READ
+        forks = [self.sim.fork() for _ in range(3)]
+        for fork, second in zip(forks, (1, -5, 900)):
+            self.assertEqual((fork.program_counter, fork.memory[20]), (1, 100))
+            fork.provide_input(second)
+            self.assertFalse(fork.run_until_input())
+        self.assertEqual(self.mock_output_values, [101, 95, 1000])
+        self.assertEqual(self.sim.memory[21], 0) # The parent is untouched
+        self.assertEqual(forks[0].memory[22], 101)
+        for fork in forks:
+            changed = [index for index, (page, parent_page) in enumerate(zip(fork.memory.pages, self.sim.memory.pages))
+                       if page is not parent_page]
+            self.assertEqual(changed, [2]) # Only the page holding 020-029 was copied
+
+    def test_fork_steps_and_writes_without_running(self):
+        self.assertTrue(self.sim.load_program_from_lines(["+020005", "+030005", "+021005", "+043000", "+000000", "+000004"]))
+        fork = self.sim.fork()
+        self.assertIsInstance(fork.memory, CowMemory)
+        while fork.step():
+            pass
+        self.assertEqual(fork.memory[5], 8)
+        self.assertEqual(self.sim.memory[5], 4)
+        fork.memory[0] = 43000 # Direct write to a shared page copies it
+        self.assertEqual((fork.memory[0], self.sim.memory[0]), (43000, 20005))
+        self.sim.run_compiled()
+        self.assertEqual(self.sim.memory[5], 8)
+        self.assertIsNone(self.sim.last_error)
+
+    # --- Test Instance Pool ---
+    def test_pool_reuses_reset_instances(self):
+        pool = UVSimPool()
+        sim = pool.acquire(self.mock_read, self.mock_write)
+        self.assertTrue(sim.load_program_from_lines(["+011002", "+043000", "+000007"]))
+        sim.add_breakpoint(1)
+        sim.enable_history()
+        sim.max_steps = 10
+        sim.run()
+        self.assertEqual(sim.break_event.address, 1)
+        pool.release(sim)
+        self.assertEqual(len(pool), 1)
+
+        again = pool.acquire(io_write_func=self.mock_write)
+        self.assertIs(again, sim)
+        self.assertEqual(len(pool), 0)
+        self.assertEqual(list(again.memory), [0] * UVSim.MEMORY_SIZE)
+        self.assertEqual((again.accumulator, again.program_counter, again.max_steps), (0, 0, None))
+        self.assertEqual(again.history_length(), 0)
+        self.assertEqual(again.io_read, UVSim._default_read)
+        self.assertTrue(again.load_program_from_lines(["+011002", "+043000", "+000007"]))
+        again.run()
+        self.assertIsNone(again.break_event)
+        self.assertEqual(self.mock_output_values, [7, 7])
+
+    def test_pool_release_rules_and_slots(self):
+        pool = UVSimPool(max_size=1)
+        fork = self.sim.fork()
+        pool.release(fork)
+        self.assertNotIsInstance(pool.acquire().memory, CowMemory) # Shared pages are not kept
+        self.sim.is_running = True
+        with self.assertRaises(RuntimeError):
+            pool.release(self.sim)
+        with self.assertRaises(AttributeError):
+            self.sim.unexpected_attribute = 1 # __slots__: no per-instance dict
+
+    # --- Test Buffered Output ---
+    def test_output_sink_flushes_by_size_and_at_halt(self):
+        batches = []
+        # Writes 1..25: LOAD i, WRITE i, ADD one, STORE i, SUBTRACT end, BRANCHNEG 000, HALT
+        program = ["+020010", "+011010", "+030011", "+021010", "+031012", "+041000", "+043000",
+                   "+000000", "+000000", "+000000", "+000001", "+000001", "+000026"]
+        for run in ("run", "run_fast", "run_compiled"):
+            batches.clear()
+            self.sim.io_write = OutputSink(batches.append, size=10)
+            self.assertTrue(self.sim.load_program_from_lines(program))
+            self.sim.memory[10] = 1
+            getattr(self.sim, run)()
+            self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+            self.assertEqual(sum(batches, []), list(range(1, 26)))
+
+    def test_output_sink_flushes_before_read(self):
+        log = []
+        self.sim.io_write = OutputSink(lambda values: log.append(("out", values)), size=100)
+        self.sim.io_read = lambda: log.append("read") or 5
+        # WRITE 010, READ 010, WRITE 010, HALT
+        self.assertTrue(self.sim.load_program_from_lines(["+011010", "+010010", "+011010", "+043000"]))
+        self.sim.run_fast()
+        self.assertEqual(log, [("out", [0]), "read", ("out", [5])])
+
+    def test_output_sink_interval(self):
+        batches = []
+        sink = OutputSink(batches.append, size=1000, interval=0.0)
+        sink(1)
+        sink(2)
+        self.assertEqual(batches, [[1], [2]])
+        self.assertEqual(len(sink), 0)
+        with self.assertRaises(ValueError):
+            OutputSink(batches.append, size=0)
+
+
 # --- Tests for Porting Logic (Now uses static UVSim.port_4_to_6) ---
 class TestPortingLogic(unittest.TestCase):
     """Unit tests for the static UVSim.port_4_to_6 method."""
@@ -594,6 +1151,443 @@ class TestPortingLogic(unittest.TestCase):
             UVSim.port_4_to_6(lines_bad_char)
 
 
+# --- Tests for the BasicML-to-Python Transpiler ---
+class TestTranspiler(unittest.TestCase):
+    """Unit tests for uvsim_transpiler.transpile and the generated modules."""
+
+    def setUp(self):
+        self.held_stderr = sys.stderr
+        sys.stderr = io.StringIO()
+        self.outputs = []
+
+    def tearDown(self):
+        sys.stderr = self.held_stderr
+
+    def _run_transpiled(self, program, inputs=()):
+        namespace = {"__name__": "transpiled_program"}
+        exec(compile(uvsim_transpiler.transpile(program), "<transpiled>", "exec"), namespace)
+        pending = list(inputs)
+        return namespace["run"](io_read=lambda: pending.pop(0), io_write=self.outputs.append)
+
+    def test_transpiled_loop_matches_interpreter(self):
+        acc, pc, memory = self._run_transpiled(TestUVSimCore.SUM_LOOP_PROGRAM)
+        self.assertEqual(self.outputs, [5050])
+        self.assertEqual((acc, pc, memory[12]), (0, 10, 5050))
+
+    def test_transpiled_4_digit_program_is_ported(self):
+        program = ["+1007", "+1008", "+2007", "+3008", "+2109", "+1109", "+4300"]
+        acc, pc, memory = self._run_transpiled(program, inputs=[5, 7])
+        self.assertEqual(self.outputs, [12])
+        self.assertEqual(pc, 6)
+
+    def test_self_modifying_write_falls_back_to_interpreter(self):
+        program = ["+020005", "+021002", "+043000", "+043000", "+000000", "+011006", "+000777"]
+        acc, pc, memory = self._run_transpiled(program)
+        self.assertEqual(self.outputs, [777])
+        self.assertEqual(pc, 3)
+
+    def test_runtime_error_reported_by_interpreter(self):
+        program = ["+020002", "+032003", "+000010", "+000000"] # Division by zero at 001
+        acc, pc, memory = self._run_transpiled(program)
+        self.assertEqual((acc, pc), (10, 1))
+        self.assertIn("Runtime Error at address 001 (Instruction: +032003): Division by zero", sys.stderr.getvalue())
+
+    def test_running_off_memory_reported_like_interpreter(self):
+        # LOAD 100, then BRANCH 247 into a straight run whose last word falls through to 250
+        for last_words in ((20100, 30100, 21101), (20100, 11100, 42000), (20100, 30100, 11101)):
+            words = {0: 20100, 1: 40247, 100: 7}
+            words.update(zip((247, 248, 249), last_words))
+            program = [f"+{words.get(address, 0):06d}" for address in range(UVSim.MEMORY_SIZE)]
+            sys.stderr = io.StringIO()
+            self.outputs.clear()
+            result = self._run_transpiled(program), list(self.outputs), sys.stderr.getvalue()
+
+            sys.stderr = io.StringIO()
+            self.outputs.clear()
+            sim = UVSim(io_write_func=self.outputs.append)
+            self.assertTrue(sim.load_program_from_lines(program))
+            sim.run()
+            expected = (sim.accumulator, sim.program_counter, list(sim.memory)), list(self.outputs), sys.stderr.getvalue()
+            self.assertEqual(result, expected)
+            self.assertIn("Branch to invalid address 250 from instruction at 249", result[2])
+
+    def test_disassemble_word(self):
+        self.assertEqual(UVSim.disassemble_word(20005), "LOAD 005")
+        self.assertEqual(UVSim.disassemble_word(43000), "HALT")
+        self.assertEqual(UVSim.disassemble_word(-12), "DATA -000012")
+        self.assertEqual(UVSim.disassemble_word(55000), "DATA +055000")
+
+
+# --- Tests for the Profiler ---
+class TestProfiler(unittest.TestCase):
+    """Unit tests for uvsim_profiler.Profiler."""
+
+    def setUp(self):
+        self.outputs = []
+        self.sim = UVSim(io_read_func=lambda: 0, io_write_func=self.outputs.append)
+        self.assertTrue(self.sim.load_program_from_lines(TestUVSimCore.SUM_LOOP_PROGRAM))
+        self.profiler = uvsim_profiler.Profiler(self.sim)
+
+    def test_counts_match_sum_loop(self):
+        self.profiler.run()
+        self.assertEqual(self.outputs, [5050])
+        self.assertEqual(sum(self.profiler.address_counts), self.sim.steps_executed)
+        self.assertEqual(self.profiler.address_counts[:11], [101, 101, 100, 100, 100, 100, 100, 100, 100, 1, 1])
+        self.assertEqual(self.profiler.opcode_counts[UVSim.LOAD], 301)
+        self.assertEqual((self.profiler.branch_taken[1], self.profiler.branch_not_taken[1]), (1, 100))
+        self.assertEqual(self.profiler.branch_taken[8], 100)
+        self.assertEqual((self.profiler.memory_reads[11], self.profiler.memory_writes[11]), (301, 100))
+        self.assertEqual(self.profiler.hottest(2), [(0, 101), (1, 101)])
+
+    def test_exports(self):
+        self.profiler.run()
+        data = json.loads(self.profiler.to_json())
+        self.assertEqual(data["instructions"], 904)
+        self.assertEqual(data["addresses"]["001"], {"count": 101, "instruction": "BRANCHZERO 009"})
+        self.assertEqual(data["branches"]["001"], {"taken": 1, "not_taken": 100})
+        self.assertEqual(data["memory"]["012"], {"reads": 101, "writes": 100})
+        report = self.profiler.report(top=3)
+        self.assertIn("Instructions executed: 904", report)
+        self.assertIn("BRANCHZERO 009", report)
+        self.assertIn("taken 1, not taken 100", report)
+
+    def test_faulting_instruction_not_counted(self):
+        self.sim.load_program_from_lines(["+020002", "+032003", "+000010", "+000000"]) # DIVIDE by zero
+        with patch('sys.stderr', new_callable=io.StringIO):
+            self.profiler.run()
+        self.assertIsInstance(self.sim.last_error, ZeroDivisionError)
+        self.assertEqual(self.profiler.address_counts[:2], [1, 0])
+        self.assertEqual(self.sim.program_counter, 1)
+
+
+# --- Tests for Execution Tracing ---
+class TestTrace(unittest.TestCase):
+    """Unit tests for uvsim_trace ring buffer, tracer and binary files."""
+
+    def setUp(self):
+        self.sim = UVSim(io_read_func=lambda: 42, io_write_func=lambda value: None)
+
+    def test_trace_records_steps_and_writes(self):
+        self.assertTrue(self.sim.load_program_from_lines(["+010005", "+020005", "+030005", "+021006", "+043000"]))
+        tracer = uvsim_trace.Tracer(self.sim, capacity=10)
+        tracer.run()
+        self.assertEqual(list(tracer.buffer.records()), [
+            uvsim_trace.TraceRecord(0, 0, 10005, 0, 5, 42),
+            uvsim_trace.TraceRecord(1, 1, 20005, 42, -1, 0),
+            uvsim_trace.TraceRecord(2, 2, 30005, 84, -1, 0),
+            uvsim_trace.TraceRecord(3, 3, 21006, 84, 6, 84),
+            uvsim_trace.TraceRecord(4, 4, 43000, 84, -1, 0),
+        ])
+
+    def test_ring_buffer_keeps_last_steps_and_round_trips_file(self):
+        self.assertTrue(self.sim.load_program_from_lines(TestUVSimCore.SUM_LOOP_PROGRAM))
+        tracer = uvsim_trace.Tracer(self.sim, capacity=100)
+        tracer.run()
+        records = list(tracer.buffer.records())
+        self.assertEqual(len(records), 100)
+        self.assertEqual(tracer.buffer.total, self.sim.steps_executed)
+        self.assertEqual(records[0].step, self.sim.steps_executed - 100)
+        self.assertEqual(records[-1].pc, 10) # HALT is the last step
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "run.uvtrace")
+            tracer.dump(path)
+            self.assertEqual(list(uvsim_trace.read_trace(path)), records)
+            with open(path, 'r+b') as f:
+                f.truncate(os.path.getsize(path) - 1)
+            with self.assertRaises(ValueError):
+                list(uvsim_trace.read_trace(path))
+
+
+# --- Tests for the Batch Executor ---
+# --- Tests for the asyncio Runner ---
+class TestAsyncUVSim(unittest.TestCase):
+    """Unit tests for uvsim_async.AsyncUVSim."""
+
+    def setUp(self):
+        self.held_stderr = sys.stderr
+        sys.stderr = io.StringIO()
+
+    def tearDown(self):
+        sys.stderr = self.held_stderr
+
+    def test_sessions_share_one_loop_with_async_io(self):
+        async def session(values):
+            inputs, outputs = asyncio.Queue(), []
+            async def write(value):
+                outputs.append(value)
+            sim = uvsim_async.AsyncUVSim(io_read_func=inputs.get, io_write_func=write)
+            self.assertTrue(sim.load_program_from_lines(TestUVSimCore.ADD_INPUTS_PROGRAM))
+            task = asyncio.create_task(sim.run())
+            for value in values:
+                await asyncio.sleep(0)
+                await inputs.put(value)
+            await task
+            return outputs, sim.last_error
+
+        async def main():
+            return await asyncio.gather(*(session([n, 10 * n]) for n in range(50)))
+
+        for n, (outputs, error) in enumerate(asyncio.run(main())):
+            self.assertEqual(outputs, [11 * n])
+            self.assertIsNone(error)
+
+    def test_long_run_yields_to_event_loop(self):
+        ticks = []
+        async def ticker():
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0)
+
+        async def main():
+            sim = uvsim_async.AsyncUVSim(io_write_func=lambda value: None, yield_interval=1000)
+            sim.load_program_from_lines(["+040000"]) # Endless BRANCH 000
+            task = asyncio.create_task(ticker())
+            await sim.run(max_steps=20000)
+            task.cancel()
+            return sim
+
+        sim = asyncio.run(main())
+        self.assertIsInstance(sim.last_error, BudgetExhaustedError)
+        self.assertEqual(sim.steps_executed, 20000)
+        self.assertGreaterEqual(len(ticks), 19)
+
+    def test_time_limit_covers_waiting_for_input(self):
+        async def main():
+            sim = uvsim_async.AsyncUVSim(io_read_func=asyncio.Event().wait)
+            sim.load_program_from_lines(TestUVSimCore.ADD_INPUTS_PROGRAM)
+            await sim.run(time_limit=0.05)
+            return sim
+
+        sim = asyncio.run(main())
+        self.assertIsInstance(sim.last_error, BudgetExhaustedError)
+        self.assertEqual((sim.last_error.reason, sim.program_counter), ("time", 0))
+
+    def test_io_error_ends_run(self):
+        async def failing_read():
+            raise ConnectionError("input stream closed")
+
+        sim = uvsim_async.AsyncUVSim(io_read_func=failing_read)
+        sim.load_program_from_lines(TestUVSimCore.ADD_INPUTS_PROGRAM)
+        asyncio.run(sim.run())
+        self.assertIsInstance(sim.last_error, ConnectionError)
+        self.assertIn("I/O Error at address 000: input stream closed", sys.stderr.getvalue())
+        self.assertFalse(sim.is_running)
+
+
+class TestBatch(unittest.TestCase):
+    """Unit tests for uvsim_batch task building and execution."""
+
+    ADD_TWO_INPUTS = ["+010007", "+010008", "+020007", "+030008", "+021009", "+011009", "+043000"]
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self._write("b_add.bml", self.ADD_TWO_INPUTS)
+        self._write("a_add_4digit.txt", ["+1007", "+1008", "+2007", "+3008", "+2109", "+1109", "+4300"])
+        self._write("notes.md", ["not a program"])
+
+    def _write(self, name, lines):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines))
+        return path
+
+    def test_discover_programs_sorted_by_name(self):
+        names = [os.path.basename(path) for path in uvsim_batch.discover_programs(self.temp_dir.name)]
+        self.assertEqual(names, ["a_add_4digit.txt", "b_add.bml"])
+
+    def test_run_batch_in_process_and_pool_match(self):
+        programs = uvsim_batch.discover_programs(self.temp_dir.name)
+        tasks = uvsim_batch.build_tasks(programs, [[1, 2], [999999, 1], [5]])
+        serial = uvsim_batch.run_batch(tasks, workers=1)
+        pooled = uvsim_batch.run_batch(tasks, workers=2, chunksize=2)
+        self.assertEqual(serial, pooled)
+        self.assertEqual([(r.status, r.outputs) for r in serial[:3]],
+                         [("halted", (3,)), ("error", ()), ("error", ())])
+        self.assertIn("OverflowError", serial[1].error)
+        self.assertIn("Input exhausted", serial[2].error)
+
+    def test_budget_exhausted_status(self):
+        endless = self._write("endless.bml", ["+040000"])
+        result, = uvsim_batch.run_batch(uvsim_batch.build_tasks([endless]), workers=1, max_steps=500)
+        self.assertEqual((result.status, result.steps, result.program_counter), ("budget_exhausted", 500, 0))
+        self.assertIn("BudgetExhaustedError", result.error)
+        result, = uvsim_batch.run_batch(uvsim_batch.build_tasks([endless]), workers=1, detect_loops=True)
+        self.assertEqual(result.status, "infinite_loop")
+
+    def test_manifest_and_load_errors(self):
+        bad = self._write("bad.bml", ["+12"])
+        manifest = os.path.join(self.temp_dir.name, "manifest.json")
+        with open(manifest, 'w', encoding='utf-8') as f:
+            json.dump([{"program": "b_add.bml", "inputs": [[4, 5]]}, {"program": "bad.bml"}], f)
+        results = uvsim_batch.run_batch(uvsim_batch.load_manifest(manifest), workers=1)
+        self.assertEqual(results[0].outputs, (9,))
+        self.assertEqual(results[1].program, bad)
+        self.assertEqual(results[1].status, "load_error")
+
+    def test_cli_run_ports_4_digit_and_reports_json(self):
+        programs = uvsim_batch.discover_programs(self.temp_dir.name)
+        inputs = self._write("inputs.txt", ["2, 3", "", "40"])
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            exit_code = uvsim_cli.main(["run", *programs, "--input-file", inputs, "--json"])
+        self.assertEqual(exit_code, 0)
+        records = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([(r["status"], r["outputs"], r["steps"]) for r in records],
+                         [("halted", [5], 7), ("halted", [5], 7)])
+        self.assertIn("seconds", records[0])
+
+    def test_cli_run_text_output_and_exit_code(self):
+        endless = self._write("endless.bml", ["+011003", "+040001", "+043000", "+000042"])
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout, \
+             patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            exit_code = uvsim_cli.main(["run", endless, "--input", "", "--max-steps", "10"])
+        self.assertEqual(exit_code, 2)
+        self.assertEqual(stdout.getvalue(), "42\n")
+        self.assertIn("budget_exhausted", stderr.getvalue())
+
+    def test_cli_run_reads_stdin_only_when_asked(self):
+        program = self._write("echo.bml", ["+011005", "+010005", "+011005", "+043000"]) # WRITE, READ, WRITE
+        stdin = MagicMock(isatty=MagicMock(return_value=False), read=MagicMock(return_value="7"))
+        with patch('sys.stdin', stdin), patch('sys.stdout', new_callable=io.StringIO) as stdout, \
+             patch('sys.stderr', new_callable=io.StringIO):
+            self.assertEqual(uvsim_cli.main(["run", program]), 2) # An open pipe is not read
+            stdin.read.assert_not_called()
+            self.assertEqual(uvsim_cli.main(["run", program, "--input-file", "-"]), 0)
+        self.assertEqual(stdout.getvalue(), "0\n0\n7\n")
+
+    def test_result_cache_keys_lru_and_age(self):
+        words = [10007, 43000, 0, 0]
+        key = uvsim_result_cache.run_key(words, [1, 2])
+        self.assertEqual(key, uvsim_result_cache.run_key(words[:2], (1, 2))) # Trailing zeros ignored
+        self.assertNotEqual(key, uvsim_result_cache.run_key(words, [1, 3]))
+        self.assertNotEqual(key, uvsim_result_cache.run_key(words, [1, 2], max_steps=100))
+
+        run = uvsim_result_cache.CachedRun("halted", (3,), 3, 6, 7, None)
+        with patch('uvsim_result_cache.time.time', return_value=1000.0) as clock:
+            cache = uvsim_result_cache.ResultCache(max_entries=2, max_age=60)
+            for name in ("a", "b", "c"):
+                cache.put(name, run)
+            self.assertIsNone(cache.get("a")) # Least recently used, evicted
+            self.assertEqual(cache.get("b"), run)
+            clock.return_value = 1061.0
+            self.assertIsNone(cache.get("c")) # Expired
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_result_cache_answers_repeated_batch_and_cli_runs(self):
+        programs = uvsim_batch.discover_programs(self.temp_dir.name)
+        tasks = uvsim_batch.build_tasks(programs, [[1, 2], [5]])
+        path = os.path.join(self.temp_dir.name, "results.sqlite")
+        with uvsim_result_cache.ResultCache(path=path) as cache:
+            first = uvsim_batch.run_batch(tasks, workers=2, chunksize=1, cache=cache)
+            self.assertEqual(cache.misses, 2) # The 4-digit file ports to the same image, so it runs once
+        with uvsim_result_cache.ResultCache(path=path) as cache:
+            self.assertEqual(uvsim_batch.run_batch(tasks, workers=1, cache=cache), first)
+            self.assertEqual((cache.hits, cache.misses), (4, 0))
+        self.assertEqual(first, uvsim_batch.run_batch(tasks, workers=1))
+
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            exit_code = uvsim_cli.main(["run", programs[0], "--input", "2,3", "--json", "--cache", path])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(json.loads(stdout.getvalue())["outputs"], [5])
+
+    def test_batch_picks_up_edited_program_between_runs(self):
+        source = os.path.join(self.temp_dir.name, "b_add.bml")
+        tasks = uvsim_batch.build_tasks([source], [[1, 2]])
+        cache = uvsim_result_cache.ResultCache()
+        self.assertEqual(uvsim_batch.run_batch(tasks, workers=1, cache=cache)[0].outputs, (3,))
+        self._write("b_add.bml", ["+010007", "+011007", "+043000"]) # Now echoes the first input
+        self.assertEqual(uvsim_batch.run_batch(tasks, workers=1, cache=cache)[0].outputs, (1,))
+        self.assertEqual(uvsim_batch.run_task(tasks[0], UVSim()).outputs, (1,))
+
+    def test_image_cache_skips_parsing_unchanged_files(self):
+        source = os.path.join(self.temp_dir.name, "a_add_4digit.txt")
+        words = uvsim_image_cache.load_image(source)
+        self.assertEqual(words, [10007, 10008, 20007, 30008, 21009, 11009, 43000])
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir.name, "__bmlcache__", "a_add_4digit.txt.img")))
+        with patch('uvsim_image_cache.parse_image', side_effect=AssertionError("parsed")):
+            self.assertEqual(uvsim_image_cache.load_image(source), words)
+            stat = os.stat(source)
+            os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9)) # Touched, same bytes
+            self.assertEqual(uvsim_image_cache.load_image(source), words)
+
+        self._write("a_add_4digit.txt", ["+1007", "+1107", "+4300"])
+        self.assertEqual(uvsim_image_cache.load_image(source), [10007, 11007, 43000])
+        outputs = []
+        sim = UVSim(io_read_func=lambda: 4, io_write_func=outputs.append)
+        uvsim_image_cache.load_program_file(sim, source)
+        sim.run()
+        self.assertEqual(outputs, [4])
+
+    def test_image_cache_ignores_bad_cache_files_and_programs(self):
+        source = self._write("bad.bml", ["+010007", "hello"])
+        with self.assertRaises(ValueError):
+            uvsim_image_cache.load_image(source)
+        self.assertFalse(os.path.exists(uvsim_image_cache.cache_path(source)))
+
+        source = os.path.join(self.temp_dir.name, "b_add.bml")
+        words = uvsim_image_cache.load_image(source)
+        with open(uvsim_image_cache.cache_path(source), 'r+b') as f:
+            f.write(b"XXXX") # Corrupt the magic
+        self.assertEqual(uvsim_image_cache.load_image(source), words)
+        self.assertEqual(uvsim_image_cache.load_image(source, use_cache=False), words)
+
+
+# --- Tests for the NumPy Lockstep Engine ---
+@unittest.skipIf(uvsim_vector is None, "NumPy is not installed.")
+class TestVectorUVSim(unittest.TestCase):
+    """Checks that each lane of VectorUVSim matches a separate UVSim run."""
+
+    def _interpreter_result(self, program, inputs):
+        outputs = []
+        pending = list(inputs)
+        def read():
+            if not pending:
+                raise EOFError("No more input.")
+            return pending.pop(0)
+        sim = UVSim(io_read_func=read, io_write_func=outputs.append)
+        sim.load_program_from_lines(program)
+        held_stderr, sys.stderr = sys.stderr, io.StringIO()
+        try:
+            sim.run()
+        finally:
+            sys.stderr = held_stderr
+        return outputs, sim.accumulator, sim.program_counter
+
+    def test_lanes_match_interpreter(self):
+        program = ["+010099", # READ n into 099
+                   "+020099", # LOAD n
+                   "+042010", # BRANCHZERO 010
+                   "+020098", # LOAD sum
+                   "+030099", # ADD n
+                   "+021098", # STORE sum
+                   "+020099", # LOAD n
+                   "+031097", # SUBTRACT one
+                   "+021099", # STORE n
+                   "+040001", # BRANCH 001
+                   "+011098", # WRITE sum
+                   "+043000"] # HALT
+        program += ["+000000"] * (97 - len(program)) + ["+000001"]
+        input_sets = [[10], [100], [0], [2000], []] # 2000 overflows, [] runs out of input
+        engine = uvsim_vector.VectorUVSim(program, input_sets)
+        engine.run()
+        for lane, inputs in enumerate(input_sets):
+            outputs, acc, pc = self._interpreter_result(program, inputs)
+            self.assertEqual(engine.outputs(lane), outputs)
+            self.assertEqual(int(engine.accumulator[lane]), acc)
+            self.assertEqual(int(engine.program_counter[lane]), pc)
+        self.assertEqual([engine.status_name(lane) for lane in range(5)],
+                         ["halted", "halted", "halted", "overflow", "input_exhausted"])
+
+    def test_divide_by_zero_flags_only_its_lane(self):
+        program = ["+010010", "+010011", "+020010", "+032011", "+021012", "+011012", "+043000"]
+        engine = uvsim_vector.VectorUVSim(program, [[-7, 2], [9, 0]])
+        engine.run()
+        self.assertEqual(engine.outputs(0), [-3]) # Truncates toward zero like UVSim
+        self.assertEqual(engine.status_name(0), "halted")
+        self.assertEqual(engine.status_name(1), "divide_by_zero")
+        self.assertEqual(int(engine.program_counter[1]), 3)
+
+
 if __name__ == "__main__":
     # Discover and run tests
     unittest.main(verbosity=2)
@@ -0,0 +1,230 @@
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+from uvsim_core_logic import UVSim
+
+# Execution tracing for 6-digit BasicML programs. A Tracer drives the simulator one
+# step() at a time (like the profiler, so untraced runs are unaffected) and records
+# each completed instruction into a fixed-size ring buffer made of `array` columns,
+# so nothing is allocated per step and only the last `capacity` steps are kept.
+#
+# Binary trace file layout (little-endian):
+#   header: magic b"UVTRACE1", uint64 number of the first step in the file
+#   blocks: uint32 record count N, then the columns for N records:
+#           pc uint16[N], word int32[N], accumulator int32[N],
+#           write address int16[N] (-1 if none), write value int32[N]
+
+TRACE_MAGIC = b"UVTRACE1"
+_HEADER = struct.Struct("<8sQ")
+_BLOCK_COUNT = struct.Struct("<I")
+_BLOCK_RECORDS = 65536 # Records per block in a trace file
+
+# (name, bytes per item) per column, in file order. Typecodes are picked by size
+# because array item sizes are platform-dependent.
+_COLUMNS = (("pc", 2), ("word", 4), ("accumulator", 4), ("write_address", 2), ("write_value", 4))
+_TYPECODES = {2: "h", 4: next(code for code in "ilq" if array(code).itemsize == 4)}
+_TYPECODES_UNSIGNED = {2: "H"}
+
+# One traced step. `step` numbers instructions from 0 in the order they completed.
+TraceRecord = namedtuple("TraceRecord", "step pc word accumulator write_address write_value")
+
+# Opcodes that write their operand address
+_WRITES_MEMORY = (UVSim.READ, UVSim.STORE)
+
+
+def _new_column(name, size, length=0):
+    """Returns a zero-filled array for a trace column."""
+    typecode = _TYPECODES_UNSIGNED[size] if name == "pc" else _TYPECODES[size]
+    return array(typecode, bytes(size * length))
+
+
+class TraceBuffer:
+    """
+    Fixed-size ring buffer of trace records stored as parallel `array` columns.
+
+    Attributes:
+        capacity (int): Maximum number of records kept.
+        total (int): Records ever appended; the oldest kept record is step total - len(self).
+    """
+
+    def __init__(self, capacity=1000000):
+        if capacity < 1:
+            raise ValueError("Trace capacity must be at least 1.")
+        self.capacity = capacity
+        self.total = 0
+        self.pc, self.word, self.accumulator, self.write_address, self.write_value = (
+            _new_column(name, size, capacity) for name, size in _COLUMNS)
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, pc, word, accumulator, write_address=-1, write_value=0):
+        """Records one step, overwriting the oldest record once the buffer is full."""
+        slot = self.total % self.capacity
+        self.pc[slot] = pc
+        self.word[slot] = word
+        self.accumulator[slot] = accumulator
+        self.write_address[slot] = write_address
+        self.write_value[slot] = write_value
+        self.total += 1
+
+    def clear(self):
+        """Forgets all records (the columns are reused)."""
+        self.total = 0
+
+    def _ranges(self):
+        """Returns the (start, stop) slot ranges holding the records, oldest first."""
+        if self.total <= self.capacity:
+            return [(0, self.total)]
+        split = self.total % self.capacity
+        return [(split, self.capacity), (0, split)]
+
+    def records(self):
+        """Yields the kept records as TraceRecords, oldest first."""
+        step = self.total - len(self)
+        columns = (self.pc, self.word, self.accumulator, self.write_address, self.write_value)
+        for start, stop in self._ranges():
+            for values in zip(*(column[start:stop] for column in columns)):
+                yield TraceRecord(step, *values)
+                step += 1
+
+    def dump(self, path):
+        """
+        Writes the kept records to a binary trace file (see the layout above).
+
+        Args:
+            path (str): Destination file path.
+        """
+        columns = (self.pc, self.word, self.accumulator, self.write_address, self.write_value)
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(TRACE_MAGIC, self.total - len(self)))
+            for start, stop in self._ranges():
+                for block_start in range(start, stop, _BLOCK_RECORDS):
+                    block_stop = min(block_start + _BLOCK_RECORDS, stop)
+                    f.write(_BLOCK_COUNT.pack(block_stop - block_start))
+                    for column in columns:
+                        chunk = column[block_start:block_stop]
+                        if sys.byteorder == "big":
+                            chunk.byteswap()
+                        f.write(chunk.tobytes())
+
+
+def read_trace(path):
+    """
+    Streams the records of a binary trace file, one block in memory at a time.
+
+    Args:
+        path (str): Trace file written by TraceBuffer.dump().
+
+    Yields:
+        TraceRecord: The records in execution order.
+
+    Raises:
+        ValueError: If the file is not a trace file or is truncated.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(_HEADER.size)
+        if len(header) != _HEADER.size or header[:len(TRACE_MAGIC)] != TRACE_MAGIC:
+            raise ValueError(f"'{path}' is not a UVSim trace file.")
+        _, step = _HEADER.unpack(header)
+        while True:
+            count_bytes = f.read(_BLOCK_COUNT.size)
+            if not count_bytes:
+                return
+            if len(count_bytes) != _BLOCK_COUNT.size:
+                raise ValueError(f"Trace file '{path}' is truncated.")
+            count, = _BLOCK_COUNT.unpack(count_bytes)
+            columns = []
+            for name, size in _COLUMNS:
+                data = f.read(size * count)
+                if len(data) != size * count:
+                    raise ValueError(f"Trace file '{path}' is truncated.")
+                column = _new_column(name, size)
+                column.frombytes(data)
+                if sys.byteorder == "big":
+                    column.byteswap()
+                columns.append(column)
+            for values in zip(*columns):
+                yield TraceRecord(step, *values)
+                step += 1
+
+
+class Tracer:
+    """
+    Runs programs on a UVSim instance while recording every completed instruction.
+
+    Each record holds the PC, the instruction word, the accumulator after the
+    instruction, and the address/value written by STORE or READ (-1/0 otherwise).
+    An instruction that faults is not recorded, matching steps_executed.
+    """
+
+    def __init__(self, simulator, capacity=1000000):
+        """
+        Args:
+            simulator (UVSim): The simulator to trace. Load the program before calling run().
+            capacity (int, optional): Number of most recent steps to keep.
+        """
+        self.simulator = simulator
+        self.buffer = TraceBuffer(capacity)
+
+    def run(self, max_steps=None, time_limit=None, detect_loops=None):
+        """
+        Runs the loaded program until HALT, error, or the budget runs out, tracing each step.
+
+        Takes the same arguments as UVSim.run(); output, errors and final state are the same.
+        Records are appended to `buffer`, after any from earlier runs.
+        """
+        simulator = self.simulator
+        if not simulator._ready_to_run():
+            return
+        simulator._run_loop(self._trace_span, max_steps, time_limit, detect_loops)
+
+    def _trace_span(self, limit):
+        """Executes up to `limit` instructions with step(), recording each one. Returns True once the run ends."""
+        simulator = self.simulator
+        memory = simulator.memory
+        max_address = simulator.MAX_MEMORY_ADDRESS
+        step = simulator.step
+        buffer = self.buffer
+        # Ring writes are inlined (see TraceBuffer.append) to keep the per-step cost down
+        pcs, words, accumulators = buffer.pc, buffer.word, buffer.accumulator
+        write_addresses, write_values = buffer.write_address, buffer.write_value
+        capacity = buffer.capacity
+        slot = buffer.total % capacity
+        recorded = 0
+        ended = False
+        try:
+            for _ in range(limit):
+                pc = simulator.program_counter
+                word = memory[pc] if 0 <= pc <= max_address else 0 # step() reports a bad PC
+                steps = simulator.steps_executed
+                running = step()
+                if simulator.steps_executed == steps:
+                    ended = True # The instruction faulted; step() has reported it
+                    break
+                pcs[slot] = pc
+                words[slot] = word
+                accumulators[slot] = simulator.accumulator
+                if word // 1000 in _WRITES_MEMORY:
+                    operand = word % 1000
+                    write_addresses[slot] = operand
+                    write_values[slot] = memory[operand]
+                else:
+                    write_addresses[slot] = -1
+                    write_values[slot] = 0
+                recorded += 1
+                slot += 1
+                if slot == capacity:
+                    slot = 0
+                if not running:
+                    ended = True
+                    break
+        finally:
+            buffer.total += recorded # Keep what was recorded even if step() raised
+        return ended
+
+    def dump(self, path):
+        """Writes the recorded steps to a binary trace file (see TraceBuffer.dump())."""
+        self.buffer.dump(path)
@@ -0,0 +1,261 @@
+import os
+from uvsim_core_logic import UVSim
+
+# This module turns a 6-digit BasicML program into a standalone Python module.
+# The generated module runs the program as a `while` loop over basic-block labels
+# with the accumulator held in a local. Whenever it reaches something it does not
+# handle inline (a write to a code address, a fault, an invalid word, a bad READ),
+# it hands the current state to the UVSim interpreter, so output, final state and
+# error messages are the same as UVSim.run().
+
+_MODULE_HEADER = '''"""
+BasicML program {source} compiled to Python by uvsim_transpiler.
+
+Call run() to execute it. It returns (accumulator, program_counter, memory).
+Self-modifying code and runtime errors resume in uvsim_core_logic.UVSim,
+which must be importable at that point.
+"""
+
+MEMORY_SIZE = {memory_size}
+MEMORY_IMAGE = {image} # Trailing zero words omitted
+
+# Addresses holding compiled instructions; writing to one resumes in the interpreter.
+CODE_ADDRESSES = {code_addresses}
+
+
+class _Resume(Exception):
+    """Raised inside run() to continue execution in the interpreter at `pc`."""
+
+    def __init__(self, pc, read=None):
+        super().__init__(pc)
+        self.pc = pc
+        self.read = read
+
+
+def _default_read():
+    return int(input("Enter an integer ({min_value} to {max_value}): "))
+
+
+def _default_write(value):
+    print(f"Output: {{value}}")
+
+
+def _replay(read, value=None, error=None):
+    """Returns a read function that first replays one already-consumed READ."""
+    pending = [True]
+
+    def replay_read():
+        if pending:
+            pending.clear()
+            if error is not None:
+                raise error
+            return value
+        return read()
+    return replay_read
+
+
+def _read(read, pc):
+    try:
+        value = read()
+    except Exception as error:
+        raise _Resume(pc, _replay(read, error=error))
+    if not ({min_value} <= value <= {max_value}):
+        raise _Resume(pc, _replay(read, value=value))
+    return value
+
+
+def _interpret(memory, acc, pc, read, write):
+    from uvsim_core_logic import UVSim # Only needed on the fallback path
+    simulator = UVSim(io_read_func=read, io_write_func=write)
+    simulator.load_memory_image(memory)
+    simulator.accumulator = acc
+    simulator.program_counter = pc
+    simulator.run_fast()
+    return simulator.accumulator, simulator.program_counter, list(simulator.memory)
+
+
+def run(io_read=None, io_write=None):
+    """
+    Runs the program until HALT or error.
+
+    Args:
+        io_read (callable, optional): Returns the integer for each READ.
+        io_write (callable, optional): Receives the value of each WRITE.
+
+    Returns:
+        tuple: (accumulator, program_counter, memory) after execution stops.
+    """
+    read = io_read if io_read else _default_read
+    write = io_write if io_write else _default_write
+    memory = list(MEMORY_IMAGE) + [0] * (MEMORY_SIZE - len(MEMORY_IMAGE))
+    acc = 0
+    label = 0
+    try:
+        while True:
+'''
+
+_MODULE_FOOTER = '''            else:
+                raise _Resume(label) # Entered code that was not compiled
+    except _Resume as resume:
+        return _interpret(memory, acc, resume.pc, resume.read or read, write)
+
+
+if __name__ == "__main__":
+    run()
+'''
+
+
+def _find_blocks(simulator):
+    """
+    Walks the control flow reachable from address 000 and splits it into basic blocks.
+
+    Args:
+        simulator (UVSim): A simulator with the program loaded (and predecoded).
+
+    Returns:
+        dict: Entry address -> list of (address, opcode, operand). The last item is
+              either a branch/HALT, the word at MAX_MEMORY_ADDRESS, an invalid word (opcode None), or a fall-through
+              marker (address, None, next_address) where next_address starts another block.
+    """
+    leaders = simulator._find_block_leaders()
+    blocks = {}
+    pending = [0]
+    while pending:
+        start = pending.pop()
+        if start in blocks or start > UVSim.MAX_MEMORY_ADDRESS:
+            continue
+        instructions = []
+        address = start
+        while True:
+            decoded = simulator._decoded[address]
+            if decoded is None:
+                instructions.append((address, None, None))
+                break
+            _, operand, opcode = decoded
+            instructions.append((address, opcode, operand))
+            if opcode == UVSim.BRANCH:
+                pending.append(operand)
+                break
+            if opcode in (UVSim.BRANCHNEG, UVSim.BRANCHZERO):
+                pending += [operand, address + 1]
+                break
+            if opcode == UVSim.HALT or address == UVSim.MAX_MEMORY_ADDRESS:
+                break
+            address += 1
+            if leaders[address]:
+                instructions.append((address, None, address))
+                pending.append(address)
+                break
+        blocks[start] = instructions
+    return blocks
+
+
+def _emit_instruction(address, opcode, operand, code_addresses):
+    """Returns the Python lines (without indentation) for one instruction."""
+    max_value, min_value = UVSim.MAX_WORD_VALUE, UVSim.MIN_WORD_VALUE
+    if opcode is None:
+        if operand is None:
+            return [f"raise _Resume({address}) # Not a valid instruction; the interpreter reports it"]
+        return [f"label = {operand}"]
+    if address == UVSim.MAX_MEMORY_ADDRESS and opcode not in (UVSim.BRANCH, UVSim.HALT):
+        return [f"raise _Resume({address}) # May run off the end of memory; the interpreter reports it"]
+
+    mnemonic = UVSim.disassemble_word(opcode * 1000 + operand)
+    lines = [f"# {address:03d}: {mnemonic}"]
+    if opcode == UVSim.READ:
+        lines.append(f"memory[{operand}] = _read(read, {address})")
+    elif opcode == UVSim.WRITE:
+        lines.append(f"write(memory[{operand}])")
+    elif opcode == UVSim.LOAD:
+        lines.append(f"acc = memory[{operand}]")
+    elif opcode == UVSim.STORE:
+        lines.append(f"memory[{operand}] = acc")
+    elif opcode in (UVSim.ADD, UVSim.SUBTRACT, UVSim.MULTIPLY):
+        symbol = {UVSim.ADD: "+", UVSim.SUBTRACT: "-", UVSim.MULTIPLY: "*"}[opcode]
+        lines += [f"result = acc {symbol} memory[{operand}]",
+                  f"if result > {max_value} or result < {min_value}:",
+                  f"    raise _Resume({address})",
+                  "acc = result"]
+    elif opcode == UVSim.DIVIDE:
+        lines += [f"divisor = memory[{operand}]",
+                  "if divisor == 0:",
+                  f"    raise _Resume({address})",
+                  "acc = int(acc / divisor)"]
+    elif opcode == UVSim.BRANCH:
+        lines.append(f"label = {operand}")
+    elif opcode == UVSim.BRANCHNEG:
+        lines.append(f"label = {operand} if acc < 0 else {address + 1}")
+    elif opcode == UVSim.BRANCHZERO:
+        lines.append(f"label = {operand} if acc == 0 else {address + 1}")
+    elif opcode == UVSim.HALT:
+        lines.append(f"return acc, {address}, memory")
+
+    if opcode in (UVSim.READ, UVSim.STORE) and operand in code_addresses:
+        lines.append(f"raise _Resume({address + 1}) # Self-modifying write")
+    return lines
+
+
+def transpile(program_lines, source_name="<program>"):
+    """
+    Compiles a BasicML program into the source of a standalone Python module.
+
+    Args:
+        program_lines (list[str]): Program lines (4-digit programs are ported first).
+        source_name (str, optional): Name recorded in the generated module's docstring.
+
+    Returns:
+        str: Python source for the module.
+
+    Raises:
+        ValueError: If the program fails format detection, porting or loading.
+    """
+    simulator = UVSim()
+    simulator.load_program_from_lines(UVSim.ensure_6_digit(program_lines))
+    blocks = _find_blocks(simulator)
+    code_addresses = sorted({address for instructions in blocks.values()
+                             for address, opcode, _ in instructions if opcode is not None})
+
+    used = simulator.MEMORY_SIZE
+    while used and simulator.memory[used - 1] == 0:
+        used -= 1 # Trailing zero words are implied by the interpreter's reset
+
+    source = _MODULE_HEADER.format(
+        source=source_name,
+        memory_size=UVSim.MEMORY_SIZE,
+        image=repr(tuple(simulator.memory[:used])),
+        code_addresses=f"frozenset({code_addresses!r})",
+        min_value=UVSim.MIN_WORD_VALUE,
+        max_value=UVSim.MAX_WORD_VALUE,
+    )
+    code_address_set = set(code_addresses)
+    keyword = "if"
+    for start in sorted(blocks):
+        source += f"            {keyword} label == {start}:\n"
+        keyword = "elif"
+        for address, opcode, operand in blocks[start]:
+            for line in _emit_instruction(address, opcode, operand, code_address_set):
+                source += f"                {line}\n"
+    return source + _MODULE_FOOTER
+
+
+def transpile_file(input_path, output_path=None):
+    """
+    Transpiles a BasicML file and writes the generated module.
+
+    Args:
+        input_path (str): Path to the .bml/.txt program.
+        output_path (str, optional): Destination .py path. Defaults to `<name>_bml.py`
+                                     next to the input file.
+
+    Returns:
+        str: The path that was written.
+    """
+    with open(input_path, 'r', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    if output_path is None:
+        base, _ = os.path.splitext(input_path)
+        output_path = f"{base}_bml.py"
+    source = transpile(lines, source_name=os.path.basename(input_path))
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(source)
+    return output_path
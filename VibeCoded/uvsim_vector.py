@@ -0,0 +1,198 @@
+import numpy as np
+
+from uvsim_core_logic import UVSim
+
+# Lockstep execution of ONE BasicML program over many input vectors at once.
+# Requires NumPy (the rest of the simulator does not).
+#
+# Every lane is a full machine state: a row of `memory`, plus entries in the
+# `accumulator` and `program_counter` vectors. Each step fetches the word at every
+# running lane's PC, groups lanes by that word (which covers both diverging PCs
+# and per-lane self-modifying code), and executes each group with array operations
+# using the same semantics as UVSim. A fault stops only the lanes it happens in.
+
+# Lane status codes
+RUNNING = 0
+HALTED = 1
+OVERFLOW = 2
+DIVIDE_BY_ZERO = 3
+INVALID_INSTRUCTION = 4
+PC_OUT_OF_BOUNDS = 5
+INPUT_EXHAUSTED = 6
+
+STATUS_NAMES = {
+    RUNNING: "running", HALTED: "halted", OVERFLOW: "overflow",
+    DIVIDE_BY_ZERO: "divide_by_zero", INVALID_INSTRUCTION: "invalid_instruction",
+    PC_OUT_OF_BOUNDS: "pc_out_of_bounds", INPUT_EXHAUSTED: "input_exhausted",
+}
+
+
+class VectorUVSim:
+    """
+    Runs one 6-digit program on N independent machine states in lockstep.
+
+    A lane that faults keeps the PC and accumulator it had before the faulting
+    instruction, matching the state UVSim leaves behind after a runtime error.
+    """
+
+    def __init__(self, program_lines, input_sets, output_capacity=16):
+        """
+        Loads the program into every lane.
+
+        Args:
+            program_lines (list[str]): The program (4-digit programs are ported).
+            input_sets (list[list[int]]): One list of READ values per lane; lists may differ in length.
+            output_capacity (int, optional): Initial WRITE slots per lane (grows as needed).
+
+        Raises:
+            ValueError: If the program cannot be loaded or there are no lanes.
+        """
+        template = UVSim(io_read_func=lambda: 0, io_write_func=lambda value: None)
+        template.load_program_from_lines(UVSim.ensure_6_digit(program_lines))
+        lanes = len(input_sets)
+        if lanes == 0:
+            raise ValueError("At least one input set (lane) is required.")
+
+        self.lanes = lanes
+        self.memory = np.tile(np.asarray(template.memory, dtype=np.int64), (lanes, 1))
+        self.accumulator = np.zeros(lanes, dtype=np.int64)
+        self.program_counter = np.zeros(lanes, dtype=np.int64)
+        self.status = np.zeros(lanes, dtype=np.int8)
+        self.steps = np.zeros(lanes, dtype=np.int64) # Instructions executed per lane
+
+        width = max(1, max(len(values) for values in input_sets))
+        self.inputs = np.zeros((lanes, width), dtype=np.int64)
+        self.input_counts = np.zeros(lanes, dtype=np.int64)
+        for lane, values in enumerate(input_sets):
+            self.inputs[lane, :len(values)] = values
+            self.input_counts[lane] = len(values)
+        self.input_position = np.zeros(lanes, dtype=np.int64)
+
+        self.output_values = np.zeros((lanes, max(1, output_capacity)), dtype=np.int64)
+        self.output_counts = np.zeros(lanes, dtype=np.int64)
+
+    def outputs(self, lane):
+        """Returns the values written by `lane`, in order."""
+        return self.output_values[lane, :self.output_counts[lane]].tolist()
+
+    def status_name(self, lane):
+        """Returns the status of `lane` as a string (see STATUS_NAMES)."""
+        return STATUS_NAMES[int(self.status[lane])]
+
+    def run(self, max_steps=None):
+        """
+        Steps all lanes until every lane has halted or faulted.
+
+        Args:
+            max_steps (int, optional): Stop after this many lockstep steps even if lanes are still running.
+
+        Returns:
+            int: The number of lockstep steps performed.
+        """
+        count = 0
+        while (max_steps is None or count < max_steps) and self.step():
+            count += 1
+        return count
+
+    def step(self):
+        """
+        Executes one instruction on every running lane.
+
+        Returns:
+            bool: True if any lane was running, False if all have stopped.
+        """
+        active = np.flatnonzero(self.status == RUNNING)
+        if active.size == 0:
+            return False
+
+        pcs = self.program_counter[active]
+        off_end = pcs > UVSim.MAX_MEMORY_ADDRESS
+        if off_end.any():
+            self.status[active[off_end]] = PC_OUT_OF_BOUNDS
+            active = active[~off_end]
+            if active.size == 0:
+                return True
+            pcs = pcs[~off_end]
+
+        words = self.memory[active, pcs]
+        first = words[0]
+        if (words == first).all():
+            self._execute(int(first), active)
+        else:
+            distinct, group_of = np.unique(words, return_inverse=True)
+            for index, word in enumerate(distinct):
+                self._execute(int(word), active[group_of == index])
+        self.steps[active] += self.status[active] <= HALTED # Faulting instructions do not count
+        return True
+
+    def _execute(self, word, lanes):
+        """Executes the instruction `word` on the given lane indices."""
+        opcode, operand = divmod(word, 1000)
+        if word < 0 or operand > UVSim.MAX_MEMORY_ADDRESS or opcode not in UVSim.OPCODE_NAMES:
+            self.status[lanes] = INVALID_INSTRUCTION
+            return
+
+        acc = self.accumulator
+        pc = self.program_counter
+        memory = self.memory
+        if opcode == UVSim.READ:
+            position = self.input_position[lanes]
+            exhausted = position >= self.input_counts[lanes]
+            self.status[lanes[exhausted]] = INPUT_EXHAUSTED
+            lanes, position = lanes[~exhausted], position[~exhausted]
+            values = self.inputs[lanes, position]
+            self.input_position[lanes] += 1
+            lanes, values = self._flag_overflow(lanes, values)
+            memory[lanes, operand] = values
+            pc[lanes] += 1
+        elif opcode == UVSim.WRITE:
+            slots = self.output_counts[lanes]
+            if slots.max() >= self.output_values.shape[1]:
+                self.output_values = np.concatenate(
+                    [self.output_values, np.zeros_like(self.output_values)], axis=1)
+            self.output_values[lanes, slots] = memory[lanes, operand]
+            self.output_counts[lanes] += 1
+            pc[lanes] += 1
+        elif opcode == UVSim.LOAD:
+            acc[lanes] = memory[lanes, operand]
+            pc[lanes] += 1
+        elif opcode == UVSim.STORE:
+            memory[lanes, operand] = acc[lanes]
+            pc[lanes] += 1
+        elif opcode in (UVSim.ADD, UVSim.SUBTRACT, UVSim.MULTIPLY):
+            values = memory[lanes, operand]
+            if opcode == UVSim.ADD:
+                result = acc[lanes] + values
+            elif opcode == UVSim.SUBTRACT:
+                result = acc[lanes] - values
+            else:
+                result = acc[lanes] * values
+            lanes, result = self._flag_overflow(lanes, result)
+            acc[lanes] = result
+            pc[lanes] += 1
+        elif opcode == UVSim.DIVIDE:
+            divisors = memory[lanes, operand]
+            zero = divisors == 0
+            self.status[lanes[zero]] = DIVIDE_BY_ZERO
+            lanes, divisors = lanes[~zero], divisors[~zero]
+            dividends = acc[lanes]
+            # Truncate toward zero, like int(acc / value) in UVSim
+            quotient = np.abs(dividends) // np.abs(divisors)
+            acc[lanes] = np.where((dividends < 0) != (divisors < 0), -quotient, quotient)
+            pc[lanes] += 1
+        elif opcode == UVSim.BRANCH:
+            pc[lanes] = operand
+        elif opcode == UVSim.BRANCHNEG:
+            pc[lanes] = np.where(acc[lanes] < 0, operand, pc[lanes] + 1)
+        elif opcode == UVSim.BRANCHZERO:
+            pc[lanes] = np.where(acc[lanes] == 0, operand, pc[lanes] + 1)
+        elif opcode == UVSim.HALT:
+            self.status[lanes] = HALTED
+
+    def _flag_overflow(self, lanes, values):
+        """Marks lanes whose value is outside the 6-digit range; returns the remaining lanes and values."""
+        bad = (values > UVSim.MAX_WORD_VALUE) | (values < UVSim.MIN_WORD_VALUE)
+        if bad.any():
+            self.status[lanes[bad]] = OVERFLOW
+            return lanes[~bad], values[~bad]
+        return lanes, values
@@ -0,0 +1,278 @@
+"""
+Benchmarks the three BasicML engines in this repository on the same workloads.
+
+Engines:
+  legacy       UVSim/UVSim.py        UVSim.execute_program()
+  legacy-gui   UVSim/UVSim_GUI.py    UVSim.execute_step() loop (needs Tkinter to import)
+  vibecoded    VibeCoded             UVSim.run() (plus run_fast / run_compiled rows)
+
+Workloads are written in 4-digit BasicML that fits in 100 words and keeps values
+within +/-9999, so every engine can run them; VibeCoded runs the ported 6-digit
+form. Instruction counts come from VibeCoded's steps_executed, and every engine's
+output is checked against VibeCoded's.
+
+Usage:
+  python benchmarks/bench_engines.py [--repeat 3] [--engine NAME ...] [--workload NAME ...]
+                                     [--generated COUNT] [--json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import timeit
+import tracemalloc
+from collections import namedtuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "UVSim"), os.path.join(ROOT, "VibeCoded")]
+
+import UVSim as legacy_uvsim # UVSim/UVSim.py
+import workload_gen
+from output_handler import OutputHandler
+from uvsim_core_logic import UVSim as VibeUVSim
+
+try:
+    import UVSim_GUI as legacy_gui # Imports tkinter at module level
+except ImportError:
+    legacy_gui = None
+
+# One benchmark program. `lines` are 4-digit BasicML; `inputs` feed its READs.
+Workload = namedtuple("Workload", "name description lines inputs")
+
+# One engine under test. create() -> simulator, load(simulator, lines),
+# run(simulator, inputs) -> list of output values.
+Engine = namedtuple("Engine", "name create load run")
+
+
+def _program(words):
+    """Formats {address: word} as contiguous 4-digit lines, filling gaps with +0000."""
+    return [f"{words.get(address, 0):+05d}" for address in range(max(words) + 1)]
+
+
+def _arith_loop(iterations=5000):
+    """Countdown loop doing MULTIPLY/ADD/DIVIDE/SUBTRACT on x each pass."""
+    return Workload("arith_loop", f"{iterations} passes of multiply/add/divide/subtract", _program({
+        0: 2050, 1: 4212, 2: 3151, 3: 2150,             # n -= 1, exit when n == 0
+        4: 2052, 5: 3353, 6: 3053, 7: 3253, 8: 3151,    # x = (x * 3 + 3) // 3 - 1
+        9: 2152, 10: 4000, 12: 1152, 13: 4300,          # store x, loop; WRITE x, HALT
+        50: iterations, 51: 1, 52: 7, 53: 3,
+    }), [])
+
+
+def _memory_sweep(passes=100):
+    """Self-modifying LOAD/ADD/STORE walk that increments cells 60-99 on every pass."""
+    return Workload("memory_sweep", f"{passes} passes incrementing 40 cells via self-modifying code", _program({
+        0: 2055, 1: 4224, 2: 3151, 3: 2155,             # passes -= 1, exit when 0
+        4: 2056, 5: 2114, 6: 2057, 7: 2116,             # reset the LOAD/STORE at 14/16 to cell 60
+        8: 2058, 9: 2159,                               # left = 40
+        10: 2059, 11: 4200, 12: 3151, 13: 2159,         # next pass when left == 0
+        14: 2060, 15: 3051, 16: 2160,                   # memory[cell] += 1
+        17: 2014, 18: 3051, 19: 2114,                   # advance the LOAD operand
+        20: 2016, 21: 3051, 22: 2116, 23: 4010,         # advance the STORE operand, loop
+        24: 1160, 25: 1199, 26: 4300,                   # WRITE first and last cell, HALT
+        51: 1, 55: passes, 56: 2060, 57: 2160, 58: 40,
+    }), [])
+
+
+def _output_heavy(count=5000):
+    """Counts up, writing every value."""
+    return Workload("output_heavy", f"{count - 1} WRITEs in a 6-instruction loop", _program({
+        0: 2050, 1: 1150, 2: 3051, 3: 2150, 4: 3152, 5: 4100, 6: 4300,
+        50: 1, 51: 1, 52: count,
+    }), [])
+
+
+def _input_heavy(count=900):
+    """READs `count` values and writes their sum."""
+    return Workload("input_heavy", f"{count} READs summed", _program({
+        0: 2050, 1: 4209, 2: 3151, 3: 2150,             # left -= 1, exit when 0
+        4: 1053, 5: 2052, 6: 3053, 7: 2152, 8: 4000,    # sum += READ
+        9: 1152, 10: 4300,
+        50: count, 51: 1,
+    }), [value % 10 + 1 for value in range(count)])
+
+
+WORKLOADS = [_arith_loop(), _memory_sweep(), _output_heavy(), _input_heavy()]
+
+
+def generated_workloads(count, seed=0):
+    """Returns `count` 4-digit workloads from workload_gen, filling all 100 words."""
+    workloads = []
+    for number in range(count):
+        generated = workload_gen.generate_program(seed + number, digits=4, iterations=2000, elements=4,
+                                                  read_ratio=0.15, write_ratio=0.15,
+                                                  self_modifying=0.2, footprint=100)
+        workloads.append(Workload(f"gen_{seed + number}", "workload_gen.generate_program", generated.lines,
+                                  generated.inputs))
+    return workloads
+
+
+def _output_values(text):
+    """Extracts the values from "Output: N" lines printed by the legacy engines."""
+    return [int(line.split(":", 1)[1]) for line in text.splitlines() if line.startswith("Output:")]
+
+
+# --- Engine adapters ---
+
+def _legacy_load(simulator, lines):
+    simulator.load_program([int(line.strip()) for line in lines if line.strip()])
+
+
+def _legacy_run(simulator, inputs):
+    OutputHandler.input_vals = list(inputs)
+    OutputHandler.via_terminal = False
+    captured = io.StringIO()
+    with contextlib.redirect_stdout(captured):
+        simulator.execute_program()
+    return _output_values(captured.getvalue())
+
+
+def _legacy_gui_run(simulator, inputs):
+    """Drives execute_step() like UVSimApp.continue_execution(), answering READs and stopping at HALT."""
+    pending = iter(inputs)
+    chunks = []
+    memory = simulator.memory
+    while 0 <= simulator.instruction_counter < len(memory):
+        halting = memory[simulator.instruction_counter] // 100 == 43
+        simulator.execute_step(chunks.append)
+        if halting:
+            break
+        if simulator.waiting_for_input:
+            simulator.provide_input(next(pending))
+    return _output_values("".join(chunks))
+
+
+def _vibe_load(simulator, lines):
+    simulator.reset()
+    simulator.load_program_from_lines(VibeUVSim.ensure_6_digit(lines))
+
+
+def _vibe_runner(method):
+    def run(simulator, inputs):
+        outputs = []
+        pending = iter(inputs)
+        simulator.io_read = lambda: next(pending)
+        simulator.io_write = outputs.append
+        getattr(simulator, method)()
+        return outputs
+    return run
+
+
+def available_engines():
+    """Returns the engines that can be imported here."""
+    engines = [Engine("legacy", legacy_uvsim.UVSim, _legacy_load, _legacy_run)]
+    if legacy_gui is not None:
+        engines.append(Engine("legacy-gui", legacy_gui.UVSim, _legacy_load, _legacy_gui_run))
+    for method, name in (("run", "vibecoded"), ("run_fast", "vibecoded-fast"), ("run_compiled", "vibecoded-compiled")):
+        engines.append(Engine(name, VibeUVSim, _vibe_load, _vibe_runner(method)))
+    return engines
+
+
+# --- Measurement ---
+
+def reference_run(workload):
+    """Returns (instructions, outputs) for a workload from VibeCoded's run()."""
+    simulator = VibeUVSim()
+    _vibe_load(simulator, workload.lines)
+    outputs = _vibe_runner("run")(simulator, workload.inputs)
+    if simulator.last_error is not None:
+        raise RuntimeError(f"Workload {workload.name} failed: {simulator.last_error}")
+    return simulator.steps_executed, outputs
+
+
+def measure(engine, workload, instructions, expected, repeat=3):
+    """
+    Benchmarks one engine on one workload.
+
+    Returns:
+        dict: instructions/sec (best of `repeat` runs on fresh instances), load and
+              instance creation time in microseconds, peak traced memory in KiB,
+              and whether the outputs matched VibeCoded's.
+    """
+    best = None
+    outputs = None
+    for _ in range(repeat):
+        simulator = engine.create()
+        engine.load(simulator, workload.lines)
+        started = time.perf_counter()
+        outputs = engine.run(simulator, workload.inputs)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    loaded = engine.create()
+    load_runs, load_total = timeit.Timer(lambda: engine.load(loaded, workload.lines)).autorange()
+    create_runs, create_total = timeit.Timer(engine.create).autorange()
+
+    tracemalloc.start()
+    try:
+        simulator = engine.create()
+        engine.load(simulator, workload.lines)
+        engine.run(simulator, workload.inputs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "engine": engine.name,
+        "workload": workload.name,
+        "instructions": instructions,
+        "seconds": round(best, 6),
+        "instructions_per_sec": round(instructions / best) if best else None,
+        "load_us": round(load_total / load_runs * 1e6, 2),
+        "create_us": round(create_total / create_runs * 1e6, 2),
+        "peak_kib": round(peak / 1024, 1),
+        "outputs_match": outputs == expected,
+    }
+
+
+def format_table(results):
+    """Formats results as a fixed-width text table."""
+    header = (f"{'workload':<14} {'engine':<20} {'instr':>8} {'instr/s':>12} "
+              f"{'load us':>9} {'create us':>10} {'peak KiB':>9}  check")
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(f"{r['workload']:<14} {r['engine']:<20} {r['instructions']:>8} "
+                     f"{r['instructions_per_sec'] or 0:>12,} {r['load_us']:>9.1f} {r['create_us']:>10.2f} "
+                     f"{r['peak_kib']:>9.1f}  {'ok' if r['outputs_match'] else 'MISMATCH'}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    engines = available_engines()
+    parser = argparse.ArgumentParser(description="Benchmark the BasicML engines on a fixed workload corpus.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per engine and workload (best is kept).")
+    parser.add_argument("--engine", action="append", choices=[engine.name for engine in engines],
+                        help="Engine to run (repeatable; default: all available).")
+    parser.add_argument("--workload", action="append", choices=[workload.name for workload in WORKLOADS],
+                        help="Workload to run (repeatable; default: all).")
+    parser.add_argument("--generated", type=int, default=0,
+                        help="Also run this many generated workloads (see workload_gen.py).")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines.")
+    args = parser.parse_args(argv)
+
+    if legacy_gui is None and not args.json:
+        print("Note: Tkinter is not available; skipping the legacy-gui engine.", file=sys.stderr)
+
+    results = []
+    for workload in WORKLOADS + generated_workloads(args.generated):
+        if args.workload and workload.name not in args.workload:
+            continue
+        instructions, expected = reference_run(workload)
+        for engine in engines:
+            if args.engine and engine.name not in args.engine:
+                continue
+            results.append(measure(engine, workload, instructions, expected, args.repeat))
+
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+    else:
+        print(format_table(results))
+    return 0 if all(result["outputs_match"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
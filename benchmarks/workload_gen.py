@@ -0,0 +1,286 @@
+"""
+Generates synthetic BasicML programs, their inputs and expected outputs.
+
+Each program is one counted loop whose body is a random sequence of elements:
+  arith   x = (x * k + c) mod m, with the mod done by DIVIDE/MULTIPLY/SUBTRACT (11 words)
+  branch  y = x if x < h else h (7 words, 2 of them branches)
+  read    READ x (the generated input is always in x's range)
+  write   WRITE x
+  selfmod copies the next value cell into a sink by rewriting a LOAD's operand (10 words)
+Every value cell x has a bound m_x, so no arithmetic can overflow even in the
+4-digit (+/-9999) range, and every BRANCH runs with a positive accumulator so the
+legacy engines (whose opcode 40 only jumps on a positive accumulator) agree too.
+
+Expected outputs come from a small reference interpreter in this file, independent
+of the engines under test.
+
+Usage:
+  python benchmarks/workload_gen.py OUT_DIR [--count 10] [--seed 0] [--digits 6] [--iterations 1000] ...
+writes OUT_DIR/gen_NNN.bml files and OUT_DIR/manifest.json, a uvsim_cli.py batch
+manifest with an extra "expected_outputs" list per program.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from collections import namedtuple
+
+READ, WRITE, LOAD, STORE, ADD, SUBTRACT, DIVIDE, MULTIPLY = 10, 11, 20, 21, 30, 31, 32, 33
+BRANCH, BRANCHNEG, BRANCHZERO, HALT = 40, 41, 42, 43
+
+# Format parameters: (words of memory, opcode multiplier, largest word, largest cell bound)
+FORMATS = {4: (100, 100, 9999, 999), 6: (250, 1000, 999999, 99999)}
+
+# Words of code and of per-element data for each element kind
+_CODE_WORDS = {"arith": 11, "branch": 7, "read": 1, "write": 1, "selfmod": 10}
+_DATA_WORDS = {"arith": 4, "branch": 1, "read": 0, "write": 0, "selfmod": 2}
+_LOOP_WORDS = 4 + 2 + 1 # Loop counter update, final WRITEs, HALT
+
+# A generated program. `lines` are ready to load; `words` are the same as integers.
+GeneratedProgram = namedtuple("GeneratedProgram", "lines words inputs expected_outputs steps digits")
+
+
+class _Program:
+    """Code and data words with symbolic data cells, resolved by layout()."""
+
+    def __init__(self):
+        self.code = [] # [opcode, operand]; operand is an int address or a cell name
+        self.cells = {} # name -> initial value: int, or ("instr", opcode, operand)
+
+    def here(self):
+        return len(self.code)
+
+    def emit(self, opcode, operand=0):
+        self.code.append([opcode, operand])
+        return len(self.code) - 1
+
+    def cell(self, name, value=0):
+        self.cells[name] = value
+        return name
+
+    def layout(self, multiplier):
+        """Returns the memory image as a list of ints (code, then cells in creation order)."""
+        addresses = {name: len(self.code) + index for index, name in enumerate(self.cells)}
+        resolve = lambda operand: addresses[operand] if isinstance(operand, str) else operand
+        words = [opcode * multiplier + resolve(operand) for opcode, operand in self.code]
+        for value in self.cells.values():
+            if isinstance(value, tuple):
+                value = value[1] * multiplier + resolve(value[2])
+            words.append(value)
+        return words
+
+
+def _choose_kinds(rng, elements, branch_density, read_ratio, write_ratio, self_modifying):
+    """Picks the element kinds for the loop body."""
+    kinds = []
+    for _ in range(elements):
+        roll = rng.random()
+        for kind, share in (("branch", branch_density), ("read", read_ratio),
+                            ("write", write_ratio), ("selfmod", self_modifying)):
+            if roll < share:
+                kinds.append(kind)
+                break
+            roll -= share
+        else:
+            kinds.append("arith")
+    return kinds
+
+
+def generate_program(seed=0, digits=6, iterations=100, elements=8, branch_density=0.2,
+                     read_ratio=0.1, write_ratio=0.1, self_modifying=0.0, footprint=None):
+    """
+    Generates one program with matching inputs and expected outputs.
+
+    Args:
+        seed (int): Random seed; the same arguments always give the same program.
+        digits (int): 6 for 250-word 6-digit programs, 4 for 100-word 4-digit ones.
+        iterations (int): Loop trip count (at most 9999 for 4-digit programs).
+        elements (int): Loop body elements.
+        branch_density (float): Share of elements that are conditional branches.
+        read_ratio (float): Share of elements that READ.
+        write_ratio (float): Share of elements that WRITE.
+        self_modifying (float): Share of elements that rewrite an instruction.
+        footprint (int, optional): Total words of memory to use (code and data), up to
+                                   the whole memory. Extra words become value cells,
+                                   which self-modifying elements sweep over.
+
+    Returns:
+        GeneratedProgram
+
+    Raises:
+        ValueError: If the arguments do not fit in memory or the word range.
+    """
+    if digits not in FORMATS:
+        raise ValueError("digits must be 4 or 6.")
+    memory_size, multiplier, max_word, max_bound = FORMATS[digits]
+    if not 1 <= iterations <= max_word:
+        raise ValueError(f"iterations must be between 1 and {max_word} for {digits}-digit programs.")
+
+    rng = random.Random(seed)
+    kinds = _choose_kinds(rng, elements, branch_density, read_ratio, write_ratio, self_modifying)
+    fixed_words = (_LOOP_WORDS + 2 + ("selfmod" in kinds)
+                   + sum(_CODE_WORDS[kind] + _DATA_WORDS[kind] for kind in kinds))
+    value_count = max(2, (footprint or 0) - fixed_words) if footprint else max(2, min(8, elements))
+    if fixed_words + value_count > memory_size:
+        raise ValueError(f"Program needs {fixed_words + value_count} words; "
+                         f"{digits}-digit memory has {memory_size}.")
+
+    program = _Program()
+    # Value cells first, so they are contiguous for the self-modifying table sweep.
+    # Bounds stay below 1000 in 4-digit programs so no initial value looks like an instruction.
+    bounds = [rng.randint(50, max_bound) for _ in range(value_count)]
+    values = [program.cell(f"v{i}", rng.randrange(bound)) for i, bound in enumerate(bounds)]
+    one = program.cell("one", 1)
+    counter = program.cell("n", -iterations) # Negative, so it never looks like an instruction
+    sink = program.cell("sink") if "selfmod" in kinds else None
+
+    reads = [] # Bound of the cell each READ fills, in execution order within one pass
+    top = program.here()
+    for index, kind in enumerate(kinds):
+        if kind == "arith":
+            x = rng.randrange(value_count)
+            k = program.cell(f"k{index}", rng.randint(1, 3))
+            c = program.cell(f"c{index}", rng.randint(0, 99))
+            m = program.cell(f"m{index}", bounds[x])
+            t = program.cell(f"t{index}")
+            for opcode, operand in ((LOAD, values[x]), (MULTIPLY, k), (ADD, c), (STORE, values[x]),
+                                    (LOAD, values[x]), (DIVIDE, m), (MULTIPLY, m), (STORE, t),
+                                    (LOAD, values[x]), (SUBTRACT, t), (STORE, values[x])):
+                program.emit(opcode, operand)
+        elif kind == "branch":
+            x, y = rng.randrange(value_count), rng.randrange(value_count)
+            h = program.cell(f"h{index}", rng.randint(1, min(bounds[x], bounds[y]) - 1))
+            program.emit(LOAD, values[x])
+            program.emit(SUBTRACT, h)
+            below = program.emit(BRANCHNEG)
+            program.emit(LOAD, h)
+            join = program.emit(BRANCH) # Accumulator is h > 0 here
+            program.code[below][1] = program.emit(LOAD, values[x])
+            program.code[join][1] = program.emit(STORE, values[y])
+        elif kind == "read":
+            x = rng.randrange(value_count)
+            reads.append(bounds[x])
+            program.emit(READ, values[x])
+        elif kind == "write":
+            targets = values + ([sink] if sink else [])
+            program.emit(WRITE, rng.choice(targets))
+        else: # selfmod
+            start = program.cell(f"start{index}", ("instr", LOAD, values[0]))
+            end = program.cell(f"end{index}", ("instr", LOAD, values[-1]))
+            fetch = program.emit(LOAD, values[0]) # Operand is rewritten below
+            program.emit(STORE, sink)
+            program.emit(LOAD, fetch)
+            program.emit(SUBTRACT, end)
+            advance = program.emit(BRANCHNEG)
+            program.emit(LOAD, start) # Past the end of the table: rewind
+            rewind = program.emit(BRANCH) # Accumulator holds an instruction word > 0
+            program.code[advance][1] = program.emit(LOAD, fetch)
+            program.emit(ADD, one)
+            program.code[rewind][1] = program.emit(STORE, fetch)
+    program.emit(LOAD, counter)
+    program.emit(ADD, one)
+    program.emit(STORE, counter)
+    program.emit(BRANCHNEG, top)
+    program.emit(WRITE, values[0])
+    program.emit(WRITE, values[-1])
+    program.emit(HALT)
+
+    words = program.layout(multiplier)
+    inputs = [rng.randrange(bound) for _ in range(iterations) for bound in reads]
+    outputs, steps = reference_run(words, inputs, digits)
+    lines = [f"{word:+0{digits + 1}d}" for word in words]
+    return GeneratedProgram(lines, words, inputs, outputs, steps, digits)
+
+
+def reference_run(words, inputs, digits=6, max_steps=100_000_000):
+    """
+    Runs a memory image with straightforward BasicML semantics.
+
+    Returns:
+        tuple: (outputs, instructions executed).
+
+    Raises:
+        ValueError: On overflow, an invalid word, running out of inputs, or max_steps.
+    """
+    memory_size, multiplier, max_word, _ = FORMATS[digits]
+    memory = list(words) + [0] * (memory_size - len(words))
+    pending = iter(inputs)
+    outputs = []
+    acc = pc = steps = 0
+    while steps < max_steps:
+        word = memory[pc]
+        opcode, operand = divmod(word, multiplier)
+        if word < 0 or operand >= memory_size:
+            raise ValueError(f"Invalid instruction {word} at {pc}.")
+        steps += 1
+        pc += 1
+        if opcode == READ:
+            memory[operand] = next(pending)
+        elif opcode == WRITE:
+            outputs.append(memory[operand])
+        elif opcode == LOAD:
+            acc = memory[operand]
+        elif opcode == STORE:
+            memory[operand] = acc
+        elif opcode == ADD:
+            acc += memory[operand]
+        elif opcode == SUBTRACT:
+            acc -= memory[operand]
+        elif opcode == DIVIDE:
+            acc //= memory[operand]
+        elif opcode == MULTIPLY:
+            acc *= memory[operand]
+        elif opcode == BRANCH:
+            pc = operand
+        elif opcode == BRANCHNEG:
+            pc = operand if acc < 0 else pc
+        elif opcode == BRANCHZERO:
+            pc = operand if acc == 0 else pc
+        elif opcode == HALT:
+            return outputs, steps
+        else:
+            raise ValueError(f"Invalid opcode {opcode} at {pc - 1}.")
+        if not -max_word <= acc <= max_word:
+            raise ValueError(f"Overflow at {pc - 1}.")
+    raise ValueError(f"No HALT within {max_steps} instructions.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic BasicML programs with inputs and expected outputs.")
+    parser.add_argument("output_dir", help="Directory for the .bml files and manifest.json.")
+    parser.add_argument("--count", type=int, default=10, help="Programs to generate.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first program (the rest follow).")
+    parser.add_argument("--digits", type=int, choices=sorted(FORMATS), default=6, help="Word format.")
+    parser.add_argument("--iterations", type=int, default=1000, help="Loop trip count.")
+    parser.add_argument("--elements", type=int, default=8, help="Loop body elements.")
+    parser.add_argument("--branch-density", type=float, default=0.2)
+    parser.add_argument("--read-ratio", type=float, default=0.1)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--self-modifying", type=float, default=0.0)
+    parser.add_argument("--footprint", type=int, help="Total words of memory to use.")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest = []
+    for number in range(args.count):
+        try:
+            generated = generate_program(args.seed + number, args.digits, args.iterations, args.elements,
+                                         args.branch_density, args.read_ratio, args.write_ratio,
+                                         args.self_modifying, args.footprint)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        name = f"gen_{number:03d}.bml"
+        with open(os.path.join(args.output_dir, name), 'w', encoding='utf-8') as f:
+            f.write("\n".join(generated.lines) + "\n")
+        manifest.append({"program": name, "inputs": [generated.inputs],
+                         "expected_outputs": [generated.expected_outputs], "steps": generated.steps})
+    with open(os.path.join(args.output_dir, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    print(f"Wrote {args.count} programs to '{args.output_dir}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())